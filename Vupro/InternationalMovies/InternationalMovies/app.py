@@ -1,11 +1,12 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import os
-import pickle
+import uuid
 from data_processor import DataProcessor
-from recommendation_engine import RecommendationEngine
-from utils import fetch_poster, load_data
+from enrichment import MovieEnricher
+from event_log import EventLog
+from staged_startup import StagedStartup
+from utils import fetch_movie_enrichment, fetch_poster, load_data
 
 # Page configuration
 st.set_page_config(
@@ -14,6 +15,28 @@ st.set_page_config(
     layout="wide"
 )
 
+# One event log per server process, shared by all sessions
+@st.cache_resource
+def get_event_log():
+    return EventLog(os.environ.get('EVENT_LOG_DIR', 'event_logs'))
+
+event_log = get_event_log()
+
+# Trailers and streaming providers are fetched when a movie is first shown,
+# cached across sessions
+@st.cache_resource
+def get_enricher():
+    return MovieEnricher(fetch_movie_enrichment)
+
+enricher = get_enricher()
+
+def movie_extras(movie_info):
+    """Trailer and providers of a displayed movie; the trailer is fetched on first display unless it was ingested."""
+    extras = {'trailer_url': movie_info.get('trailer_url', ''), 'ott_providers': movie_info.get('ott_providers', {})}
+    if 'trailer_url' not in movie_info and 'tmdb_id' in movie_info:
+        extras.update(enricher.get(int(movie_info['tmdb_id'])))
+    return extras
+
 # App title
 st.title("🎬 International Movie Recommender System")
 st.markdown("Discover movies from Bollywood, Regional Indian Cinema and Hollywood using advanced NLP and machine learning!")
@@ -31,30 +54,28 @@ if 'tfidf_matrix' not in st.session_state:
     st.session_state.tfidf_matrix = None
 if 'feature_names' not in st.session_state:
     st.session_state.feature_names = None
+if 'startup' not in st.session_state:
+    st.session_state.startup = None
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if 'shown_recommendations' not in st.session_state:
+    # Movies recommended in the last results, with their rank and method
+    st.session_state.shown_recommendations = {}
 
 # Data loading section with spinner
 if not st.session_state.data_loaded:
     with st.spinner("Loading movie data and initializing recommendation engine..."):
         try:
-            # Load data
-            movies_df = load_data()
-            
-            # Initialize processor and engine
-            processor = DataProcessor()
-            movies_df = processor.preprocess_data(movies_df)
-            
-            # Process movie data for recommendations
-            tfidf_matrix, feature_names = processor.vectorize_text(movies_df['preprocessed_overview'].tolist())
-            
-            # Initialize recommendation engine
-            engine = RecommendationEngine(movies_df, tfidf_matrix, feature_names)
+            # Staged startup: the metadata-only engine is ready first, while plot
+            # text preprocessing and TF-IDF run in the background. Both engines use a
+            # result cache, since Streamlit reruns the whole script on every widget change.
+            startup = StagedStartup(load_data, processor=DataProcessor(), cache_size=256)
+            startup.start()
             
             # Save to session state
-            st.session_state.processor = processor
-            st.session_state.engine = engine
-            st.session_state.movies_df = movies_df
-            st.session_state.tfidf_matrix = tfidf_matrix
-            st.session_state.feature_names = feature_names
+            st.session_state.startup = startup
+            st.session_state.processor = startup.processor
+            st.session_state.movies_df = startup.movies_df
             st.session_state.data_loaded = True
             
         except Exception as e:
@@ -63,18 +84,32 @@ if not st.session_state.data_loaded:
 
 # Main app UI (only show after data is loaded)
 if st.session_state.data_loaded:
+    startup = st.session_state.startup
     movies_df = st.session_state.movies_df
-    engine = st.session_state.engine
+    
+    # Pick up the full engine once the background build has finished
+    engine = startup.engine
+    st.session_state.engine = engine
+    st.session_state.tfidf_matrix = startup.tfidf_matrix
+    st.session_state.feature_names = startup.feature_names
+    ready_methods = startup.ready_methods()
     
     # Sidebar for filters and options
     with st.sidebar:
         st.header("Filters & Options")
         
-        # Movie search/selection
+        # Movie search/selection, by stable ID since titles are not unique
         st.subheader("Find a Movie")
-        selected_movie = st.selectbox(
+        movie_labels = {
+            movie_id: f"{title} ({int(year)})" if pd.notna(year) else title
+            for movie_id, title, year in zip(engine.movie_ids.tolist(), movies_df['title'],
+                                             movies_df['release_year'] if 'release_year' in movies_df.columns
+                                             else [None] * len(movies_df))
+        }
+        selected_movie_id = st.selectbox(
             "Type or select a movie title:",
-            options=movies_df['title'].tolist(),
+            options=list(movie_labels),
+            format_func=movie_labels.get,
             index=0,
             help="Select a movie to get recommendations similar to it"
         )
@@ -117,29 +152,81 @@ if st.session_state.data_loaded:
         
         # Industry selection (multi-select) - New filter for different industries
         if 'industry' in movies_df.columns:
-            all_industries = sorted(movies_df['industry'].dropna().unique())
+            if 'industries' in movies_df.columns:
+                all_industries = sorted({industry for listed in movies_df['industries'] if isinstance(listed, list)
+                                         for industry in listed})
+            else:
+                all_industries = sorted(movies_df['industry'].dropna().unique())
             selected_industries = st.multiselect(
                 "Select Movie Industries:",
                 options=all_industries,
                 default=[]
             )
         
+        # Streaming availability filter (subscriptions only)
+        selected_providers = []
+        selected_region = None
+        if engine.provider_index is not None and engine.provider_index.keys:
+            regions = [region for region in engine.provider_index.regions() if region]
+            selected_region = st.selectbox("Streaming region:", options=["Any"] + regions,
+                                           index=(regions.index('IN') + 1) if 'IN' in regions else 0)
+            selected_region = None if selected_region == "Any" else selected_region
+            selected_providers = st.multiselect(
+                "Available on my subscriptions:",
+                options=engine.provider_index.providers(selected_region, offers=('flatrate',)),
+                default=[]
+            )
+        
+        collapse_duplicates = st.checkbox(
+            "Hide near-duplicates (remakes, dubs, re-listings)",
+            value=True,
+            help="Show only the best match among movies with nearly the same plot"
+        )
+        
         # Recommendation approach
         st.subheader("Recommendation Method")
         recommendation_method = st.radio(
             "Choose method:",
-            ["Plot-based", "Genre-based", "Combined"],
-            index=2
+            ["Plot-based", "Genre-based", "Combined", "Connections"],
+            index=2,
+            help="Connections also finds movies linked through shared cast and crew, "
+                 "such as a frequent collaborator's other films"
+        )
+        
+        # Release-year preferences, scored alongside the combined similarity
+        prefer_same_era = st.checkbox(
+            "Prefer movies from around the same year",
+            value=False,
+            help="Combined method only"
+        )
+        prefer_recent = st.checkbox(
+            "Prefer recent releases",
+            value=False,
+            help="Combined method only"
         )
         
+        if startup.building:
+            st.caption("⏳ Plot-based and combined recommendations are still being prepared; "
+                       "genre-based recommendations are available now.")
+            st.button("Check again", use_container_width=True)
+        elif startup.error:
+            st.caption(f"Plot-based recommendations are unavailable: {startup.error}")
+        
         # Get recommendations button
         recommend_button = st.button("Get Recommendations", use_container_width=True)
     
     # Main content area
     # Display selected movie details
-    if selected_movie:
-        movie_idx = movies_df[movies_df['title'] == selected_movie].index[0]
+    if selected_movie_id is not None:
+        movie_idx = engine.row_of(selected_movie_id)
         movie_info = movies_df.iloc[movie_idx]
+        selected_movie = movie_info['title']
+        
+        # Picking a movie from the last recommendations counts as a click on it
+        shown = st.session_state.shown_recommendations.pop(selected_movie_id, None)
+        if shown is not None:
+            event_log.record('click', session=st.session_state.session_id, movie_id=selected_movie_id,
+                             source_id=shown['source_id'], rank=shown['rank'], method=shown['method'])
         
         col1, col2 = st.columns([1, 2])
         
@@ -177,7 +264,8 @@ if st.session_state.data_loaded:
                 st.write(f"**Director:** {director}")
                 
             # Display industry information if available
-            industry = movie_info.get('industry', '')
+            industries = movie_info.get('industries')
+            industry = ", ".join(industries) if isinstance(industries, list) else movie_info.get('industry', '')
             if industry:
                 st.write(f"**Industry:** {industry}")
                 
@@ -198,12 +286,13 @@ if st.session_state.data_loaded:
                 st.write(f"**Language:** {language_display}")
                 
             # Display trailer link if available
-            trailer_url = movie_info.get('trailer_url', '')
+            extras = movie_extras(movie_info)
+            trailer_url = extras['trailer_url']
             if trailer_url:
                 st.markdown(f"[🎬 **Watch Trailer**]({trailer_url})")
                 
             # Display OTT/streaming platforms if available
-            ott_providers = movie_info.get('ott_providers', {})
+            ott_providers = extras['ott_providers']
             if ott_providers:
                 st.write("**Watch On:**")
                 
@@ -230,6 +319,14 @@ if st.session_state.data_loaded:
         
         # Get and display recommendations when button is clicked
         if recommend_button:
+            # Until the plot features are built, serve genre-based recommendations
+            method_names = {"Plot-based": 'plot', "Genre-based": 'metadata', "Combined": 'hybrid',
+                            "Connections": 'graph'}
+            if method_names[recommendation_method] not in ready_methods:
+                st.info(f"{recommendation_method} recommendations are still being prepared, "
+                        f"so these are genre-based. They upgrade automatically once ready.")
+                recommendation_method = "Genre-based"
+            
             with st.spinner("Finding movies you'll love..."):
                 # Apply filters to recommendation criteria
                 filters = {
@@ -241,41 +338,57 @@ if st.session_state.data_loaded:
                 if 'industry' in movies_df.columns and 'selected_industries' in locals() and selected_industries:
                     filters['industries'] = selected_industries
                 
-                # Get recommendations based on selected method
-                if recommendation_method == "Plot-based":
-                    recommendations = engine.get_content_based_recommendations(
-                        movie_idx, 
-                        n=num_recommendations,
-                        content_type='plot',
-                        filters=filters
-                    )
-                elif recommendation_method == "Genre-based":
-                    recommendations = engine.get_content_based_recommendations(
-                        movie_idx, 
-                        n=num_recommendations,
-                        content_type='metadata',
-                        filters=filters
-                    )
-                else:  # Combined
-                    recommendations = engine.get_hybrid_recommendations(
-                        movie_idx, 
-                        n=num_recommendations,
-                        filters=filters
-                    )
+                if collapse_duplicates:
+                    filters['collapse_duplicates'] = True
+                
+                # Add streaming availability filter if selected
+                if selected_providers:
+                    filters['providers'] = selected_providers
+                    filters['region'] = selected_region
+                
+                options = {}
+                if method_names[recommendation_method] == 'hybrid':
+                    options = {'year_weight': 0.1 if prefer_same_era else 0.0,
+                               'recency_weight': 0.05 if prefer_recent else 0.0}
+                
+                # Get recommendations based on selected method, as stable movie IDs
+                recommendations = engine.get_recommendations_by_id(
+                    selected_movie_id,
+                    n=num_recommendations,
+                    method=method_names[recommendation_method],
+                    filters=filters,
+                    **options
+                )
+                
+                event_log.record('request', session=st.session_state.session_id, movie_id=selected_movie_id,
+                                 method=recommendation_method, n=num_recommendations, filters=filters,
+                                 n_results=len(recommendations))
+                st.session_state.shown_recommendations = {}
+                for rank, (rec_id, similarity) in enumerate(recommendations):
+                    event_log.record('impression', session=st.session_state.session_id, movie_id=rec_id,
+                                     source_id=selected_movie_id, rank=rank, score=float(similarity),
+                                     method=recommendation_method)
+                    st.session_state.shown_recommendations[rec_id] = {
+                        'source_id': selected_movie_id, 'rank': rank, 'method': recommendation_method}
                 
                 if not recommendations:
                     st.warning("No recommendations found based on your filters. Try adjusting your criteria.")
                 else:
                     st.subheader(f"Top {len(recommendations)} Recommendations for '{selected_movie}'")
                     
+                    # Fetch the trailers of all recommendations in parallel, before rendering
+                    if 'trailer_url' not in movies_df.columns and 'tmdb_id' in movies_df.columns:
+                        enricher.get_many([int(movies_df.iloc[engine.row_of(rec_id)]['tmdb_id'])
+                                           for rec_id, _ in recommendations])
+                    
                     # Create 5 columns for recommendations
                     cols = st.columns(min(5, len(recommendations)))
                     
                     # Display each recommendation with poster and info
-                    for i, (rec_idx, similarity) in enumerate(recommendations):
+                    for i, (rec_id, similarity) in enumerate(recommendations):
                         col_idx = i % len(cols)
                         with cols[col_idx]:
-                            rec_info = movies_df.iloc[rec_idx]
+                            rec_info = movies_df.iloc[engine.row_of(rec_id)]
                             title = rec_info['title']
                             
                             # Display poster
@@ -295,12 +408,13 @@ if st.session_state.data_loaded:
                                 st.write(f"Genres: {genres_text}")
                             
                             # Show industry if available
-                            industry = rec_info.get('industry', '')
+                            industries = rec_info.get('industries')
+                            industry = ", ".join(industries) if isinstance(industries, list) else rec_info.get('industry', '')
                             if industry:
                                 st.write(f"Industry: {industry}")
                                 
                             # Show trailer link if available
-                            trailer_url = rec_info.get('trailer_url', '')
+                            trailer_url = movie_extras(rec_info)['trailer_url']
                             if trailer_url:
                                 st.markdown(f"[🎬 Watch Trailer]({trailer_url})")
                     
@@ -313,21 +427,43 @@ if st.session_state.data_loaded:
                             st.write("Used TF-IDF vectorization of movie plot summaries to find semantically similar movies.")
                         elif recommendation_method == "Genre-based":
                             st.write("Used similarity matching based on movie metadata like genres, director, and cast.")
+                        elif recommendation_method == "Connections":
+                            st.write("Ranked movies by how often a random walk from the selected movie through "
+                                     "its cast, director and genres reaches them (personalized PageRank).")
                         else:
                             st.write("Combined both plot-based and metadata-based similarities for a hybrid recommendation.")
                         
+                        startup_stats = startup.stats()
+                        st.write(f"Time to first recommendation: {startup_stats['first_recommendation_seconds']:.1f}s")
+                        if startup_stats['full_ready_seconds'] is not None:
+                            st.write(f"All methods ready after: {startup_stats['full_ready_seconds']:.1f}s")
+                        
+                        cache_stats = engine.cache_stats()
+                        if cache_stats:
+                            st.write(f"Result cache hit ratio: {cache_stats['hit_ratio']:.0%} "
+                                     f"({cache_stats['hits']} hits, {cache_stats['misses']} misses)")
+                        
                         st.write("### Top common features with selected movie")
                         
-                        # Show top matching features for first recommendation
-                        if recommendations and recommendation_method != "Genre-based":
+                        # Explain every recommendation in one batched call
+                        if recommendations:
                             try:
-                                first_rec_idx = recommendations[0][0]
-                                common_features = engine.explain_similarity(movie_idx, first_rec_idx)
+                                explanations = engine.explain_recommendations(
+                                    movie_idx, engine.rows_of([rec_id for rec_id, _ in recommendations])
+                                )
                                 
-                                if common_features:
-                                    st.write(f"**{selected_movie}** and **{movies_df.iloc[first_rec_idx]['title']}** share these key elements:")
-                                    for feature, importance in common_features[:5]:
-                                        st.write(f"- '{feature}' (importance: {importance:.2f})")
+                                for explanation in explanations:
+                                    rec_title = movies_df.iloc[explanation['movie_idx']]['title']
+                                    st.write(f"**{selected_movie}** and **{rec_title}** share these key elements:")
+                                    
+                                    if recommendation_method in ("Plot-based", "Combined"):
+                                        for feature, importance in explanation['terms']:
+                                            st.write(f"- '{feature}' (importance: {importance:.2f})")
+                                    
+                                    if recommendation_method != "Plot-based":
+                                        for kind, name, contribution in explanation['metadata']:
+                                            if name:
+                                                st.write(f"- {kind.capitalize()}: {name} (contribution: {contribution:.2f})")
                             except Exception as e:
                                 st.write(f"Couldn't generate feature explanation: {str(e)}")
                         
@@ -0,0 +1,1160 @@
+"""
+Micro-benchmarks for the recommendation pipeline.
+
+Run a single benchmark with:
+
+    python benchmarks.py <name> [--movies N]
+
+Every benchmark runs against a synthetic catalogue so the numbers are
+reproducible without a TMDB API key.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+GENRES = ['Action', 'Adventure', 'Comedy', 'Crime', 'Drama', 'Family', 'Fantasy',
+          'History', 'Horror', 'Music', 'Mystery', 'Romance', 'Science Fiction',
+          'Thriller', 'War']
+INDUSTRIES = ['Hindi/Bollywood', 'Tamil', 'Telugu', 'Malayalam', 'Kannada',
+              'Bengali', 'Marathi', 'Hollywood']
+LANGUAGES = ['hi', 'ta', 'te', 'ml', 'kn', 'bn', 'mr', 'en']
+
+
+def _synthetic_word(i):
+    """Letters-only pseudo word, so text preprocessing (which strips digits) keeps it."""
+    letters = []
+    while True:
+        i, remainder = divmod(i, 26)
+        letters.append(chr(ord('a') + remainder))
+        if i == 0:
+            break
+    return 'zq' + ''.join(letters)
+
+
+def make_synthetic_catalogue(n_movies, seed=0):
+    """
+    Create a synthetic movie dataframe shaped like the TMDB ingestion output.
+
+    Args:
+        n_movies (int): Number of movies to generate
+        seed (int): Random seed
+
+    Returns:
+        pd.DataFrame: Movie dataframe with the same columns as fetch_movies_from_tmdb
+    """
+    rng = np.random.default_rng(seed)
+    n_people = max(50, n_movies // 4)
+    n_directors = max(10, n_movies // 20)
+    # An array, so rng.choice does not convert the list on every draw
+    vocabulary = np.array([_synthetic_word(i) for i in range(max(200, min(20000, n_movies)))])
+
+    industry_codes = rng.integers(0, len(INDUSTRIES), n_movies)
+    years = rng.integers(1950, 2026, n_movies).astype(float)
+    years[rng.random(n_movies) < 0.02] = np.nan
+
+    movies = {
+        # Unique like TMDB ids, and different from the row positions
+        'tmdb_id': 11 + 3 * np.arange(n_movies),
+        'title': [f"Movie {i}" for i in range(n_movies)],
+        'overview': [
+            ' '.join(rng.choice(vocabulary, size=rng.integers(8, 40)))
+            for _ in range(n_movies)
+        ],
+        'release_year': years,
+        'genres': [
+            list(rng.choice(GENRES, size=rng.integers(1, 4), replace=False))
+            for _ in range(n_movies)
+        ],
+        'director': [f"Director {d}" for d in rng.integers(0, n_directors, n_movies)],
+        'cast': [
+            [f"Actor {a}" for a in rng.integers(0, n_people, size=5)]
+            for _ in range(n_movies)
+        ],
+        'poster_path': [f"/poster{i}.jpg" for i in range(n_movies)],
+        'language': [LANGUAGES[c] for c in industry_codes],
+        'industry': [INDUSTRIES[c] for c in industry_codes],
+        'production_countries': [['India'] if c < 7 else ['United States of America']
+                                 for c in industry_codes],
+        'trailer_url': [f"https://www.youtube.com/watch?v=trailer{i}" for i in range(n_movies)],
+        'ott_providers': [
+            {'flatrate': [{'name': 'Netflix', 'logo': ''}]} if i % 3 == 0 else {}
+            for i in range(n_movies)
+        ],
+        'popularity': rng.lognormal(2.0, 1.2, n_movies),
+        'vote_count': np.floor(rng.lognormal(4.0, 2.0, n_movies)),
+        'vote_average': np.clip(rng.normal(6.3, 1.4, n_movies), 0, 10).round(1),
+    }
+
+    return pd.DataFrame(movies)
+
+
+def _timed(func, *args, repeat=5, **kwargs):
+    """Run `func` `repeat` times and return (best seconds, last result)."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _deep_sizeof(obj, seen=None):
+    """Approximate memory held by `obj`, following containers and numpy/scipy buffers."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if hasattr(obj, 'data') and hasattr(obj, 'indices') and hasattr(obj, 'indptr'):
+        return obj.data.nbytes + obj.indices.nbytes + obj.indptr.nbytes
+    if isinstance(obj, pd.DataFrame):
+        return sum(_deep_sizeof(obj[column].to_numpy(), seen) if obj[column].dtype != object
+                   else sum(_deep_sizeof(value, seen) for value in obj[column]) + 8 * len(obj)
+                   for column in obj.columns)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(_deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+def _build_tfidf(movies_df):
+    """Vectorise the synthetic overviews with the same settings as DataProcessor."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    vectorizer = TfidfVectorizer(min_df=2, max_df=0.85, max_features=5000,
+                                 stop_words='english', ngram_range=(1, 2))
+    tfidf_matrix = vectorizer.fit_transform(movies_df['overview'])
+    return tfidf_matrix, vectorizer.get_feature_names_out()
+
+
+def bench_similarity_batch(n_movies):
+    """Compare utils.calculate_similarity with calculate_similarity_batch."""
+    from utils import calculate_similarity, calculate_similarity_batch, encode_similarity_features
+
+    movies_df = make_synthetic_catalogue(n_movies)
+    features = ['genres', 'director', 'cast', 'release_year']
+    query = 0
+    candidates = np.arange(n_movies)
+
+    start = time.perf_counter()
+    encodings = encode_similarity_features(movies_df, features)
+    encode_time = time.perf_counter() - start
+
+    records = movies_df.to_dict('records')
+    scalar_time, scalar = _timed(
+        lambda: np.array([calculate_similarity(records[query], records[c], features)
+                          for c in candidates]),
+        repeat=1
+    )
+    batch_time, batch = _timed(calculate_similarity_batch, encodings, query, candidates, features)
+
+    # Pairwise mode: random pairs rather than one query
+    rng = np.random.default_rng(1)
+    left = rng.integers(0, n_movies, n_movies)
+    right = rng.integers(0, n_movies, n_movies)
+    pairs_scalar = np.array([calculate_similarity(records[a], records[b], features)
+                             for a, b in zip(left, right)])
+    pairs_batch = calculate_similarity_batch(encodings, left, right, features)
+
+    print(f"movies: {n_movies}")
+    print(f"encode:  {encode_time * 1000:.1f} ms (once)")
+    print(f"scalar:  {scalar_time * 1000:.1f} ms")
+    print(f"batch:   {batch_time * 1000:.1f} ms ({scalar_time / batch_time:.0f}x)")
+    print(f"max abs diff (query): {np.abs(scalar - batch).max():.2e}")
+    print(f"max abs diff (pairs): {np.abs(pairs_scalar - pairs_batch).max():.2e}")
+    assert np.allclose(scalar, batch) and np.allclose(pairs_scalar, pairs_batch)
+
+
+def bench_compact_memory(n_movies):
+    """Report bytes per movie for the default and compact engine representations."""
+    from recommendation_engine import RecommendationEngine
+
+    movies_df = make_synthetic_catalogue(n_movies)
+    tfidf_matrix, feature_names = _build_tfidf(movies_df)
+
+    engine = RecommendationEngine(movies_df, tfidf_matrix, feature_names)
+    before = {
+        'tfidf_matrix': _deep_sizeof(engine.tfidf_matrix),
+        'metadata_matrix': _deep_sizeof(engine.metadata_matrix),
+        'movies': _deep_sizeof(engine.movies_df),
+    }
+    query_time, _ = _timed(engine.get_hybrid_recommendations, 0, n=10)
+
+    compact = RecommendationEngine(movies_df, tfidf_matrix, feature_names, compact=True)
+    after = {
+        'tfidf_matrix': _deep_sizeof(compact.tfidf_matrix),
+        'metadata_matrix': _deep_sizeof(compact.metadata_matrix),
+        'movies': compact.catalogue.nbytes,
+    }
+    compact_time, _ = _timed(compact.get_hybrid_recommendations, 0, n=10)
+
+    print(f"movies: {n_movies}")
+    print(f"{'component':<16}{'default B/movie':>18}{'compact B/movie':>18}")
+    for component in before:
+        print(f"{component:<16}{before[component] / n_movies:>18.1f}{after[component] / n_movies:>18.1f}")
+    total_before = sum(before.values())
+    total_after = sum(after.values())
+    print(f"{'total':<16}{total_before / n_movies:>18.1f}{total_after / n_movies:>18.1f}"
+          f"  ({total_before / total_after:.1f}x smaller)")
+    print(f"hybrid query: {query_time * 1000:.1f} ms default, {compact_time * 1000:.1f} ms compact")
+
+
+def _process_memory(pid):
+    """Read resident memory figures (kB) for a process from /proc."""
+    memory = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'RssAnon', 'RssShmem'):
+                memory[key] = int(value.split()[0])
+    return memory
+
+
+def bench_shared_memory(n_movies):
+    """Measure per-worker RSS when serving from shared memory with 1, 2 and 4 workers."""
+    from recommendation_engine import RecommendationEngine
+    from shared_memory_engine import SharedEnginePool
+
+    movies_df = make_synthetic_catalogue(n_movies)
+    tfidf_matrix, feature_names = _build_tfidf(movies_df)
+    engine = RecommendationEngine(movies_df, tfidf_matrix, feature_names, compact=True)
+    local = engine.get_hybrid_recommendations(7, n=10)
+
+    rng = np.random.default_rng(0)
+    calls = [((int(idx),), {'n': 10}) for idx in rng.integers(0, n_movies, 200)]
+
+    # Private memory of a process that has only imported the engine, for reference
+    import subprocess
+    baseline = subprocess.run(
+        [sys.executable, '-c',
+         "import recommendation_engine, benchmarks, os; "
+         "print(benchmarks._process_memory(os.getpid())['RssAnon'])"],
+        capture_output=True, text=True, check=True
+    )
+    import_anon = int(baseline.stdout.split()[-1]) / 1024
+
+    print(f"movies: {n_movies}")
+    print(f"private RSS of an idle process after imports: {import_anon:.1f} MB")
+    for n_workers in (1, 2, 4):
+        with SharedEnginePool(engine, n_workers=n_workers) as pool:
+            assert [i for i, _ in pool.query('get_hybrid_recommendations', 7, n=10)] == [i for i, _ in local]
+            start = time.perf_counter()
+            pool.map('get_hybrid_recommendations', calls)
+            elapsed = time.perf_counter() - start
+
+            usage = [_process_memory(pid) for pid in pool.worker_pids]
+            anon = np.mean([u['RssAnon'] for u in usage]) / 1024
+            shmem = np.mean([u['RssShmem'] for u in usage]) / 1024
+            print(f"workers: {n_workers}  shared: {pool.publication.nbytes / 2**20:.1f} MB  "
+                  f"per-worker private RSS: {anon:.1f} MB  per-worker shared RSS: {shmem:.1f} MB  "
+                  f"throughput: {len(calls) / elapsed:.0f} queries/s")
+
+
+def bench_query_cache(n_movies):
+    """Replay a skewed (Zipf) query stream with and without the result cache."""
+    from recommendation_engine import RecommendationEngine
+
+    movies_df = make_synthetic_catalogue(n_movies)
+    tfidf_matrix, feature_names = _build_tfidf(movies_df)
+
+    # Popular titles are queried far more often, and filters vary like UI sliders do
+    rng = np.random.default_rng(0)
+    movies = np.minimum(rng.zipf(1.3, 2000) - 1, n_movies - 1)
+    counts = rng.choice([5, 10], len(movies))
+    year_ranges = [None, (1990, 2025), (2000, 2025)]
+    stream = [(int(m), int(c), year_ranges[rng.integers(0, 3)]) for m, c in zip(movies, counts)]
+
+    print(f"movies: {n_movies}  queries: {len(stream)}  distinct: {len(set(stream))}")
+    for cache_size in (0, 256, 4096):
+        engine = RecommendationEngine(movies_df, tfidf_matrix, feature_names, cache_size=cache_size)
+        start = time.perf_counter()
+        for movie_idx, n, year_range in stream:
+            engine.get_hybrid_recommendations(movie_idx, n=n, filters={'year_range': year_range})
+        elapsed = time.perf_counter() - start
+        stats = engine.cache_stats()
+        print(f"cache_size: {cache_size:>5}  mean latency: {elapsed / len(stream) * 1000:.2f} ms  "
+              f"hit ratio: {stats.get('hit_ratio', 0.0):.1%}")
+
+
+def _peak_rss_of(code):
+    """Run `code` in a fresh interpreter and return (peak RSS in MB, seconds, stdout)."""
+    import subprocess
+    script = (
+        "import resource, time\n"
+        "start = time.perf_counter()\n"
+        f"{code}\n"
+        "print('__elapsed__', time.perf_counter() - start)\n"
+        "print('__peak_kb__', resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+    )
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    values = dict(line.split() for line in result.stdout.splitlines() if line.startswith('__'))
+    return int(values['__peak_kb__']) / 1024, float(values['__elapsed__']), result.stdout
+
+
+def bench_streaming_vectorize(n_movies):
+    """Compare peak memory of in-memory and chunked streaming vectorisation of a CSV."""
+    import os
+    import tempfile
+
+    workdir = tempfile.mkdtemp(prefix='streaming_bench_')
+    csv_path = os.path.join(workdir, 'catalogue.csv')
+    make_synthetic_catalogue(n_movies).to_csv(csv_path, index=False)
+
+    in_memory = (
+        "import pandas as pd\n"
+        "from data_processor import DataProcessor\n"
+        "processor = DataProcessor()\n"
+        f"df = processor.preprocess_data(pd.read_csv({csv_path!r}))\n"
+        "matrix, names = processor.vectorize_text(df['preprocessed_overview'].tolist())\n"
+    )
+    print(f"movies: {n_movies}")
+    peak, elapsed, _ = _peak_rss_of(in_memory)
+    print(f"in-memory:                peak RSS {peak:7.1f} MB  {elapsed:6.1f} s")
+
+    for chunksize in (1000, 5000):
+        streaming = (
+            "from data_processor import DataProcessor\n"
+            f"DataProcessor().build_streaming({csv_path!r}, {os.path.join(workdir, f'out_{chunksize}')!r}, "
+            f"chunksize={chunksize})\n"
+        )
+        peak, elapsed, _ = _peak_rss_of(streaming)
+        print(f"streaming chunksize={chunksize:<5}: peak RSS {peak:7.1f} MB  {elapsed:6.1f} s")
+
+
+def bench_hashing_features(n_movies):
+    """Compare the vocabulary TF-IDF with the hashed feature space: fit time, memory and recall."""
+    from data_processor import DataProcessor
+    from recommendation_engine import RecommendationEngine
+
+    movies_df = DataProcessor().preprocess_data(make_synthetic_catalogue(n_movies))
+    texts = movies_df['preprocessed_overview'].tolist()
+    queries = np.random.default_rng(0).choice(n_movies, size=min(200, n_movies), replace=False)
+
+    unlimited = DataProcessor()
+    unlimited.max_features = None
+
+    print(f"movies: {n_movies}")
+    results = {}
+    for label, processor in (('tfidf', DataProcessor()),
+                             ('tfidf (no max_features)', unlimited),
+                             ('hashing', DataProcessor(feature_mode='hashing')),
+                             ('hashing (no reverse map)', DataProcessor(feature_mode='hashing',
+                                                                        keep_reverse_map=False))):
+        start = time.perf_counter()
+        tfidf_matrix, feature_names = processor.vectorize_text(texts)
+        elapsed = time.perf_counter() - start
+
+        engine = RecommendationEngine(movies_df, tfidf_matrix, feature_names)
+        results[label] = [
+            {idx for idx, _ in engine.get_content_based_recommendations(int(q), n=10)} for q in queries]
+        memory = _deep_sizeof(vars(processor.vectorizer)) / 1e6
+        print(f"{label:<25} fit {elapsed:6.2f} s  vectorizer {memory:7.2f} MB  "
+              f"features {tfidf_matrix.shape[1]}")
+
+    # Hashing applies no max_features cut, so the like-for-like reference is the unlimited vocabulary
+    for reference in ('tfidf', 'tfidf (no max_features)'):
+        for label in ('hashing', 'hashing (no reverse map)'):
+            overlap = np.mean([len(a & b) / 10 for a, b in zip(results[reference], results[label])])
+            print(f"plot recall@10 of {label} vs {reference}: {overlap:.3f}")
+
+
+def bench_sharded_engine(n_movies):
+    """Compare a single engine with an industry-sharded one: query latency and shard reload time."""
+    from recommendation_engine import RecommendationEngine
+    from sharded_engine import ShardedEngine
+
+    movies_df = make_synthetic_catalogue(n_movies)
+    tfidf_matrix, feature_names = _build_tfidf(movies_df)
+    queries = np.random.default_rng(0).choice(n_movies, size=50, replace=False)
+
+    start = time.perf_counter()
+    single = RecommendationEngine(movies_df, tfidf_matrix, feature_names, compact=True)
+    single_build = time.perf_counter() - start
+    start = time.perf_counter()
+    sharded = ShardedEngine(movies_df, tfidf_matrix, feature_names, by='industry')
+    sharded_build = time.perf_counter() - start
+
+    print(f"movies: {n_movies}  shards: {len(sharded.shards)}")
+    print(f"build: single {single_build:.2f} s, sharded {sharded_build:.2f} s")
+    for label, filters in (('unfiltered', None), ('one industry', {'industries': ['Tamil']})):
+        for name, engine in (('single', single), ('sharded', sharded)):
+            elapsed, _ = _timed(lambda: [engine.get_hybrid_recommendations(int(q), n=10, filters=filters)
+                                         for q in queries], repeat=3)
+            print(f"{label:<13} {name:<8} {elapsed / len(queries) * 1000:6.2f} ms/query")
+
+    rows = np.flatnonzero(movies_df['industry'].to_numpy() == 'Tamil')
+    start = time.perf_counter()
+    sharded.load_shard('Tamil', movies_df.iloc[rows].reset_index(drop=True), tfidf_matrix[rows], global_ids=rows)
+    print(f"reload one shard ({len(rows)} movies): {time.perf_counter() - start:.2f} s")
+    sharded.close()
+
+
+def bench_list_parsing(n_movies):
+    """Parse genre and cast strings from a CSV: per-row extractors vs the detected-format column parser."""
+    import os
+    import tempfile
+
+    from data_processor import DataProcessor
+
+    rng = np.random.default_rng(0)
+    n_people = max(50, n_movies // 4)
+    genres = [[str(g) for g in rng.choice(GENRES, size=rng.integers(1, 4), replace=False)] for _ in range(n_movies)]
+    cast = [[f"Actor {a}" for a in row] for row in rng.integers(0, n_people, size=(n_movies, 5))]
+
+    def as_json_objects(names):
+        return str([{'id': i, 'name': name} for i, name in enumerate(names)])
+
+    workdir = tempfile.mkdtemp(prefix='list_parsing_bench_')
+    processor = DataProcessor()
+    print(f"rows: {n_movies}")
+    for label, serialise in (('python list', str), ('json objects', as_json_objects)):
+        csv_path = os.path.join(workdir, 'catalogue.csv')
+        pd.DataFrame({'genres': [serialise(g) for g in genres],
+                      'cast': [serialise(c) for c in cast]}).to_csv(csv_path, index=False)
+        raw = pd.read_csv(csv_path)
+
+        start = time.perf_counter()
+        expected_genres = raw['genres'].apply(lambda x: processor.extract_genres(x) if isinstance(x, str) else [])
+        expected_cast = raw['cast'].apply(lambda x: processor.extract_names(x) if isinstance(x, str) else [])
+        per_row = time.perf_counter() - start
+
+        processor._parsed_lists.clear()
+        start = time.perf_counter()
+        parsed_genres = processor.parse_list_column(raw['genres'], processor.extract_genres)
+        parsed_cast = processor.parse_list_column(raw['cast'], processor.extract_names)
+        column = time.perf_counter() - start
+
+        same = expected_genres.tolist() == parsed_genres.tolist() and expected_cast.tolist() == parsed_cast.tolist()
+        print(f"{label:<13} per-row {per_row:6.2f} s ({n_movies / per_row:>9,.0f} rows/s)  "
+              f"column {column:6.2f} s ({n_movies / column:>9,.0f} rows/s)  identical: {same}")
+
+
+def bench_catalogue_refresh(n_movies):
+    """Refresh the catalogue in the background while querying: refresh metrics and query latency."""
+    import threading
+
+    from catalogue_refresher import CatalogueRefresher, build_engine
+
+    generation = iter(range(1000))
+
+    def build():
+        # Each refresh sees a slightly different catalogue, like a real re-ingestion
+        movies_df = make_synthetic_catalogue(n_movies, seed=0)
+        drop = np.random.default_rng(next(generation)).choice(n_movies, size=n_movies // 100, replace=False)
+        return build_engine(lambda: movies_df.drop(index=drop))
+
+    refresher = CatalogueRefresher(build, interval=3600)
+    refresher.refresh_now()
+
+    def query_latencies(stop):
+        latencies = []
+        rng = np.random.default_rng(1)
+        while not stop.is_set():
+            version = refresher.current
+            movie_idx = int(rng.integers(0, version.engine.tfidf_matrix.shape[0]))
+            start = time.perf_counter()
+            version.engine.get_hybrid_recommendations(movie_idx, n=10)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    print(f"movies: {n_movies}")
+    for label, refreshing in (('idle', False), ('during refresh', True)):
+        stop = threading.Event()
+        results = {}
+        worker = threading.Thread(target=lambda: results.setdefault('latencies', query_latencies(stop)))
+        worker.start()
+        if refreshing:
+            metrics = refresher.refresh_now()
+        else:
+            time.sleep(5)
+        stop.set()
+        worker.join()
+
+        latencies = np.array(results['latencies']) * 1000
+        print(f"{label:<15} queries {len(latencies):5d}  p50 {np.percentile(latencies, 50):6.1f} ms  "
+              f"p99 {np.percentile(latencies, 99):6.1f} ms")
+
+    print(f"refresh: {metrics['reason']}  build {metrics['build_seconds']:.1f} s  "
+          f"validate {metrics['validate_seconds']:.2f} s  swap {metrics['swap_seconds'] * 1e6:.1f} us  "
+          f"memory overlap {metrics['rss_overlap'] / 1e6:.0f} MB")
+
+
+def bench_quality_prior(n_movies):
+    """Hybrid query latency with and without the popularity/quality prior, and its effect on ranking."""
+    from recommendation_engine import RecommendationEngine
+
+    movies_df = make_synthetic_catalogue(n_movies)
+    tfidf_matrix, feature_names = _build_tfidf(movies_df)
+    engine = RecommendationEngine(movies_df, tfidf_matrix, feature_names)
+    queries = [int(q) for q in np.random.default_rng(0).choice(n_movies, size=100, replace=False)]
+    votes = movies_df['vote_count'].to_numpy()
+
+    print(f"movies: {n_movies}")
+    for prior_weight in (0.0, 0.1, 0.0, 0.1):
+        elapsed, results = _timed(lambda: [engine.get_hybrid_recommendations(q, n=10, prior_weight=prior_weight)
+                                           for q in queries], repeat=10)
+        median_votes = np.median([votes[idx] for result in results for idx, _ in result])
+        print(f"prior_weight {prior_weight:.1f}: {elapsed / len(queries) * 1000:6.2f} ms/query  "
+              f"median vote_count of recommendations {median_votes:,.0f}")
+
+    # The blend itself, isolated from the run-to-run noise of whole queries
+    scores = np.random.default_rng(0).random(n_movies)
+    blend, _ = _timed(lambda: scores + 0.1 * engine.quality_prior, repeat=100)
+    print(f"prior blend step alone: {blend * 1e6:.0f} us/query")
+
+
+def bench_year_scoring(n_movies):
+    """Hybrid query latency with and without the release-year proximity and recency terms."""
+    from recommendation_engine import YEAR_WINDOW, RecommendationEngine
+
+    movies_df = make_synthetic_catalogue(n_movies)
+    tfidf_matrix, feature_names = _build_tfidf(movies_df)
+    engine = RecommendationEngine(movies_df, tfidf_matrix, feature_names)
+    queries = [int(q) for q in np.random.default_rng(0).choice(n_movies, size=100, replace=False)]
+    years = movies_df['release_year'].to_numpy()
+
+    print(f"movies: {n_movies}, int16 years {engine.release_years.nbytes / 1e3:.0f} kB")
+    for year_weight, recency_weight in ((0.0, 0.0), (0.2, 0.1), (0.0, 0.0), (0.2, 0.1)):
+        elapsed, results = _timed(lambda: [engine.get_hybrid_recommendations(q, n=10, year_weight=year_weight,
+                                                                             recency_weight=recency_weight)
+                                           for q in queries], repeat=5)
+        gaps = [abs(years[idx] - years[q]) for q, result in zip(queries, results) for idx, _ in result
+                if not np.isnan(years[idx]) and not np.isnan(years[q])]
+        print(f"year_weight {year_weight:.1f}, recency_weight {recency_weight:.1f}: "
+              f"{elapsed / len(queries) * 1000:6.2f} ms/query  median year gap {np.median(gaps):4.0f}")
+
+    batch, _ = _timed(lambda: engine.get_batch_recommendations(queries, n=10), repeat=3)
+    batch_years, _ = _timed(lambda: engine.get_batch_recommendations(queries, n=10, year_weight=0.2,
+                                                                     recency_weight=0.1), repeat=3)
+    print(f"batch of {len(queries)}: {batch * 1000:7.1f} ms without, {batch_years * 1000:7.1f} ms with the year terms")
+
+    # The term alone: table gather vs computing the kernel and mask over the float years
+    target = engine.release_years[queries[:1]]
+    gather, _ = _timed(lambda: engine.year_scores(target, 0.2, 0.1), repeat=100)
+    known = ~np.isnan(years)
+
+    def direct():
+        proximity = np.maximum(1 - np.abs(years - years[queries[0]]) / YEAR_WINDOW, 0)
+        return 0.2 * np.where(known, proximity, 0)
+
+    direct_time, _ = _timed(direct, repeat=100)
+    print(f"year term alone: {gather * 1e6:.0f} us/query (table gather), {direct_time * 1e6:.0f} us/query "
+          f"(float kernel and mask)")
+
+
+def bench_metadata_weights(n_movies):
+    """Per-request metadata block weights against a matrix with the weights baked in."""
+    from scipy.sparse import diags
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    from data_processor import DataProcessor
+    from recommendation_engine import RecommendationEngine
+
+    processor = DataProcessor()
+    movies_df = processor.preprocess_data(make_synthetic_catalogue(n_movies))
+    tfidf_matrix, feature_names = _build_tfidf(movies_df)
+    engine = RecommendationEngine(movies_df, tfidf_matrix, feature_names, compact=True)
+    queries = [int(q) for q in np.random.default_rng(0).choice(n_movies, size=100, replace=False)]
+    custom = {'genre': 0.7, 'director': 0.1, 'cast': 0.2}
+
+    # The previous layout: one matrix per weight set, rebuilt whenever the weights change
+    def bake(weights):
+        column_weights = engine._metadata_block_weights(weights)[engine.metadata_column_blocks]
+        return (engine.metadata_matrix @ diags(column_weights.astype(np.float32))).tocsr()
+
+    rebuild, baked = _timed(bake, None)
+    matrix_bytes = _deep_sizeof(engine.metadata_matrix)
+    print(f"movies: {n_movies}  metadata columns: {engine.metadata_matrix.shape[1]}")
+    print(f"metadata matrix {matrix_bytes / 1e6:.1f} MB, per-block norms "
+          f"{engine.metadata_block_norms.nbytes / 1e6:.2f} MB; "
+          f"baking a new weight set took {rebuild * 1000:.1f} ms and another {matrix_bytes / 1e6:.1f} MB")
+
+    baked_query, _ = _timed(lambda: [cosine_similarity(baked[q], baked) for q in queries])
+    print(f"baked weights, cosine_similarity: {baked_query / len(queries) * 1000:6.2f} ms/query")
+    for label, weights in (('default', None), ('custom', custom)):
+        elapsed, _ = _timed(lambda: [engine._metadata_similarities([q], weights) for q in queries])
+        print(f"{label} weights at query time:      {elapsed / len(queries) * 1000:6.2f} ms/query")
+
+    expected = cosine_similarity(baked[queries], baked)
+    actual = engine._metadata_similarities(queries, None)
+    print(f"max difference from the baked matrix: {np.abs(expected - actual).max():.2e}")
+
+
+def bench_staged_startup(n_movies):
+    """Time to first recommendation with a one-stage build and with the staged startup."""
+    from data_processor import DataProcessor
+    from recommendation_engine import RecommendationEngine
+    from staged_startup import StagedStartup
+
+    raw = make_synthetic_catalogue(n_movies)
+
+    start = time.perf_counter()
+    processor = DataProcessor()
+    movies_df = processor.preprocess_data(raw)
+    tfidf_matrix, feature_names = processor.vectorize_text(movies_df['preprocessed_overview'].tolist())
+    engine = RecommendationEngine(movies_df, tfidf_matrix, feature_names)
+    engine.get_hybrid_recommendations(0)
+    one_stage = time.perf_counter() - start
+
+    startup = StagedStartup(lambda: raw)
+    startup.start(background=False)
+    stats = startup.stats()
+
+    print(f"movies: {n_movies}")
+    print(f"one-stage build, first recommendation: {one_stage:6.2f} s")
+    print(f"staged, metadata engine ready:         {stats['metadata_ready_seconds']:6.2f} s")
+    print(f"staged, first recommendation:          {stats['first_recommendation_seconds']:6.2f} s")
+    print(f"staged, all methods ready:             {stats['full_ready_seconds']:6.2f} s")
+
+    same = all(
+        [idx for idx, _ in engine.get_hybrid_recommendations(q, n=10)]
+        == [idx for idx, _ in startup.engine.get_hybrid_recommendations(q, n=10)]
+        for q in range(0, n_movies, max(n_movies // 50, 1))
+    )
+    print(f"full staged engine matches the one-stage engine: {same}")
+
+
+def make_synthetic_interactions(movies_df, n_events, n_users=None, seed=0):
+    """
+    Synthetic watch log: each user mostly watches popular movies of one or two industries.
+
+    Returns:
+        tuple: (user ids, movie ids) arrays of length n_events
+    """
+    rng = np.random.default_rng(seed)
+    n_movies = len(movies_df)
+    n_users = n_users or max(n_events // 20, 1)
+
+    industries = movies_df['industry'].to_numpy()
+    by_industry = [np.flatnonzero(industries == industry) for industry in INDUSTRIES]
+    by_industry = [movies for movies in by_industry if len(movies)]
+    popularity = movies_df['popularity'].to_numpy()
+
+    user_ids = rng.integers(0, n_users, n_events)
+    favourite = rng.integers(0, len(by_industry), n_users)
+    # 80% of a user's events are in their favourite industry, the rest anywhere
+    in_favourite = rng.random(n_events) < 0.8
+    movie_ids = rng.choice(n_movies, size=n_events, p=popularity / popularity.sum())
+    for industry, movies in enumerate(by_industry):
+        events = np.flatnonzero(in_favourite & (favourite[user_ids] == industry))
+        weights = popularity[movies] / popularity[movies].sum()
+        movie_ids[events] = rng.choice(movies, size=len(events), p=weights)
+    return user_ids, movie_ids
+
+
+def bench_collaborative_filtering(n_movies, n_events=2000000):
+    """ALS training time per epoch and hybrid query latency with a collaborative term."""
+    from collaborative_filtering import ImplicitALS, interactions_from_events
+    from recommendation_engine import RecommendationEngine
+
+    movies_df = make_synthetic_catalogue(n_movies)
+    user_ids, movie_ids = make_synthetic_interactions(movies_df, n_events)
+    interactions = interactions_from_events(user_ids, movie_ids, n_movies=n_movies)
+    print(f"movies: {n_movies}  users: {interactions.shape[0]}  events: {n_events:,}  "
+          f"distinct interactions: {interactions.nnz:,}")
+
+    for n_workers in (1, 4):
+        model = ImplicitALS(n_factors=64, iterations=3, n_workers=n_workers).fit(interactions)
+        print(f"{n_workers} worker(s): {np.median(model.epoch_seconds):6.2f} s/epoch")
+    print(f"item factors: {model.item_factors.dtype}, {model.item_factors.nbytes / 1e6:.1f} MB")
+
+    # Held-out check: does the model rank a user's last event among their top 10?
+    rng = np.random.default_rng(1)
+    users = rng.choice(interactions.shape[0], size=500, replace=False)
+    held_out = {}
+    train = interactions.tolil()
+    for user in users:
+        movies = interactions[user].indices
+        if len(movies) > 1:
+            held_out[user] = movies[-1]
+            train[user, movies[-1]] = 0
+    train = train.tocsr()
+    train.eliminate_zeros()
+    held_model = ImplicitALS(n_factors=64, iterations=10).fit(train)
+    hits = sum(movie in {idx for idx, _ in held_model.recommend(user, 10, exclude=train)}
+               for user, movie in held_out.items())
+    popular = set(np.argsort(-np.asarray(train.sum(axis=0)).ravel())[:10])
+    popular_hits = sum(movie in popular for movie in held_out.values())
+    print(f"held-out hit rate@10: ALS {hits / len(held_out):.3f}, most popular {popular_hits / len(held_out):.3f}")
+
+    tfidf_matrix, feature_names = _build_tfidf(movies_df)
+    engine = RecommendationEngine(movies_df, tfidf_matrix, feature_names)
+    engine.set_collaborative_model(model)
+    queries = [int(q) for q in rng.choice(n_movies, size=100, replace=False)]
+    for weights in ((0.6, 0.4), (0.5, 0.3, 0.2)):
+        elapsed, _ = _timed(lambda: [engine.get_hybrid_recommendations(q, n=10, weights=weights) for q in queries])
+        print(f"hybrid weights {weights}: {elapsed / len(queries) * 1000:6.2f} ms/query")
+
+
+def bench_event_log(n_movies, n_events=200000):
+    """Cost of recording an event on the request path, and reading the log back."""
+    import gzip
+    import json
+    import tempfile
+
+    from collaborative_filtering import interactions_from_events
+    from event_log import EventLog, read_events
+
+    rng = np.random.default_rng(0)
+    sessions = [f"{i:032x}" for i in rng.integers(0, 2 ** 62, 1000)]
+    events = [(sessions[rng.integers(0, len(sessions))], int(rng.integers(0, n_movies)), rank % 10)
+              for rank in range(n_events)]
+    filters = {'year_range': (2000, 2024), 'genres': ['Action']}
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Baseline: serialise and write each event synchronously
+        start = time.perf_counter()
+        with gzip.open(f"{directory}/sync.jsonl.gz", 'at', encoding='utf-8') as f:
+            for session, movie_idx, rank in events[:20000]:
+                f.write(json.dumps({'ts': time.time(), 'kind': 'impression', 'session': session,
+                                    'movie_idx': movie_idx, 'rank': rank, 'filters': filters}) + '\n')
+                f.flush()
+        sync = (time.perf_counter() - start) / 20000
+
+        log = EventLog(f"{directory}/log", capacity=n_events, flush_interval=0.2, max_file_bytes=1024 * 1024)
+        latencies = np.empty(n_events)
+        for i, (session, movie_idx, rank) in enumerate(events):
+            start = time.perf_counter()
+            log.record('impression', session=session, movie_idx=movie_idx, rank=rank, filters=filters)
+            latencies[i] = time.perf_counter() - start
+        start = time.perf_counter()
+        log.close()
+        drain = time.perf_counter() - start
+
+        files = os.listdir(f"{directory}/log")
+        size = sum(os.path.getsize(f"{directory}/log/{name}") for name in files)
+        start = time.perf_counter()
+        read = list(read_events(f"{directory}/log", kinds={'impression'}))
+        read_seconds = time.perf_counter() - start
+
+        session_ids = {session: i for i, session in enumerate(sessions)}
+        interactions = interactions_from_events([session_ids[event['session']] for event in read],
+                                                [event['movie_idx'] for event in read], n_movies=n_movies)
+
+    print(f"events: {n_events:,}")
+    print(f"synchronous gzip write per event: {sync * 1e6:7.2f} us")
+    print(f"EventLog.record per event:        p50 {np.percentile(latencies, 50) * 1e6:.2f} us, "
+          f"p99 {np.percentile(latencies, 99) * 1e6:.2f} us")
+    print(f"final flush on close: {drain * 1000:.0f} ms; stats: {log.stats()}")
+    print(f"log: {len(files)} files, {size / 1e6:.1f} MB ({size / n_events:.0f} bytes/event)")
+    print(f"read back {len(read):,} events in {read_seconds:.2f} s "
+          f"({len(read) / read_seconds:,.0f} events/s) -> {interactions.nnz:,} user-movie interactions")
+
+
+def make_synthetic_availability(n_movies, n_providers=50, regions=('IN', 'US', 'GB'), seed=0):
+    """Encoded availability strings: a few providers per movie and region, popular providers more often."""
+    from provider_index import encode_availability
+
+    rng = np.random.default_rng(seed)
+    providers = [f"Provider {i}" for i in range(n_providers)]
+    weights = 1 / np.arange(1, n_providers + 1)
+    weights /= weights.sum()
+
+    availability = []
+    for _ in range(n_movies):
+        results = {}
+        for region in regions:
+            if rng.random() < 0.6:
+                results[region] = {
+                    offer: [{'provider_name': providers[p]}
+                            for p in set(rng.choice(n_providers, size=count, p=weights))]
+                    for offer, count in (('flatrate', rng.poisson(1.5)), ('rent', rng.poisson(1.0)))
+                    if count
+                }
+        availability.append(encode_availability(results))
+    return availability, providers
+
+
+def bench_provider_filter(n_movies):
+    """Provider/region filter: bitset index against checking each movie's providers."""
+    from provider_index import ProviderIndex, decode_availability
+
+    availability, providers = make_synthetic_availability(n_movies)
+    movies_df = pd.DataFrame({'availability': availability})
+    subscriptions = providers[:2] + providers[10:11]
+
+    build, index = _timed(ProviderIndex.from_movies, movies_df, repeat=1)
+    print(f"movies: {n_movies:,}  providers: {len(providers)}  keys: {len(index.keys)}")
+    print(f"index build: {build:.2f} s, bitsets {index.nbytes / 1e6:.1f} MB")
+
+    mask_time, mask = _timed(index.mask, subscriptions, region='IN', repeat=20)
+
+    decoded = [decode_availability(text) for text in availability]
+    wanted = set(subscriptions)
+
+    def per_movie():
+        return np.array([any(region == 'IN' and offer == 'flatrate' and provider in wanted
+                             for region, offer, provider in entries) for entries in decoded])
+
+    loop_time, expected = _timed(per_movie, repeat=1)
+    print(f"'{', '.join(subscriptions)}' in IN: {mask.sum():,} movies, identical: {np.array_equal(mask, expected)}")
+    print(f"bitset mask:       {mask_time * 1000:8.2f} ms")
+    print(f"per-movie check:   {loop_time * 1000:8.2f} ms (on pre-decoded lists)")
+
+    # As used when ranking: keep the passing movies of a full similarity ordering
+    order = np.random.default_rng(0).permutation(n_movies)
+    apply_time, _ = _timed(lambda: order[index.mask(subscriptions, region='IN')[order]], repeat=20)
+    print(f"mask + apply to a ranking of every movie: {apply_time * 1000:.2f} ms")
+
+
+def bench_tokenizer(n_movies):
+    """Tokens/s of the regex tokenizer vs NLTK word_tokenize, and their parity on the shipped datasets."""
+    import re
+
+    from nltk.tokenize import word_tokenize
+
+    from data_processor import DataProcessor, token_pattern
+
+    def clean(text):
+        # What the 'nltk' backend hands to word_tokenize
+        return re.sub(r'\d+', ' ', re.sub(r'[^\w\s]', ' ', text.lower()))
+
+    try:
+        word_tokenize('Punkt check. Done.')
+        nltk_tokenize = word_tokenize
+        nltk_label = 'word_tokenize'
+    except LookupError:
+        # Punkt data not installed: Treebank rules only, a lower bound on its cost
+        nltk_tokenize = lambda text: word_tokenize(text, preserve_line=True)
+        nltk_label = 'word_tokenize (no punkt)'
+
+    shipped = {name: pd.read_pickle(os.path.join(os.path.dirname(os.path.abspath(__file__)), name))
+               for name in ('movies_database.pkl', 'bollywood_movies.pkl')}
+    texts = make_synthetic_catalogue(n_movies)['overview'].tolist()
+    for movies_df in shipped.values():
+        texts += movies_df['overview'].dropna().tolist()
+    cleaned = [clean(text) for text in texts]
+    lowered = [text.lower() for text in texts]
+
+    nltk_seconds, nltk_tokens = _timed(lambda: sum(len(nltk_tokenize(text)) for text in cleaned), repeat=3)
+    regex_seconds, regex_tokens = _timed(lambda: sum(len(token_pattern().findall(text)) for text in lowered), repeat=3)
+    print(f"texts: {len(texts)}")
+    print(f"{nltk_label:<26} {nltk_tokens / nltk_seconds:>12,.0f} tokens/s")
+    print(f"{'regex':<26} {regex_tokens / regex_seconds:>12,.0f} tokens/s  ({nltk_seconds / regex_seconds:.0f}x)")
+
+    regex_processor = DataProcessor(tokenizer='regex')
+    nltk_processor = DataProcessor(tokenizer='nltk')
+    for name, movies_df in shipped.items():
+        overviews = movies_df['overview'].fillna('').tolist()
+        same_tokens = sum(nltk_tokenize(clean(text)) == token_pattern().findall(text.lower()) for text in overviews)
+        same_output = sum(nltk_processor.preprocess_text(text) == regex_processor.preprocess_text(text)
+                          for text in overviews)
+        print(f"{name:<21} identical tokens {same_tokens}/{len(overviews)}, "
+              f"identical preprocessed text {same_output}/{len(overviews)}")
+
+    # The old cleaning splits Indic words at every vowel sign and virama
+    samples = ['दिलवाले दुल्हनिया ले जाएंगे', 'எந்திரன் திரைப்படம்', 'బాహుబలి చిత్రం', 'ಕನ್ನಡ ಚಲನಚಿತ್ರ']
+    for text in samples:
+        print(f"{text}: nltk {nltk_tokenize(clean(text))}  regex {token_pattern().findall(text.lower())}")
+
+
+def bench_minhash_lsh(n_movies, n_queries=200):
+    """MinHash-LSH over overview shingles and cast/genre sets: build time, query time vs an exact scan, recall."""
+    from minhash_lsh import MinHashLSH, metadata_sets, shingle_sets
+    from recommendation_engine import RecommendationEngine
+
+    movies_df = make_synthetic_catalogue(n_movies)
+    # Plant near-duplicates: 1% of the movies re-listed with one overview word changed
+    rng = np.random.default_rng(1)
+    n_planted = max(n_movies // 100, 1)
+    originals = rng.choice(n_movies, size=n_planted, replace=False)
+    copies = rng.permutation(np.setdiff1d(np.arange(n_movies), originals))[:n_planted]
+    texts = movies_df['overview'].tolist()
+    for original, copy in zip(originals, copies):
+        words = texts[original].split()
+        words[rng.integers(len(words))] = 'zqchanged'
+        texts[copy] = ' '.join(words)
+    print(f"movies: {n_movies}, planted near-duplicates: {n_planted}")
+
+    start = time.perf_counter()
+    sets = shingle_sets(texts)
+    shingling = time.perf_counter() - start
+    start = time.perf_counter()
+    lsh = MinHashLSH().fit(sets)
+    fitting = time.perf_counter() - start
+    print(f"overview shingles {shingling:6.1f} s, signatures + tables {fitting:6.1f} s, "
+          f"{lsh.nbytes / 1e6:.0f} MB")
+
+    lengths = np.diff(sets.indptr)
+    by_column = sets.T.tocsr()
+
+    def exact_top(movie_idx, n=10):
+        # Jaccard with every movie: |A & B| from one sparse product, |A | B| from the set sizes
+        intersections = np.asarray((by_column[sets[movie_idx].indices]).sum(axis=0)).ravel()
+        jaccard = intersections / np.maximum(lengths + lengths[movie_idx] - intersections, 1)
+        jaccard[movie_idx] = -1
+        return np.argpartition(-jaccard, n)[:n]
+
+    queries = np.concatenate([originals[:n_queries // 2], rng.integers(0, n_movies, n_queries - n_queries // 2)])
+    start = time.perf_counter()
+    for movie_idx in queries:
+        exact_top(movie_idx)
+    exact = (time.perf_counter() - start) / len(queries)
+    start = time.perf_counter()
+    for movie_idx in queries:
+        lsh.query(movie_idx, n=10, min_similarity=0.5)
+    approximate = (time.perf_counter() - start) / len(queries)
+    print(f"top-10 by Jaccard: exact scan {exact * 1e3:8.2f} ms/query, LSH {approximate * 1e3:6.2f} ms/query "
+          f"({exact / approximate:.0f}x)")
+
+    found = np.mean([copy in set(lsh.candidates(original)) for original, copy in zip(originals, copies)])
+    start = time.perf_counter()
+    groups = lsh.duplicate_groups(threshold=0.6)
+    grouping = time.perf_counter() - start
+    print(f"planted pairs among LSH candidates: {found:.1%}; duplicate_groups {grouping:.1f} s, "
+          f"planted pairs grouped: {np.mean(groups[originals] == groups[copies]):.1%}, "
+          f"{n_movies - len(np.unique(groups))} movies collapsed")
+
+    engine = RecommendationEngine.metadata_only(movies_df)
+    cast_genres = metadata_sets(engine, kinds=('genre', 'cast'))
+    start = time.perf_counter()
+    metadata_lsh = MinHashLSH().fit(cast_genres)
+    fitting = time.perf_counter() - start
+    start = time.perf_counter()
+    for movie_idx in queries:
+        metadata_lsh.query(movie_idx, n=10, min_similarity=0.5)
+    approximate = (time.perf_counter() - start) / len(queries)
+    print(f"cast/genre sets: signatures + tables {fitting:6.1f} s, LSH {approximate * 1e3:6.2f} ms/query")
+
+
+def bench_graph(n_movies, n_queries=50):
+    """Personalized PageRank: push vs power iteration latency at growing catalogue sizes, and push recall."""
+    from recommendation_engine import RecommendationEngine
+
+    for size in sorted({max(n_movies // 16, 100), max(n_movies // 4, 100), n_movies}):
+        engine = RecommendationEngine.metadata_only(make_synthetic_catalogue(size))
+        start = time.perf_counter()
+        graph = engine._movie_graph()
+        building = time.perf_counter() - start
+        queries = np.random.default_rng(1).integers(0, size, n_queries)
+
+        metadata, _ = _timed(lambda: [engine._content_based_recommendations(int(movie_idx), 10, 'metadata', None)
+                                      for movie_idx in queries[:10]], repeat=1)
+        exact, exact_scores = _timed(lambda: graph.pagerank(queries[:10]), repeat=1)
+        push, _ = _timed(lambda: [graph.push(int(movie_idx)) for movie_idx in queries], repeat=3)
+
+        recalls = []
+        for movie_idx, scores in zip(queries[:10], exact_scores):
+            scores[movie_idx] = -1
+            expected = set(np.argpartition(-scores, 10)[:10])
+            found = {idx for idx, _ in engine._graph_recommendations(int(movie_idx), 10, None, 0.85, 1e-4, False)}
+            recalls.append(len(expected & found) / 10)
+        print(f"movies: {size:>8}  graph {building:5.1f} s, {graph.nbytes / 1e6:6.0f} MB  "
+              f"metadata cosine {metadata / 10 * 1e3:7.2f} ms  power iteration {exact / 10 * 1e3:8.2f} ms  "
+              f"push {push / n_queries * 1e3:6.2f} ms/query  push recall@10 {np.mean(recalls):.0%}")
+
+
+def _fake_tmdb_details(movie_id, appended):
+    """TMDB-sized /movie/{id} payload with only the appended parts that were requested."""
+    details = {
+        'id': movie_id, 'title': f"Movie {movie_id}", 'overview': ' '.join(_synthetic_word(movie_id * 7 + i) for i in range(40)),
+        'release_date': f"{1950 + movie_id % 75}-01-01", 'poster_path': f"/poster{movie_id}.jpg",
+        'genres': [{'id': g, 'name': GENRES[(movie_id + g) % len(GENRES)]} for g in range(3)],
+        'original_language': 'hi', 'production_countries': [{'iso_3166_1': 'IN', 'name': 'India'}],
+        'popularity': 10.0, 'vote_average': 6.5, 'vote_count': 100,
+    }
+    if 'credits' in appended:
+        details['credits'] = {
+            'cast': [{'id': i, 'name': f"Actor {movie_id + i}", 'character': f"Role {i}", 'order': i,
+                      'profile_path': f"/actor{movie_id + i}.jpg"} for i in range(40)],
+            'crew': [{'id': i, 'name': f"Crew {movie_id + i}", 'job': 'Director' if i == 0 else 'Editor',
+                      'department': 'Directing' if i == 0 else 'Editing'} for i in range(60)],
+        }
+    if 'videos' in appended:
+        details['videos'] = {'results': [
+            {'key': f"v{movie_id}x{i}", 'site': 'YouTube', 'type': 'Trailer' if i % 5 == 0 else 'Featurette',
+             'official': i == 0, 'name': f"Video {i}", 'size': 1080} for i in range(15)]}
+    if 'watch/providers' in appended:
+        providers = [{'provider_id': p, 'provider_name': f"Provider {p}", 'logo_path': f"/logo{p}.jpg",
+                      'display_priority': p} for p in range(6)]
+        details['watch/providers'] = {'results': {
+            f"R{region}" if region else 'IN': {'link': f"https://www.themoviedb.org/movie/{movie_id}/watch",
+                                               'flatrate': providers[:3], 'buy': providers, 'rent': providers[2:]}
+            for region in range(40)}}
+    return details
+
+
+def _serve_fake_tmdb(latency, movies_per_page=20):
+    """Start a local HTTP server answering /discover/movie, /movie/{id} and /movie/{id}/videos like TMDB."""
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path == '/discover/movie':
+                # Distinct ids per language and page
+                language = LANGUAGES.index(query.get('with_original_language', ['hi'])[0])
+                base = (language * 100 + int(query.get('page', ['1'])[0])) * movies_per_page
+                body = {'results': [{'id': base + i} for i in range(movies_per_page)]}
+            elif url.path.endswith('/videos'):
+                body = _fake_tmdb_details(int(url.path.split('/')[2]), ['videos'])['videos']
+            else:
+                appended = query.get('append_to_response', [''])[0].split(',')
+                body = _fake_tmdb_details(int(url.path.rsplit('/', 1)[1]), appended)
+            payload = json.dumps(body).encode()
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            server.bytes_sent += len(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.bytes_sent = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_enrichment(n_movies, latency=0.02):
+    """Eager vs lazy trailer enrichment: ingest time, bytes, catalogue memory and display latency."""
+    import contextlib
+    import io
+    from enrichment import MovieEnricher
+    from utils import fetch_movie_enrichment, fetch_movies_from_tmdb
+
+    # n_movies is not used: the ingest size is fixed by fetch_movies_from_tmdb (8 categories x 2 pages)
+    server = _serve_fake_tmdb(latency)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    print(f"fake TMDB with {latency * 1e3:.0f} ms per request")
+
+    for eager in (True, False):
+        server.bytes_sent = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            elapsed, df = _timed(fetch_movies_from_tmdb, 'key', eager_enrichment=eager, base_url=base_url,
+                                 page_delay=0, repeat=1)
+        print(f"{'eager' if eager else 'lazy':<6} ingest {len(df):>4} movies in {elapsed:6.2f} s, "
+              f"{server.bytes_sent / 1e6:6.1f} MB transferred, catalogue {_deep_sizeof(df) / 1e6:6.2f} MB")
+
+    enricher = MovieEnricher(lambda movie_id: fetch_movie_enrichment(movie_id, 'key', base_url))
+    displayed = [int(movie_id) for movie_id in df['tmdb_id'][:10]]
+    server.bytes_sent = 0
+    cold, _ = _timed(lambda: [enricher.get(movie_id) for movie_id in displayed], repeat=1)
+    print(f"lazy display of 10 movies: one by one {cold * 1e3:7.1f} ms, {server.bytes_sent / 1e3:6.0f} kB")
+    enricher = MovieEnricher(lambda movie_id: fetch_movie_enrichment(movie_id, 'key', base_url))
+    parallel, _ = _timed(enricher.get_many, displayed, repeat=1)
+    cached, _ = _timed(enricher.get_many, displayed, repeat=5)
+    print(f"                           get_many   {parallel * 1e3:7.1f} ms, cached {cached * 1e3:6.2f} ms  "
+          f"{enricher.stats()}")
+    enricher.close()
+    server.shutdown()
+
+
+# Modules a query-serving worker imports, and what each may cost on top of
+# NumPy + SciPy before bench_import_time reports a regression
+QUERY_PATH_MODULES = ('recommendation_engine', 'shared_memory_engine', 'sharded_engine', 'compact_catalogue',
+                      'provider_index', 'query_cache', 'recommendation_service', 'minhash_lsh')
+IMPORT_BUDGET_MS = 150
+HEAVY_MODULES = ('pandas', 'sklearn', 'nltk', 'PIL', 'requests')
+
+
+def _import_cost(module):
+    """
+    Import `module` in a fresh interpreter that has already imported NumPy and SciPy.
+
+    Timing only the module's own import, inside the same process, leaves out the
+    NumPy + SciPy startup, whose run-to-run noise would otherwise be subtracted
+    between separate processes.
+
+    Args:
+        module (str): Module to import (None to time the NumPy + SciPy import itself)
+
+    Returns:
+        tuple: (ms the import took, heavy packages loaded by the end)
+    """
+    import subprocess
+    setup, timed = ("", "import numpy, scipy.sparse") if module is None else \
+        ("import numpy, scipy.sparse", f"import {module}")
+    statement = "\n".join([
+        "import sys, time", setup, "start = time.perf_counter()", timed,
+        "print((time.perf_counter() - start) * 1000)",
+        f"print(' '.join(sorted(set({HEAVY_MODULES!r}) & set(sys.modules))))",
+    ])
+    result = subprocess.run([sys.executable, '-c', statement], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    elapsed, heavy = (result.stdout.splitlines() + [''])[:2]
+    return float(elapsed), heavy.split()
+
+
+def bench_import_time(n_movies, repeat=7):
+    modules = QUERY_PATH_MODULES + ('utils', 'data_processor')
+    # Every round measures the baseline and every module back to back, and each
+    # takes its best round, so a slow spell of the machine affects all alike
+    costs = {module: [] for module in (None,) + modules}
+    heavy = {}
+    for _ in range(repeat):
+        for module in costs:
+            elapsed, heavy[module] = _import_cost(module)
+            costs[module].append(elapsed)
+    print(f"{'numpy + scipy.sparse':<24} {min(costs[None]):8.0f} ms  (not counted)")
+
+    failures = []
+    for module in modules:
+        elapsed = min(costs[module])
+        query_path = module in QUERY_PATH_MODULES
+        status = ''
+        if query_path and heavy[module]:
+            status = 'FAIL: imports ' + ', '.join(heavy[module])
+        elif query_path and elapsed > IMPORT_BUDGET_MS:
+            status = f'FAIL: over budget ({IMPORT_BUDGET_MS} ms)'
+        elif not query_path:
+            status = 'build path'
+        if status.startswith('FAIL'):
+            failures.append(module)
+        print(f"{module:<24} +{elapsed:7.0f} ms  (median +{np.median(costs[module]):5.0f} ms)  {status}")
+
+    if failures:
+        print(f"Import-time regression in: {', '.join(failures)}")
+        sys.exit(1)
+
+
+BENCHMARKS = {
+    'similarity-batch': bench_similarity_batch,
+    'compact-memory': bench_compact_memory,
+    'shared-memory': bench_shared_memory,
+    'query-cache': bench_query_cache,
+    'streaming-vectorize': bench_streaming_vectorize,
+    'hashing-features': bench_hashing_features,
+    'sharded-engine': bench_sharded_engine,
+    'list-parsing': bench_list_parsing,
+    'catalogue-refresh': bench_catalogue_refresh,
+    'quality-prior': bench_quality_prior,
+    'year-scoring': bench_year_scoring,
+    'metadata-weights': bench_metadata_weights,
+    'staged-startup': bench_staged_startup,
+    'collaborative-filtering': bench_collaborative_filtering,
+    'event-log': bench_event_log,
+    'provider-filter': bench_provider_filter,
+    'tokenizer': bench_tokenizer,
+    'minhash-lsh': bench_minhash_lsh,
+    'graph': bench_graph,
+    'enrichment': bench_enrichment,
+    'import-time': bench_import_time,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--movies', type=int, default=20000, help="Number of synthetic movies")
+    args = parser.parse_args()
+
+    BENCHMARKS[args.benchmark](args.movies)
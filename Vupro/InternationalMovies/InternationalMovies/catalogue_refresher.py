@@ -0,0 +1,272 @@
+"""
+Background refresh and hot-swap of the recommendation engine.
+
+A CatalogueRefresher rebuilds the engine (ingestion, preprocessing,
+vectorisation) on a background thread, validates the new engine against the
+one being served, and swaps it in with a single reference assignment. Callers
+take `refresher.current` once per request and use that snapshot throughout, so
+queries that started before a swap finish on the old engine, which is freed
+once the last of them drops its reference.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class EngineVersion:
+    """An engine together with the processor whose vectorizer produced its TF-IDF space."""
+
+    def __init__(self, engine, processor, number):
+        self.engine = engine
+        self.processor = processor
+        self.number = number
+        self.built_at = time.time()
+
+
+def build_engine(loader=None, cache_size=0):
+    """
+    Run the full pipeline: load the catalogue, preprocess it and build an engine.
+
+    Args:
+        loader (callable): Returns the raw movie dataframe (defaults to utils.refresh_data)
+        cache_size (int): Result cache size of the new engine
+
+    Returns:
+        tuple: (RecommendationEngine, DataProcessor)
+    """
+    from data_processor import DataProcessor
+    from recommendation_engine import RecommendationEngine
+
+    if loader is None:
+        from utils import refresh_data as loader
+
+    processor = DataProcessor()
+    movies_df = processor.preprocess_data(loader())
+    tfidf_matrix, feature_names = processor.vectorize_text(movies_df['preprocessed_overview'].tolist())
+    engine = RecommendationEngine(movies_df, tfidf_matrix, feature_names, cache_size=cache_size)
+    return engine, processor
+
+
+def recall_against(old_engine, new_engine, n_queries=50, n=10, seed=0):
+    """
+    Compare hybrid recommendations of two engines on sample movies.
+
+    Movies are matched by their stable movie IDs, since row indices can change
+    between builds. When either catalogue has no IDs (no 'tmdb_id' column, so
+    its IDs are just row positions) they are matched by title instead, using
+    only titles that are unique in both catalogues.
+
+    Args:
+        old_engine (RecommendationEngine): Engine currently served
+        new_engine (RecommendationEngine): Candidate engine
+        n_queries (int): Number of sample movies present in both catalogues
+        n (int): Recommendations per query
+        seed (int): Random seed for the sample
+
+    Returns:
+        float: Mean fraction of the old top N that the new engine also returns
+            (1.0 when the catalogues share no movies to compare)
+    """
+    old_titles = new_titles = old_rows = new_rows = None
+    if old_engine.has_stable_ids and new_engine.has_stable_ids:
+        shared = np.intersect1d(old_engine.movie_ids, new_engine.movie_ids)
+    else:
+        old_titles, new_titles = _titles(old_engine), _titles(new_engine)
+        old_rows, new_rows = _unique_rows(old_titles), _unique_rows(new_titles)
+        shared = sorted(old_rows.keys() & new_rows.keys())
+    if not len(shared):
+        return 1.0
+
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(shared), size=min(n_queries, len(shared)), replace=False)
+
+    recalls = []
+    for position in sample:
+        expected = _recommended(old_engine, shared[position], n, old_titles, old_rows)
+        if not expected:
+            continue
+        found = _recommended(new_engine, shared[position], n, new_titles, new_rows)
+        recalls.append(len(expected & found) / len(expected))
+
+    return float(np.mean(recalls)) if recalls else 1.0
+
+
+def _recommended(engine, key, n, titles=None, rows=None):
+    """Top-n recommendations for one movie, as movie IDs (or titles when `titles` is given)."""
+    if titles is None:
+        return {movie_id for movie_id, _ in engine.get_recommendations_by_id(int(key), n=n)}
+    return {titles[idx] for idx, _ in engine.get_hybrid_recommendations(rows[key], n=n)}
+
+
+def _titles(engine):
+    """Title of every row of an engine."""
+    if engine.movies_df is not None:
+        return [str(title) for title in engine.movies_df['title']]
+    return [str(engine.get_movie(idx)['title']) for idx in range(engine.tfidf_matrix.shape[0])]
+
+
+def _unique_rows(titles):
+    """Row of each title that occurs exactly once."""
+    rows = {}
+    for idx, title in enumerate(titles):
+        rows[title] = -1 if title in rows else idx
+    return {title: idx for title, idx in rows.items() if idx >= 0}
+
+
+def _current_rss():
+    """Resident set size of this process in bytes (None where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+class CatalogueRefresher:
+    """
+    Periodically rebuild the engine off the request path and hot-swap it.
+
+    Example:
+        refresher = CatalogueRefresher(build_engine, interval=6 * 3600)
+        refresher.refresh_now()          # initial build
+        refresher.start()                # then refresh in the background
+        version = refresher.current      # per request
+        version.engine.get_hybrid_recommendations(...)
+    """
+
+    def __init__(self, build=build_engine, interval=3600, min_recall=0.5, min_movies=1,
+                 n_validation_queries=50, on_swap=None, history_size=100):
+        """
+        Args:
+            build (callable): Returns a new (engine, processor) pair
+            interval (float): Seconds between background refreshes
+            min_recall (float): Smallest recall against the current engine that
+                a new engine needs in order to be swapped in
+            min_movies (int): Smallest catalogue a new engine may have
+            n_validation_queries (int): Sample movies used for the recall check
+            on_swap (callable): Called with the new EngineVersion after each swap
+            history_size (int): Number of recent refresh metrics kept in `history`
+        """
+        self.build = build
+        self.interval = interval
+        self.min_recall = min_recall
+        self.min_movies = min_movies
+        self.n_validation_queries = n_validation_queries
+        self.on_swap = on_swap
+
+        self.current = None
+        self.history = deque(maxlen=history_size)
+        self.refreshes = 0
+        self.rejected = 0
+        self.last_error = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def set_current(self, engine, processor):
+        """Serve an engine built elsewhere (e.g. at startup) as the current version."""
+        number = self.current.number + 1 if self.current is not None else 1
+        self.current = EngineVersion(engine, processor, number)
+        return self.current
+
+    def refresh_now(self):
+        """
+        Build, validate and (if valid) swap in a new engine.
+
+        Returns:
+            dict: Metrics of this refresh: 'accepted', 'reason', 'n_movies',
+                'recall', 'build_seconds', 'validate_seconds', 'swap_seconds',
+                'rss_before' and 'rss_overlap' (extra bytes resident while the old
+                and new engines coexisted)
+        """
+        with self._refresh_lock:
+            rss_before = _current_rss()
+            start = time.perf_counter()
+            engine, processor = self.build()
+            build_seconds = time.perf_counter() - start
+            rss_built = _current_rss()
+
+            metrics = {
+                'n_movies': engine.tfidf_matrix.shape[0],
+                'build_seconds': build_seconds,
+                'rss_before': rss_before,
+                'rss_overlap': rss_built - rss_before if rss_before is not None else None,
+                'recall': None,
+                'validate_seconds': 0.0,
+                'swap_seconds': 0.0,
+            }
+
+            start = time.perf_counter()
+            accepted, reason = self._validate(engine, metrics)
+            metrics['validate_seconds'] = time.perf_counter() - start
+            metrics['accepted'] = accepted
+            metrics['reason'] = reason
+
+            if accepted:
+                number = self.current.number + 1 if self.current is not None else 1
+                version = EngineVersion(engine, processor, number)
+                start = time.perf_counter()
+                # A single reference assignment; readers see the old or the new version
+                self.current = version
+                metrics['swap_seconds'] = time.perf_counter() - start
+                if self.on_swap is not None:
+                    self.on_swap(version)
+
+            self.history.append(metrics)
+            self.refreshes += 1
+            self.rejected += not accepted
+            print(f"Catalogue refresh {'accepted' if accepted else 'rejected'} ({reason}): "
+                  f"{metrics['n_movies']} movies, build {build_seconds:.1f}s")
+            return metrics
+
+    def _validate(self, engine, metrics):
+        """Return (accepted, reason) for a candidate engine."""
+        if metrics['n_movies'] < self.min_movies:
+            return False, f"only {metrics['n_movies']} movies"
+        if self.current is None:
+            return True, "initial build"
+
+        recall = recall_against(self.current.engine, engine, n_queries=self.n_validation_queries)
+        metrics['recall'] = recall
+        if recall < self.min_recall:
+            return False, f"recall {recall:.2f} below {self.min_recall:.2f}"
+        return True, f"recall {recall:.2f}"
+
+    def start(self):
+        """Refresh every `interval` seconds on a daemon thread until stop() is called."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='catalogue-refresher', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh_now()
+                self.last_error = None
+            except Exception as e:
+                # Keep serving the current engine; try again next interval
+                self.last_error = repr(e)
+                print(f"Catalogue refresh failed: {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        """
+        Returns:
+            dict: Current version number, refresh counts, the last refresh's metrics
+                and the last error
+        """
+        return {
+            'version': self.current.number if self.current is not None else None,
+            'refreshes': self.refreshes,
+            'rejected': self.rejected,
+            'last_refresh': self.history[-1] if self.history else None,
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,354 @@
+import pickle
+import sys
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+def to_compact_csr(matrix):
+    """
+    Convert a sparse matrix to CSR with float32 data and int32 indices.
+
+    Args:
+        matrix (scipy.sparse matrix): Matrix to convert
+
+    Returns:
+        scipy.sparse.csr_matrix: Compact copy of the matrix
+    """
+    matrix = csr_matrix(matrix)
+    if matrix.nnz >= np.iinfo(np.int32).max:
+        # int32 cannot address this many non-zeros, keep the wide index type
+        return matrix.astype(np.float32)
+
+    return csr_matrix(
+        (matrix.data.astype(np.float32),
+         matrix.indices.astype(np.int32),
+         matrix.indptr.astype(np.int32)),
+        shape=matrix.shape
+    )
+
+class CategoricalColumn:
+    """Single-valued column interned into int32 codes (-1 for missing)."""
+
+    def __init__(self, values):
+        """
+        Args:
+            values (iterable): One value per movie
+        """
+        # Only building a catalogue needs pandas; workers attach with from_arrays
+        import pandas as pd
+
+        codes, uniques = pd.factorize(pd.Series(list(values), dtype=object))
+        self.codes = codes.astype(np.int32)
+        self.vocabulary = list(uniques)
+        self.positions = _positions_of(self.vocabulary)
+
+    @classmethod
+    def from_arrays(cls, codes, vocabulary):
+        """Wrap existing code arrays without copying them."""
+        column = cls.__new__(cls)
+        column.codes = codes
+        column.vocabulary = vocabulary
+        column.positions = _positions_of(vocabulary)
+        return column
+
+    def __getitem__(self, idx):
+        code = self.codes[idx]
+        return self.vocabulary[code] if code >= 0 else None
+
+    def lookup(self, values):
+        """Return the codes of the given values (values not in the vocabulary are dropped)."""
+        return np.array([self.positions[v] for v in values if v in self.positions], dtype=np.int32)
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + _vocabulary_nbytes(self.vocabulary) + sys.getsizeof(self.positions)
+
+class RaggedColumn:
+    """List-valued column stored as int32 codes with offsets into them."""
+
+    def __init__(self, values):
+        """
+        Args:
+            values (iterable): One list per movie (non-list entries are kept as missing)
+        """
+        vocabulary = {}
+        codes = []
+        offsets = [0]
+        is_list = []
+        for items in values:
+            if isinstance(items, list):
+                codes.extend(vocabulary.setdefault(item, len(vocabulary)) for item in items)
+                is_list.append(True)
+            else:
+                is_list.append(False)
+            offsets.append(len(codes))
+
+        self.codes = np.array(codes, dtype=np.int32)
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.is_list = np.array(is_list, dtype=bool)
+        self.vocabulary = list(vocabulary)
+        self.positions = vocabulary
+
+    @classmethod
+    def from_arrays(cls, codes, offsets, is_list, vocabulary):
+        """Wrap existing code/offset arrays without copying them."""
+        column = cls.__new__(cls)
+        column.codes = codes
+        column.offsets = offsets
+        column.is_list = is_list
+        column.vocabulary = vocabulary
+        column.positions = _positions_of(vocabulary)
+        return column
+
+    def __getitem__(self, idx):
+        if not self.is_list[idx]:
+            return None
+        start, end = self.offsets[idx], self.offsets[idx + 1]
+        return [self.vocabulary[code] for code in self.codes[start:end]]
+
+    def lookup(self, values):
+        """Return the codes of the given values (values not in the vocabulary are dropped)."""
+        return np.array([self.positions[v] for v in values if v in self.positions], dtype=np.int32)
+
+    def rows_containing_any(self, codes):
+        """
+        Find movies whose list contains at least one of `codes`.
+
+        Returns:
+            np.ndarray: Boolean mask with one entry per movie
+        """
+        member = np.isin(self.codes, codes)
+        # Prefix sums turn "any member in [start, end)" into a subtraction per row
+        hits = np.concatenate(([0], np.cumsum(member)))
+        return hits[self.offsets[1:]] > hits[self.offsets[:-1]]
+
+    @property
+    def nbytes(self):
+        return (self.codes.nbytes + self.offsets.nbytes + self.is_list.nbytes
+                + _vocabulary_nbytes(self.vocabulary) + sys.getsizeof(self.positions))
+
+class LazyRecords:
+    """Per-movie records pickled into one buffer and decoded only when requested."""
+
+    def __init__(self, columns, rows):
+        """
+        Args:
+            columns (list): Field names shared by every record
+            rows (iterable): One tuple of field values per movie
+        """
+        self.columns = list(columns)
+        # Values are pickled as tuples so field names are not repeated per movie
+        chunks = [pickle.dumps(tuple(row), protocol=pickle.HIGHEST_PROTOCOL) for row in rows]
+        self.offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+        self.offsets[1:] = np.cumsum([len(chunk) for chunk in chunks])
+        self.buffer = np.frombuffer(b''.join(chunks), dtype=np.uint8)
+
+    @classmethod
+    def from_arrays(cls, columns, buffer, offsets):
+        """Wrap an existing record buffer without copying it."""
+        records = cls.__new__(cls)
+        records.columns = list(columns)
+        records.buffer = buffer
+        records.offsets = offsets
+        return records
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx):
+        start, end = self.offsets[idx], self.offsets[idx + 1]
+        return dict(zip(self.columns, pickle.loads(self.buffer[start:end])))
+
+    @property
+    def nbytes(self):
+        return self.buffer.nbytes + self.offsets.nbytes
+
+# List-valued columns; 'industries' lists every TMDB category a movie was found in
+RAGGED_COLUMNS = ('genres', 'cast', 'industries')
+
+class CompactCatalogue:
+    """
+    Columnar, memory-compact replacement for the movies dataframe.
+
+    Genres, cast and industries are stored as ragged integer-code lists, director, language
+    and industry as integer codes, release year as float32, and display-only
+    fields are decoded lazily per movie.
+    """
+
+    def __init__(self, movies_df):
+        """
+        Args:
+            movies_df (pd.DataFrame): Processed movie dataframe
+        """
+        import pandas as pd
+
+        self.n_movies = len(movies_df)
+        self.columns = list(movies_df.columns)
+
+        if 'release_year' in movies_df.columns:
+            self.release_year = pd.to_numeric(movies_df['release_year'], errors='coerce').to_numpy(dtype=np.float32)
+        else:
+            self.release_year = np.full(self.n_movies, np.nan, dtype=np.float32)
+
+        for name in RAGGED_COLUMNS:
+            setattr(self, name, RaggedColumn(movies_df[name]) if name in movies_df.columns else None)
+
+        self.categorical = {
+            column: CategoricalColumn(movies_df[column])
+            for column in ['director', 'language', 'industry']
+            if column in movies_df.columns
+        }
+
+        # Everything else is only needed when a movie is displayed
+        self.display_columns = [column for column in self.columns
+                                if column != 'release_year' and column not in RAGGED_COLUMNS
+                                and column not in self.categorical]
+        self.display = LazyRecords(self.display_columns,
+                                   movies_df[self.display_columns].itertuples(index=False, name=None))
+
+    def __len__(self):
+        return self.n_movies
+
+    def to_arrays(self):
+        """
+        Split the catalogue into flat numpy arrays and a small picklable state.
+
+        The arrays hold everything that scales with the number of movies, so they
+        can be placed in shared memory and re-attached with from_arrays.
+
+        Returns:
+            tuple: (dict of name -> np.ndarray, dict of vocabularies and column names)
+        """
+        arrays = {
+            'release_year': self.release_year,
+            'display_buffer': self.display.buffer,
+            'display_offsets': self.display.offsets,
+        }
+        state = {
+            'n_movies': self.n_movies,
+            'columns': self.columns,
+            'display_columns': self.display_columns,
+            'ragged': {},
+            'categorical': {},
+        }
+        for name in RAGGED_COLUMNS:
+            column = getattr(self, name)
+            if column is not None:
+                arrays[f"{name}_codes"] = column.codes
+                arrays[f"{name}_offsets"] = column.offsets
+                arrays[f"{name}_is_list"] = column.is_list
+                state['ragged'][name] = column.vocabulary
+        for name, column in self.categorical.items():
+            arrays[f"{name}_codes"] = column.codes
+            state['categorical'][name] = column.vocabulary
+        return arrays, state
+
+    @classmethod
+    def from_arrays(cls, arrays, state):
+        """
+        Rebuild a catalogue around existing arrays without copying them.
+
+        Args:
+            arrays (dict): Arrays produced by to_arrays (possibly backed by shared memory)
+            state (dict): State produced by to_arrays
+
+        Returns:
+            CompactCatalogue: Catalogue viewing the given arrays
+        """
+        catalogue = cls.__new__(cls)
+        catalogue.n_movies = state['n_movies']
+        catalogue.columns = state['columns']
+        catalogue.display_columns = state['display_columns']
+        catalogue.release_year = arrays['release_year']
+        catalogue.display = LazyRecords.from_arrays(
+            state['display_columns'], arrays['display_buffer'], arrays['display_offsets'])
+        for name in RAGGED_COLUMNS:
+            column = None
+            if name in state['ragged']:
+                column = RaggedColumn.from_arrays(
+                    arrays[f"{name}_codes"], arrays[f"{name}_offsets"],
+                    arrays[f"{name}_is_list"], state['ragged'][name])
+            setattr(catalogue, name, column)
+        catalogue.categorical = {
+            name: CategoricalColumn.from_arrays(arrays[f"{name}_codes"], vocabulary)
+            for name, vocabulary in state['categorical'].items()
+        }
+        return catalogue
+
+    def get_movie(self, idx):
+        """
+        Decode all fields of a single movie.
+
+        Args:
+            idx (int): Row index of the movie
+
+        Returns:
+            dict: Movie fields, usable wherever a dataframe row is expected
+        """
+        movie = self.display[idx]
+        year = self.release_year[idx]
+        movie['release_year'] = None if np.isnan(year) else float(year)
+        for name in RAGGED_COLUMNS:
+            column = getattr(self, name)
+            if column is not None:
+                movie[name] = column[idx]
+        for column, values in self.categorical.items():
+            movie[column] = values[idx]
+        return movie
+
+    def filter_mask(self, filters):
+        """
+        Evaluate recommendation filters for every movie at once.
+
+        Follows the same rules as RecommendationEngine._apply_filters: movies with
+        no release year or no genre list are not excluded by those filters.
+
+        Args:
+            filters (dict): Filters to apply
+
+        Returns:
+            np.ndarray: Boolean mask, True for movies that pass all filters
+        """
+        mask = np.ones(self.n_movies, dtype=bool)
+
+        if filters.get('year_range') is not None:
+            min_year, max_year = filters['year_range']
+            years = self.release_year
+            mask &= np.isnan(years) | ((years >= min_year) & (years <= max_year))
+
+        if filters.get('genres') and self.genres is not None:
+            selected = self.genres.lookup(filters['genres'])
+            mask &= ~self.genres.is_list | self.genres.rows_containing_any(selected)
+
+        if filters.get('industries'):
+            selected = np.zeros(self.n_movies, dtype=bool)
+            if 'industry' in self.categorical:
+                industry = self.categorical['industry']
+                selected = np.isin(industry.codes, industry.lookup(filters['industries']))
+            if self.industries is not None:
+                # A movie listed in several categories matches any of them
+                listed = self.industries.rows_containing_any(self.industries.lookup(filters['industries']))
+                selected = np.where(self.industries.is_list, listed, selected)
+            if self.industries is not None or 'industry' in self.categorical:
+                mask &= selected
+
+        return mask
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the catalogue's arrays, vocabularies and buffers."""
+        total = self.release_year.nbytes + self.display.nbytes
+        for column in (getattr(self, name) for name in RAGGED_COLUMNS):
+            if column is not None:
+                total += column.nbytes
+        for column in self.categorical.values():
+            total += column.nbytes
+        return total
+
+def _vocabulary_nbytes(vocabulary):
+    """Approximate size of a vocabulary list and the strings it holds."""
+    return sys.getsizeof(vocabulary) + sum(sys.getsizeof(value) for value in vocabulary)
+
+def _positions_of(vocabulary):
+    """Value -> code map of a vocabulary, for filter lookups."""
+    return {value: code for code, value in enumerate(vocabulary)}
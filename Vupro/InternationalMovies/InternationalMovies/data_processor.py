@@ -2,22 +2,82 @@ import pandas as pd
 import numpy as np
 import re
 import os
-from sklearn.feature_extraction.text import TfidfVectorizer
-import nltk
-import string
+import json
+import heapq
+from scipy.sparse import diags, load_npz, save_npz, vstack
+# scikit-learn and NLTK are imported by the methods that use them, so the
+# metadata-only startup stage does not pay for them
+import itertools
+import unicodedata
 
-# Ensure NLTK data path is set properly
-nltk.data.path.append('/home/runner/nltk_data')
+_nltk_data_ready = False
 
-# Force download required NLTK data packages
-nltk.download('punkt', quiet=False)
-nltk.download('stopwords', quiet=False)
-nltk.download('wordnet', quiet=False)
+
+def _ensure_nltk_data():
+    """Set the NLTK data path and download the required packages, once per process."""
+    global _nltk_data_ready
+    if _nltk_data_ready:
+        return
+    import nltk
+
+    # Ensure NLTK data path is set properly
+    nltk.data.path.append('/home/runner/nltk_data')
+
+    # Force download required NLTK data packages
+    nltk.download('punkt', quiet=False)
+    nltk.download('stopwords', quiet=False)
+    nltk.download('wordnet', quiet=False)
+    _nltk_data_ready = True
+
+
+def _combining_mark_ranges():
+    """Character-class ranges of every combining mark (Unicode category M*)."""
+    ranges = []
+    # Only planes 0-1 (all scripts) and 14 (variation selectors) have any
+    for code in itertools.chain(range(0x20000), range(0xE0000, 0xE1000)):
+        if unicodedata.category(chr(code))[0] == 'M':
+            if ranges and ranges[-1][1] == code - 1:
+                ranges[-1][1] = code
+            else:
+                ranges.append([code, code])
+    return ''.join(f"\\U{start:08x}-\\U{end:08x}" for start, end in ranges)
+
+
+_token_pattern = None
+
+
+def token_pattern():
+    """
+    The compiled Unicode-aware token regex, built on first use.
+
+    A token is a run of letters (or underscores), combining marks and zero-width
+    (non-)joiners. `\\w` alone excludes combining marks, so it splits Devanagari,
+    Tamil, Telugu and other Indic words at every vowel sign and virama.
+    Digits and punctuation separate tokens, as the regex cleaning did before.
+    Listing the combining marks scans the Unicode database (tens of ms), which
+    importing this module should not pay for.
+    """
+    global _token_pattern
+    if _token_pattern is None:
+        _token_pattern = re.compile(f"(?:[^\\W\\d]|[{_combining_mark_ranges()}\\u200c\\u200d])+")
+    return _token_pattern
 
 class DataProcessor:
-    def __init__(self):
-        """Initialize the data processor with NLP tools."""
+    def __init__(self, feature_mode='tfidf', n_buckets=2 ** 20, keep_reverse_map=True, tokenizer='regex'):
+        """
+        Initialize the data processor with NLP tools.
+        
+        Args:
+            feature_mode (str): 'tfidf' for a fitted vocabulary, or 'hashing' for a
+                hashing-trick feature space with no vocabulary in memory
+            n_buckets (int): Number of hash buckets in 'hashing' mode
+            keep_reverse_map (bool): In 'hashing' mode, remember one term per bucket
+                so similarity explanations can show terms
+            tokenizer (str): 'regex' for the compiled Unicode-aware token_pattern(),
+                or 'nltk' for NLTK's word_tokenize (falling back to str.split)
+        """
         # Import NLTK components after ensuring downloads
+        _ensure_nltk_data()
         from nltk.corpus import stopwords
         from nltk.stem import WordNetLemmatizer, PorterStemmer
 
@@ -69,9 +129,35 @@ class DataProcessor:
         self.min_df = 2
         self.max_df = 0.85
         self.max_features = 5000
+        self.vectorizer = None
+        
+        # Feature space parameters
+        if feature_mode not in ('tfidf', 'hashing'):
+            raise ValueError(f"Unknown feature mode: {feature_mode}")
+        self.feature_mode = feature_mode
+        self.n_buckets = n_buckets
+        self.keep_reverse_map = keep_reverse_map
         
-    def preprocess_data(self, df):
-        """Preprocess the movie dataframe."""
+        if tokenizer not in ('regex', 'nltk'):
+            raise ValueError(f"Unknown tokenizer: {tokenizer}")
+        self.tokenizer = tokenizer
+        
+        # Parsed genre/cast strings, shared across columns and chunks; once full,
+        # further values are parsed per call only, so the cache never grows past
+        # max_parsed_lists however large the catalogue
+        self._parsed_lists = {}
+        self.max_parsed_lists = 50000
+        
+    def preprocess_data(self, df, include_text=True):
+        """
+        Preprocess the movie dataframe.
+        
+        Args:
+            df (pd.DataFrame): Raw movie dataframe
+            include_text (bool): Also preprocess the plot text into
+                'preprocessed_overview'. This is by far the slowest step; skip it
+                to get the metadata columns quickly and call preprocess_overviews later.
+        """
         # Create a copy to avoid modifying the original
         df_processed = df.copy()
         
@@ -85,27 +171,11 @@ class DataProcessor:
         elif 'year' in df_processed.columns:
             df_processed['release_year'] = df_processed['year']
         
-        # Process text columns
-        text_columns = ['overview', 'synopsis', 'plot', 'description']
-        target_col = None
-        
-        # Find available text column to use
-        for col in text_columns:
-            if col in df_processed.columns and df_processed[col].notna().sum() > 0:
-                target_col = col
-                break
-        
-        if target_col is None and 'overview' in df_processed.columns:
-            # If no text column with data is found, create an empty overview column
-            df_processed['overview'] = ""
-            target_col = 'overview'
-        elif target_col is None:
-            # If no text column exists, create one
-            df_processed['overview'] = ""
-            target_col = 'overview'
-        
         # Preprocess text data
-        df_processed['preprocessed_overview'] = df_processed[target_col].fillna("").apply(self.preprocess_text)
+        if include_text:
+            df_processed['preprocessed_overview'] = self.preprocess_overviews(df_processed)
+        else:
+            self._overview_column(df_processed)
         
         # Process genres
         if 'genres' in df_processed.columns:
@@ -114,9 +184,7 @@ class DataProcessor:
                 pass  # already processed
             else:
                 # Process genres from string format to list
-                df_processed['genres'] = df_processed['genres'].apply(
-                    lambda x: self.extract_genres(x) if isinstance(x, str) else []
-                )
+                df_processed['genres'] = self.parse_list_column(df_processed['genres'], self.extract_genres)
         else:
             df_processed['genres'] = [[] for _ in range(len(df_processed))]
         
@@ -125,9 +193,7 @@ class DataProcessor:
             if df_processed['cast'].dtype != 'object' or isinstance(df_processed['cast'].iloc[0], list):
                 pass  # already processed
             else:
-                df_processed['cast'] = df_processed['cast'].apply(
-                    lambda x: self.extract_names(x) if isinstance(x, str) else []
-                )
+                df_processed['cast'] = self.parse_list_column(df_processed['cast'], self.extract_names)
         else:
             df_processed['cast'] = [[] for _ in range(len(df_processed))]
         
@@ -144,6 +210,37 @@ class DataProcessor:
             
         return df_processed
     
+    def preprocess_overviews(self, df_processed):
+        """
+        Preprocess the plot text of a movie dataframe.
+        
+        Returns:
+            pd.Series: Preprocessed text, aligned with `df_processed`
+        """
+        return df_processed[self._overview_column(df_processed)].fillna("").apply(self.preprocess_text)
+    
+    def _overview_column(self, df_processed):
+        """Name of the plot text column, adding an empty 'overview' column if there is none."""
+        text_columns = ['overview', 'synopsis', 'plot', 'description']
+        target_col = None
+        
+        # Find available text column to use
+        for col in text_columns:
+            if col in df_processed.columns and df_processed[col].notna().sum() > 0:
+                target_col = col
+                break
+        
+        if target_col is None and 'overview' in df_processed.columns:
+            # If no text column with data is found, create an empty overview column
+            df_processed['overview'] = ""
+            target_col = 'overview'
+        elif target_col is None:
+            # If no text column exists, create one
+            df_processed['overview'] = ""
+            target_col = 'overview'
+        
+        return target_col
+    
     def preprocess_text(self, text):
         """Preprocess text data for NLP analysis."""
         if not isinstance(text, str) or not text:
@@ -152,18 +249,22 @@ class DataProcessor:
         # Convert to lowercase
         text = text.lower()
         
-        # Remove special characters and numbers
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = re.sub(r'\d+', ' ', text)
-        
-        # Tokenize using our robust method
-        try:
-            # Try to import and use word_tokenize if available
-            from nltk.tokenize import word_tokenize
-            tokens = word_tokenize(text)
-        except:
-            # Fall back to simple tokenization if word_tokenize fails
-            tokens = self.simple_tokenize(text)
+        if self.tokenizer == 'regex':
+            # One pass: letter runs, split at special characters and numbers
+            tokens = token_pattern().findall(text)
+        else:
+            # Remove special characters and numbers
+            text = re.sub(r'[^\w\s]', ' ', text)
+            text = re.sub(r'\d+', ' ', text)
+            
+            # Tokenize using our robust method
+            try:
+                # Try to import and use word_tokenize if available
+                from nltk.tokenize import word_tokenize
+                tokens = word_tokenize(text)
+            except:
+                # Fall back to simple tokenization if word_tokenize fails
+                tokens = self.simple_tokenize(text)
         
         # Remove stopwords
         tokens = [t for t in tokens if t not in self.stop_words and len(t) > 2]
@@ -180,6 +281,104 @@ class DataProcessor:
         
         return processed_text
     
+    def detect_list_format(self, values, sample_size=200):
+        """
+        Detect how a genre/cast column is serialised from a sample of its values.
+        
+        Args:
+            values (pd.Series): Raw column values
+            sample_size (int): Number of non-empty strings to inspect
+            
+        Returns:
+            str: 'json_objects', 'python_list', 'comma', or 'mixed' when the
+                sample does not agree on one format
+        """
+        sample = [v for v in values.head(sample_size * 5) if isinstance(v, str) and v][:sample_size]
+        formats = set()
+        for text in sample:
+            if '{' in text and '}' in text and 'name' in text:
+                formats.add('json_objects')
+            elif text.startswith('[') and text.endswith(']'):
+                formats.add('python_list')
+            else:
+                formats.add('comma')
+        
+        if len(formats) == 1:
+            return formats.pop()
+        return 'mixed' if formats else 'comma'
+    
+    def parse_list_column(self, values, extractor):
+        """
+        Parse a serialised genre or cast column into lists.
+        
+        The format is detected once from a sample, then each distinct raw string
+        is parsed once with that format's fast path; repeated values (common
+        genre combinations, recurring cast lists) reuse the cached result. The
+        cache kept across calls holds at most `max_parsed_lists` values, as
+        tuples; every row gets its own list, so editing one row changes no other.
+        
+        Args:
+            values (pd.Series): Raw column values
+            extractor (callable): Per-value fallback (extract_genres or extract_names),
+                used when the sample mixes formats or a fast path cannot parse a value
+            
+        Returns:
+            pd.Series: One list per row (empty for missing values)
+        """
+        parse = {
+            'json_objects': self._parse_json_names,
+            'python_list': self._parse_quoted_list,
+            'comma': self._parse_comma_list,
+        }.get(self.detect_list_format(values), extractor)
+        
+        raw = values.to_numpy(dtype=object)
+        cache = self._parsed_lists
+        parsed = {}
+        for text in pd.unique(raw):
+            if not isinstance(text, str):
+                continue
+            result = cache.get(text)
+            if result is None:
+                result = parse(text)
+                if result is None:
+                    result = extractor(text)
+                result = tuple(result)
+                if len(cache) < self.max_parsed_lists:
+                    cache[text] = result
+            parsed[text] = result
+        
+        return pd.Series([list(parsed[text]) if isinstance(text, str) else [] for text in raw],
+                         index=values.index, dtype=object)
+    
+    # Fast paths only accept the plain shapes; anything unusual (escapes, names
+    # quoted differently) returns None and goes through the full extractor
+    _SINGLE_QUOTED_NAME = re.compile(r"'name': '([^'\\]*)'")
+    _DOUBLE_QUOTED_NAME = re.compile(r'"name": "([^"\\]*)"')
+    _SINGLE_QUOTED_ITEM = re.compile(r"'([^']*)'")
+    
+    def _parse_json_names(self, text):
+        """Fast path for "[{'id': 28, 'name': 'Action'}, ...]" and its JSON form."""
+        if '"name"' in text:
+            pattern, key = self._DOUBLE_QUOTED_NAME, '"name"'
+        else:
+            pattern, key = self._SINGLE_QUOTED_NAME, "'name'"
+        names = pattern.findall(text)
+        if len(names) != text.count(key):
+            return None
+        return names
+    
+    def _parse_quoted_list(self, text):
+        """Fast path for "['Action', 'Adventure']" (Python list repr)."""
+        if not (text.startswith('[') and text.endswith(']')) or '"' in text or '\\' in text:
+            return None
+        return self._SINGLE_QUOTED_ITEM.findall(text)
+    
+    def _parse_comma_list(self, text):
+        """Fast path for "Action, Adventure, Fantasy"."""
+        if text.startswith('['):
+            return None
+        return [item.strip() for item in text.split(',') if item.strip()]
+    
     def extract_genres(self, genre_text):
         """Extract genres from text representation."""
         if not genre_text or not isinstance(genre_text, str):
@@ -240,6 +439,10 @@ class DataProcessor:
     
     def vectorize_text(self, text_list):
         """Convert preprocessed text to TF-IDF vectors."""
+        if self.feature_mode == 'hashing':
+            return self._vectorize_hashed(text_list)
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        
         vectorizer = TfidfVectorizer(
             min_df=self.min_df,
             max_df=self.max_df,
@@ -251,7 +454,270 @@ class DataProcessor:
         # Fit and transform the text data
         tfidf_matrix = vectorizer.fit_transform(text_list)
         
+        # Keep the fitted vectorizer so free-text queries can be projected later
+        self.vectorizer = vectorizer
+        
         # Get feature names for later explanation
         feature_names = vectorizer.get_feature_names_out()
         
         return tfidf_matrix, feature_names
+
+    def _create_hashing_vectorizer(self):
+        from hashed_features import HashingTfidfVectorizer
+        return HashingTfidfVectorizer(
+            n_buckets=self.n_buckets,
+            min_df=self.min_df,
+            max_df=self.max_df,
+            keep_reverse_map=self.keep_reverse_map
+        )
+    
+    def _vectorize_hashed(self, text_list):
+        """
+        Convert preprocessed text to TF-IDF vectors in a hashed feature space.
+        
+        max_features does not apply: the feature space size is n_buckets.
+        """
+        vectorizer = self._create_hashing_vectorizer()
+        tfidf_matrix = vectorizer.fit_transform(text_list)
+        self.vectorizer = vectorizer
+        
+        return tfidf_matrix, vectorizer.get_feature_names_out()
+    
+    def iter_catalogue_chunks(self, source, chunksize=10000):
+        """
+        Read a movie catalogue in chunks.
+        
+        Only a CSV file is read incrementally. A pickle cannot be read in parts,
+        so it would be loaded whole and save no memory; it is rejected, convert
+        it once with `pd.read_pickle(path).to_csv(csv_path, index=False)`.
+        
+        Args:
+            source (str or pd.DataFrame): Path to a CSV file, or a dataframe already in memory
+            chunksize (int): Number of movies per chunk
+            
+        Yields:
+            pd.DataFrame: Consecutive chunks of the catalogue
+            
+        Raises:
+            ValueError: If `source` is a path to anything but a CSV file
+        """
+        if isinstance(source, pd.DataFrame):
+            for start in range(0, len(source), chunksize):
+                yield source.iloc[start:start + chunksize]
+        elif str(source).endswith('.csv'):
+            # pandas only holds one chunk of the file at a time
+            yield from pd.read_csv(source, chunksize=chunksize)
+        else:
+            raise ValueError(f"Streaming needs a CSV catalogue, got {source!r}: other formats "
+                             "would be loaded whole (convert a pickle with to_csv first)")
+    
+    def iter_preprocessed_chunks(self, chunks):
+        """
+        Preprocess catalogue chunks lazily.
+        
+        Args:
+            chunks (iterable): Chunks from iter_catalogue_chunks
+            
+        Yields:
+            pd.DataFrame: Preprocessed chunk, including 'preprocessed_overview'
+        """
+        for chunk in chunks:
+            yield self.preprocess_data(chunk)
+    
+    def _streaming_vectorizer(self, vocabulary=None):
+        """CountVectorizer with the same analyzer settings as vectorize_text."""
+        from sklearn.feature_extraction.text import CountVectorizer
+        return CountVectorizer(stop_words='english', ngram_range=(1, 2), vocabulary=vocabulary)
+    
+    def build_streaming(self, source, output_dir, chunksize=10000):
+        """
+        Preprocess and vectorise a catalogue that does not fit in memory.
+        
+        Pass 1 preprocesses each chunk, spools it to disk and writes the chunk's
+        sorted n-gram document/term frequencies as a run file. The runs are
+        k-way merged to choose the vocabulary exactly as vectorize_text does
+        (min_df, max_df, max_features). Pass 2 re-reads the spooled text chunk by
+        chunk and writes one TF-IDF CSR block per chunk. Peak memory is bounded
+        by the chunk size, not the catalogue size.
+        
+        Args:
+            source (str or pd.DataFrame): Catalogue to read (see iter_catalogue_chunks)
+            output_dir (str): Directory for spooled chunks, CSR blocks and the manifest
+            chunksize (int): Number of movies per chunk
+            
+        Returns:
+            dict: Manifest describing the written chunks and blocks
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        
+        # Pass 1: preprocess, spool text and write per-chunk frequency runs
+        n_documents = 0
+        chunk_files = []
+        run_files = []
+        hashing = self.feature_mode == 'hashing'
+        if hashing:
+            vectorizer = self._create_hashing_vectorizer()
+            statistics = None
+        
+        chunks = self.iter_preprocessed_chunks(self.iter_catalogue_chunks(source, chunksize))
+        for chunk_number, chunk in enumerate(chunks):
+            chunk_file = os.path.join(output_dir, f"chunk_{chunk_number:05d}.pkl")
+            chunk.to_pickle(chunk_file)
+            chunk_files.append(chunk_file)
+            n_documents += len(chunk)
+            
+            if hashing:
+                # Per-bucket statistics are fixed-size, so they are merged as we go
+                chunk_statistics = vectorizer.shard_statistics(chunk['preprocessed_overview'].tolist())
+                statistics = chunk_statistics if statistics is None else \
+                    vectorizer.merge_statistics([statistics, chunk_statistics])
+                continue
+            
+            try:
+                counter = self._streaming_vectorizer()
+                counts = counter.fit_transform(chunk['preprocessed_overview'])
+            except ValueError:
+                # Chunk with no usable terms (e.g. all overviews empty)
+                continue
+            
+            run_file = os.path.join(output_dir, f"terms_{chunk_number:05d}.tsv")
+            self._write_term_run(
+                run_file,
+                counter.get_feature_names_out(),
+                np.asarray((counts > 0).sum(axis=0)).ravel(),
+                np.asarray(counts.sum(axis=0)).ravel()
+            )
+            run_files.append(run_file)
+        
+        if hashing:
+            vectorizer.fit_statistics([statistics])
+            self.vectorizer = vectorizer
+            transform = vectorizer.transform
+            feature_names = {
+                'n_buckets': self.n_buckets,
+                'reverse_map': {str(bucket): term for bucket, term in vectorizer.reverse_map.items()},
+            }
+        else:
+            vocabulary, idf = self._select_vocabulary(self._merge_term_runs(run_files), n_documents)
+            for run_file in run_files:
+                os.remove(run_file)
+            transformer = self._streaming_vectorizer(vocabulary)
+            idf_diagonal = diags(idf)
+            from sklearn.preprocessing import normalize
+            transform = lambda texts: normalize(transformer.transform(texts) @ idf_diagonal, norm='l2')
+            feature_names = vocabulary
+        
+        # Pass 2: transform each spooled chunk with the global vocabulary (or buckets) and IDF
+        block_files = []
+        for chunk_number, chunk_file in enumerate(chunk_files):
+            texts = pd.read_pickle(chunk_file)['preprocessed_overview']
+            block = transform(texts.tolist())
+            block_file = os.path.join(output_dir, f"tfidf_{chunk_number:05d}.npz")
+            save_npz(block_file, block.tocsr())
+            block_files.append(block_file)
+        
+        manifest = {
+            'n_documents': n_documents,
+            'chunks': [os.path.basename(path) for path in chunk_files],
+            'blocks': [os.path.basename(path) for path in block_files],
+            'feature_mode': self.feature_mode,
+            'feature_names': feature_names,
+        }
+        with open(os.path.join(output_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f)
+        
+        return manifest
+    
+    def _write_term_run(self, path, terms, document_frequency, term_frequency):
+        """Write one chunk's (term, df, tf) statistics, sorted by term, as a TSV run."""
+        order = np.argsort(terms, kind='stable')
+        with open(path, 'w', encoding='utf-8') as f:
+            for i in order:
+                f.write(f"{terms[i]}\t{document_frequency[i]}\t{term_frequency[i]}\n")
+    
+    def _merge_term_runs(self, paths):
+        """
+        K-way merge sorted term runs into global statistics.
+        
+        Yields:
+            tuple: (term, document frequency, term frequency) in sorted term order
+        """
+        def read_run(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    term, df, tf = line.rstrip('\n').split('\t')
+                    yield term, int(df), int(tf)
+        
+        current_term, current_df, current_tf = None, 0, 0
+        for term, df, tf in heapq.merge(*(read_run(path) for path in paths)):
+            if term != current_term:
+                if current_term is not None:
+                    yield current_term, current_df, current_tf
+                current_term, current_df, current_tf = term, 0, 0
+            current_df += df
+            current_tf += tf
+        if current_term is not None:
+            yield current_term, current_df, current_tf
+    
+    def _select_vocabulary(self, term_statistics, n_documents):
+        """
+        Apply the min_df/max_df/max_features rules of TfidfVectorizer to merged counts.
+        
+        Args:
+            term_statistics (iterable): (term, df, tf) tuples in sorted term order
+            n_documents (int): Number of documents in the catalogue
+            
+        Returns:
+            tuple: (sorted vocabulary list, smoothed IDF array in vocabulary order)
+        """
+        max_doc_count = self.max_df if isinstance(self.max_df, int) else self.max_df * n_documents
+        min_doc_count = self.min_df if isinstance(self.min_df, int) else self.min_df * n_documents
+        
+        # Bounded min-heap of the most frequent terms. Terms arrive in sorted order,
+        # so on equal frequency the earlier term is kept, like a stable sort would.
+        top_terms = []
+        for position, (term, df, tf) in enumerate(term_statistics):
+            if not min_doc_count <= df <= max_doc_count:
+                continue
+            entry = (tf, -position, term, df)
+            if self.max_features is None or len(top_terms) < self.max_features:
+                heapq.heappush(top_terms, entry)
+            elif tf > top_terms[0][0]:
+                heapq.heapreplace(top_terms, entry)
+        
+        kept = sorted((term, df) for _, _, term, df in top_terms)
+        vocabulary = [term for term, _ in kept]
+        df = np.array([df for _, df in kept], dtype=np.float64)
+        idf = np.log((1 + n_documents) / (1 + df)) + 1
+        return vocabulary, idf
+    
+    @staticmethod
+    def load_streamed(output_dir):
+        """
+        Load the output of build_streaming.
+        
+        Args:
+            output_dir (str): Directory written by build_streaming
+            
+        Returns:
+            tuple: (movies dataframe, TF-IDF CSR matrix, feature names)
+        """
+        with open(os.path.join(output_dir, 'manifest.json')) as f:
+            manifest = json.load(f)
+        
+        movies_df = pd.concat(
+            [pd.read_pickle(os.path.join(output_dir, name)) for name in manifest['chunks']],
+            ignore_index=True
+        )
+        tfidf_matrix = vstack(
+            [load_npz(os.path.join(output_dir, name)) for name in manifest['blocks']],
+            format='csr'
+        )
+        if manifest.get('feature_mode') == 'hashing':
+            from hashed_features import HashedFeatureNames
+            names = manifest['feature_names']
+            feature_names = HashedFeatureNames(
+                names['n_buckets'], {int(bucket): term for bucket, term in names['reverse_map'].items()})
+        else:
+            feature_names = np.array(manifest['feature_names'], dtype=object)
+        return movies_df, tfidf_matrix, feature_names
@@ -0,0 +1,137 @@
+"""
+Lazy, cached enrichment of displayed movies with trailers.
+
+Ingestion fetches what similarity and filtering need, including streaming
+providers. Trailer URLs are shown just for the selected movie and its
+recommendations, so MovieEnricher fetches them the first time a movie is
+displayed. Results are kept in a bounded LRU for `ttl` seconds (trailers get
+added after release, so they expire), and concurrent requests for the same
+movie share a single TMDB call: the first caller fetches, later callers wait
+for its result.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Enrichment of a movie whose details could not be fetched
+EMPTY_ENRICHMENT = {'trailer_url': ''}
+
+
+class MovieEnricher:
+    """
+    TTL cache of per-movie enrichment with de-duplicated concurrent fetches.
+
+    Example:
+        enricher = MovieEnricher(utils.fetch_movie_enrichment)
+        extras = enricher.get(tmdb_id)           # {'trailer_url': ...}
+        enricher.get_many(recommended_ids)       # fetched in parallel, each at most once
+    """
+
+    def __init__(self, fetch, ttl=6 * 3600, failure_ttl=60, max_entries=10000, max_workers=8):
+        """
+        Args:
+            fetch (callable): TMDB id -> enrichment dict (e.g. utils.fetch_movie_enrichment);
+                may raise on failure
+            ttl (float): Seconds a fetched enrichment stays valid
+            failure_ttl (float): Seconds a failed fetch is remembered (as EMPTY_ENRICHMENT)
+                before it is retried
+            max_entries (int): Maximum number of cached movies
+            max_workers (int): Parallel fetches in get_many
+        """
+        self.fetch = fetch
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='enrichment')
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.failures = 0
+        self.last_error = None
+
+    def get(self, movie_id):
+        """
+        Enrichment of one movie, fetched on the first request and cached.
+
+        Args:
+            movie_id (int): TMDB id
+
+        Returns:
+            dict: 'trailer_url' (EMPTY_ENRICHMENT if the fetch failed)
+        """
+        owner = False
+        with self._lock:
+            entry = self.entries.get(movie_id)
+            if entry is not None:
+                expires_at, enrichment = entry
+                if expires_at > time.monotonic():
+                    self.entries.move_to_end(movie_id)
+                    self.hits += 1
+                    return enrichment
+                del self.entries[movie_id]
+                self.expirations += 1
+
+            future = self._in_flight.get(movie_id)
+            if future is not None:
+                self.coalesced += 1
+            else:
+                future = self._in_flight[movie_id] = Future()
+                self.misses += 1
+                owner = True
+        if not owner:
+            return future.result()
+
+        # Fetch outside the lock; other callers for this movie wait on the future
+        try:
+            enrichment, ttl = self.fetch(movie_id), self.ttl
+        except Exception as e:
+            enrichment, ttl = EMPTY_ENRICHMENT, self.failure_ttl
+            self.failures += 1
+            self.last_error = repr(e)
+        with self._lock:
+            self.entries[movie_id] = (time.monotonic() + ttl, enrichment)
+            self.entries.move_to_end(movie_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            del self._in_flight[movie_id]
+        future.set_result(enrichment)
+        return enrichment
+
+    def get_many(self, movie_ids):
+        """
+        Enrichment of several movies, fetching the missing ones in parallel.
+
+        Returns:
+            dict: TMDB id -> enrichment
+        """
+        movie_ids = list(dict.fromkeys(movie_ids))
+        return dict(zip(movie_ids, self._pool.map(self.get, movie_ids)))
+
+    def stats(self):
+        """
+        Returns:
+            dict: Cached entries, hits, misses, coalesced requests, expirations,
+                evictions, failed fetches and the last fetch error
+        """
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'expirations': self.expirations,
+            'evictions': self.evictions,
+            'failures': self.failures,
+            'last_error': self.last_error,
+        }
+
+    def close(self):
+        """Stop the fetch threads."""
+        self._pool.shutdown()
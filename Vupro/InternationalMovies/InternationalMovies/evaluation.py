@@ -0,0 +1,284 @@
+"""
+Offline evaluation of recommendation quality against latency and memory.
+
+The exact RecommendationEngine is the ground truth. Every alternative
+configuration (compact float32, hashed features, reduced dimensions, sharding,
+or any later approximate mode) answers the same sample queries and is scored on
+recall@K, NDCG@K and rank overlap, next to its measured per-query latency and
+memory. The report is a table plus a chart of quality against latency and
+memory, for picking an operating point.
+
+Run with:
+
+    python evaluation.py [--movies N] [--queries Q] [--k K] [--output PREFIX]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+def recall_at_k(truth, predicted, k):
+    """Fraction of the reference top K that the candidate also returns in its top K."""
+    truth = list(truth)[:k]
+    if not truth:
+        return 1.0
+    return len(set(truth) & set(list(predicted)[:k])) / len(truth)
+
+
+def ndcg_at_k(truth, predicted, k):
+    """
+    NDCG@K with graded relevance taken from the reference ranking.
+
+    The reference's first result has gain K, its second K - 1, and so on;
+    movies outside the reference top K have no gain.
+    """
+    truth = list(truth)[:k]
+    if not truth:
+        return 1.0
+    gains = {idx: k - rank for rank, idx in enumerate(truth)}
+    discounts = 1 / np.log2(np.arange(2, k + 2))
+
+    dcg = sum(gains.get(idx, 0) * discounts[rank] for rank, idx in enumerate(list(predicted)[:k]))
+    ideal = sum(gain * discounts[rank] for rank, gain in enumerate(sorted(gains.values(), reverse=True)))
+    return dcg / ideal
+
+
+def rank_overlap(truth, predicted, k):
+    """Average overlap: mean over depths d = 1..K of |top d of both| / d (1.0 means the same order)."""
+    truth = list(truth)[:k]
+    predicted = list(predicted)[:k]
+    depth = max(len(truth), 1)
+    return float(np.mean([len(set(truth[:d]) & set(predicted[:d])) / d for d in range(1, depth + 1)]))
+
+
+def engine_nbytes(engine):
+    """
+    Memory held by an engine's matrices, catalogue and priors.
+
+    Works for RecommendationEngine (default or compact) and ShardedEngine.
+    """
+    if hasattr(engine, 'shards'):
+        return sum(engine_nbytes(shard.engine) for shard in engine.shards.values())
+
+    def matrix_nbytes(matrix):
+        if hasattr(matrix, 'indptr'):
+            return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+        return np.asarray(matrix).nbytes
+
+    total = matrix_nbytes(engine.tfidf_matrix) + matrix_nbytes(engine.metadata_matrix)
+    total += getattr(engine, 'quality_prior', np.zeros(0)).nbytes
+    if engine.catalogue is not None:
+        total += engine.catalogue.nbytes
+    else:
+        total += int(engine.movies_df.memory_usage(deep=True).sum())
+    return total
+
+
+class Configuration:
+    """An engine configuration to evaluate: a name, the engine, and how to query it."""
+
+    def __init__(self, name, engine, recommend=None):
+        """
+        Args:
+            name (str): Label used in the report
+            engine: RecommendationEngine, ShardedEngine, or anything `recommend` queries
+            recommend (callable): recommend(movie_idx, n) -> [(movie_idx, score), ...];
+                defaults to the engine's hybrid recommendations
+        """
+        self.name = name
+        self.engine = engine
+        self.recommend = recommend or (lambda movie_idx, n: engine.get_hybrid_recommendations(movie_idx, n=n))
+
+
+def _run_queries(configuration, queries, k):
+    """Answer every query, returning the ranked ids and per-query latencies."""
+    rankings = []
+    latencies = []
+    for movie_idx in queries:
+        start = time.perf_counter()
+        result = configuration.recommend(int(movie_idx), k)
+        latencies.append(time.perf_counter() - start)
+        rankings.append([int(idx) for idx, _ in result])
+    return rankings, np.array(latencies)
+
+
+def evaluate(reference, candidates, queries, k=10):
+    """
+    Score candidate configurations against the reference.
+
+    Args:
+        reference (Configuration): Exact engine used as ground truth
+        candidates (list): Configurations to compare
+        queries (list): Movie indices to query
+        k (int): Cut-off for recall, NDCG and overlap
+
+    Returns:
+        list: One dict per configuration (reference first) with 'name',
+            'recall', 'ndcg', 'overlap', 'latency_p50_ms', 'latency_p95_ms'
+            and 'memory_mb'
+    """
+    truth, _ = _run_queries(reference, queries, k)
+
+    rows = []
+    for configuration in [reference] + list(candidates):
+        # Warm up once so lazy initialisation is not charged to the first query
+        configuration.recommend(int(queries[0]), k)
+        rankings, latencies = _run_queries(configuration, queries, k)
+        rows.append({
+            'name': configuration.name,
+            'recall': float(np.mean([recall_at_k(t, p, k) for t, p in zip(truth, rankings)])),
+            'ndcg': float(np.mean([ndcg_at_k(t, p, k) for t, p in zip(truth, rankings)])),
+            'overlap': float(np.mean([rank_overlap(t, p, k) for t, p in zip(truth, rankings)])),
+            'latency_p50_ms': float(np.percentile(latencies, 50) * 1000),
+            'latency_p95_ms': float(np.percentile(latencies, 95) * 1000),
+            'memory_mb': engine_nbytes(configuration.engine) / 1e6,
+        })
+    return rows
+
+
+def format_report(rows, k):
+    """Render evaluation rows as a fixed-width text table."""
+    lines = [f"{'configuration':<24}{f'recall@{k}':>10}{f'ndcg@{k}':>9}{'overlap':>9}"
+             f"{'p50 ms':>9}{'p95 ms':>9}{'memory MB':>11}"]
+    for row in rows:
+        lines.append(f"{row['name']:<24}{row['recall']:>10.3f}{row['ndcg']:>9.3f}{row['overlap']:>9.3f}"
+                     f"{row['latency_p50_ms']:>9.2f}{row['latency_p95_ms']:>9.2f}{row['memory_mb']:>11.1f}")
+    return '\n'.join(lines)
+
+
+def plot_report(rows, path, k, width=1000, height=450):
+    """
+    Draw recall@K against p50 latency and against memory, side by side, as a PNG.
+
+    Args:
+        rows (list): Output of evaluate
+        path (str): Where to save the image
+        k (int): Cut-off used, for the axis label
+    """
+    from PIL import Image, ImageDraw
+
+    img = Image.new('RGB', (width, height), color=(255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    colors = [(31, 119, 180), (255, 127, 14), (44, 160, 44), (214, 39, 40), (148, 103, 189),
+              (140, 86, 75), (227, 119, 194), (127, 127, 127)]
+
+    panels = [('latency_p50_ms', 'p50 latency (ms)'), ('memory_mb', 'memory (MB)')]
+    panel_width = width // len(panels)
+    margin = 60
+    for number, (key, label) in enumerate(panels):
+        left = number * panel_width + margin
+        right = (number + 1) * panel_width - 20
+        top, bottom = 30, height - margin
+
+        draw.line([(left, top), (left, bottom), (right, bottom)], fill=(0, 0, 0))
+        draw.text((left + (right - left) // 2 - 40, bottom + 25), label, fill=(0, 0, 0))
+        draw.text((10 + number * panel_width, top - 20), f"recall@{k}", fill=(0, 0, 0))
+
+        x_max = max(row[key] for row in rows) * 1.1 or 1.0
+        for tick in (0.0, 0.5, 1.0):
+            y = bottom - tick * (bottom - top)
+            draw.text((left - 30, y - 5), f"{tick:.1f}", fill=(0, 0, 0))
+            draw.text((left + tick * (right - left) - 10, bottom + 5), f"{tick * x_max:.1f}", fill=(0, 0, 0))
+
+        for index, row in enumerate(rows):
+            x = left + row[key] / x_max * (right - left)
+            y = bottom - row['recall'] * (bottom - top)
+            color = colors[index % len(colors)]
+            draw.ellipse([x - 5, y - 5, x + 5, y + 5], fill=color)
+            draw.text((x + 8, y - 6 + 12 * (index % 2)), row['name'], fill=color)
+
+    img.save(path)
+
+
+def build_configurations(movies_df, n_components=256):
+    """
+    Build the reference engine and the alternative configurations available in this tree.
+
+    Args:
+        movies_df (pd.DataFrame): Raw movie dataframe
+        n_components (int): Dimensions kept by the reduced-dimensions configuration
+
+    Returns:
+        tuple: (reference Configuration, list of candidate Configurations)
+    """
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.preprocessing import normalize
+
+    from compact_catalogue import CompactCatalogue
+    from data_processor import DataProcessor
+    from recommendation_engine import RecommendationEngine
+    from sharded_engine import ShardedEngine
+
+    processor = DataProcessor()
+    movies_df = processor.preprocess_data(movies_df)
+    texts = movies_df['preprocessed_overview'].tolist()
+    tfidf_matrix, feature_names = processor.vectorize_text(texts)
+    exact = RecommendationEngine(movies_df, tfidf_matrix, feature_names)
+
+    candidates = [Configuration('compact float32',
+                                RecommendationEngine(movies_df, tfidf_matrix, feature_names, compact=True))]
+
+    hashed_matrix, hashed_names = DataProcessor(feature_mode='hashing').vectorize_text(texts)
+    candidates.append(Configuration('hashing 2^20',
+                                    RecommendationEngine(movies_df, hashed_matrix, hashed_names, compact=True)))
+
+    n_components = min(n_components, tfidf_matrix.shape[1] - 1)
+    reduced = normalize(TruncatedSVD(n_components, random_state=0).fit_transform(tfidf_matrix)).astype(np.float32)
+    candidates.append(Configuration(
+        f"svd {n_components} dims",
+        RecommendationEngine.from_components(csr_matrix(reduced), None, exact.metadata_matrix.astype(np.float32),
+                                             CompactCatalogue(movies_df),
+                                             metadata_feature_names=exact.metadata_feature_names,
+                                             quality_prior=exact.quality_prior,
+                                             movie_ids=exact.movie_ids)))
+
+    if 'industry' in movies_df.columns:
+        candidates.append(Configuration('sharded by industry',
+                                        ShardedEngine(movies_df, tfidf_matrix, feature_names, by='industry')))
+
+    return Configuration('exact', exact), candidates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--movies', type=int, default=10000,
+                        help="Synthetic catalogue size (0 evaluates the real catalogue from load_data)")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--output', default='evaluation_report',
+                        help="Prefix of the .txt, .json and .png report files")
+    args = parser.parse_args()
+
+    if args.movies:
+        from benchmarks import make_synthetic_catalogue
+        movies_df = make_synthetic_catalogue(args.movies)
+    else:
+        from utils import load_data
+        movies_df = load_data()
+
+    reference, candidates = build_configurations(movies_df)
+    n_movies = reference.engine.tfidf_matrix.shape[0]
+    queries = np.random.default_rng(0).choice(n_movies, size=min(args.queries, n_movies), replace=False)
+
+    rows = evaluate(reference, candidates, queries, k=args.k)
+    report = format_report(rows, args.k)
+    print(f"movies: {n_movies}  queries: {len(queries)}")
+    print(report)
+
+    with open(f"{args.output}.txt", 'w') as f:
+        f.write(report + '\n')
+    with open(f"{args.output}.json", 'w') as f:
+        json.dump({'movies': n_movies, 'queries': len(queries), 'k': args.k, 'results': rows}, f, indent=2)
+    plot_report(rows, f"{args.output}.png", args.k)
+    print(f"Report written to {args.output}.txt, .json and .png")
+
+    for configuration in candidates:
+        if hasattr(configuration.engine, 'close'):
+            configuration.engine.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""
+Buffered, non-blocking log of recommendation requests, impressions and clicks.
+
+EventLog.record only appends a tuple to an in-memory ring buffer, so logging
+costs the request path about a microsecond. A background thread drains the
+buffer in batches into an append-only JSON-lines log, gzip-compressed and
+rotated by size. If the writer falls behind, the buffer drops its oldest
+events rather than blocking or growing without bound; drops are counted.
+
+read_events streams the log back, oldest file first, for offline training
+(e.g. collaborative_filtering.interactions_from_events) and traffic replay.
+"""
+import gzip
+import json
+import os
+import threading
+import time
+import zlib
+from collections import deque
+
+EVENT_KINDS = ('request', 'impression', 'click')
+
+
+class EventLog:
+    """
+    Ring buffer of events with a background writer to rotated .jsonl.gz files.
+
+    Example:
+        log = EventLog('events')
+        log.record('request', session='ab12', movie_id=19404, method='hybrid', filters={...})
+        ...
+        log.close()
+        for event in read_events('events', kinds={'click'}):
+            ...
+    """
+
+    def __init__(self, directory, capacity=100000, flush_interval=1.0, batch_size=10000,
+                 max_file_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            directory (str): Directory of the log files (created if missing)
+            capacity (int): Events buffered in memory before the oldest are dropped
+            flush_interval (float): Seconds between background flushes
+            batch_size (int): Events per compressed batch; files rotate between batches
+            max_file_bytes (int): Compressed size at which a new file is started
+        """
+        self.directory = directory
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_file_bytes = max_file_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        self._buffer = deque(maxlen=capacity)
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self.files_written = 0
+        self.last_error = None
+
+        self._file = None
+        self._path = None
+        self._file_sequence = 0
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='event-log', daemon=True)
+        self._thread.start()
+
+    def record(self, kind, **fields):
+        """
+        Record an event; never blocks on I/O.
+
+        Args:
+            kind (str): 'request', 'impression' or 'click'
+            **fields: JSON-serialisable event fields (e.g. session, movie_idx, rank)
+        """
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"Unknown event kind {kind!r}; expected one of {EVENT_KINDS}")
+        if len(self._buffer) == self.capacity:
+            self.dropped += 1
+        # deque.append is atomic, so no lock is needed on the request path
+        self._buffer.append((time.time(), kind, fields))
+        self.recorded += 1
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Write every buffered event to the current log file."""
+        with self._write_lock:
+            while self._buffer:
+                lines = []
+                while len(lines) < self.batch_size:
+                    try:
+                        timestamp, kind, fields = self._buffer.popleft()
+                    except IndexError:
+                        break
+                    event = {'ts': timestamp, 'kind': kind}
+                    event.update(fields)
+                    lines.append(json.dumps(event, default=_to_json))
+                self._write_batch(lines)
+
+    def _write_batch(self, lines):
+        try:
+            if self._file is None:
+                self._open_next_file()
+            # One gzip member per batch; members are complete and concatenable,
+            # so readers can stream a file while it is still being written
+            self._file.write(gzip.compress(('\n'.join(lines) + '\n').encode('utf-8')))
+            self._file.flush()
+            self.written += len(lines)
+            if self._file.tell() >= self.max_file_bytes:
+                self._close_file()
+        except OSError as e:
+            # Losing a batch of events must never take the app down
+            self.last_error = repr(e)
+            print(f"Event log write failed: {e}")
+
+    def _open_next_file(self):
+        self._file_sequence += 1
+        name = f"events-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._file_sequence:04d}.jsonl.gz"
+        self._path = os.path.join(self.directory, name)
+        self._file = open(self._path, 'ab')
+
+    def _close_file(self):
+        self._file.close()
+        self._file = None
+        self.files_written += 1
+
+    def close(self):
+        """Stop the writer, flush what is left and close the current file."""
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        with self._write_lock:
+            if self._file is not None:
+                self._close_file()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Events recorded, written, dropped and still buffered, files
+                completed and the last write error
+        """
+        return {
+            'recorded': self.recorded,
+            'written': self.written,
+            'dropped': self.dropped,
+            'buffered': len(self._buffer),
+            'files_written': self.files_written,
+            'last_error': self.last_error,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _to_json(value):
+    """Serialise NumPy scalars and arrays, and sets, that end up in event fields."""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return str(value)
+
+
+def read_events(directory, kinds=None):
+    """
+    Stream events from the log files in a directory, oldest first.
+
+    A batch still being written when the file is read is skipped, so the log
+    can be read while the app is running.
+
+    Args:
+        directory (str): Directory of an EventLog
+        kinds (set): Only yield these event kinds (all if None)
+
+    Yields:
+        dict: Event with 'ts', 'kind' and its fields
+    """
+    if not os.path.isdir(directory):
+        return
+    # Names start with the creation time, so sorting them orders the files
+    paths = sorted(name for name in os.listdir(directory) if name.endswith('.jsonl.gz'))
+    for name in paths:
+        try:
+            with gzip.open(os.path.join(directory, name), 'rt', encoding='utf-8') as f:
+                for line in f:
+                    event = json.loads(line)
+                    if kinds is None or event['kind'] in kinds:
+                        yield event
+        except (EOFError, zlib.error, gzip.BadGzipFile, json.JSONDecodeError):
+            # Truncated last batch of a file that is still open
+            continue
@@ -0,0 +1,166 @@
+import numpy as np
+from scipy.sparse import diags
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+from sklearn.utils import murmurhash3_32
+
+
+class HashedFeatureNames:
+    """
+    Feature names for a hashed feature space.
+
+    Buckets are labelled with a representative term from the optional reverse
+    map, or with "#<bucket>" when no term was recorded for them.
+    """
+
+    def __init__(self, n_buckets, reverse_map=None):
+        self.n_buckets = n_buckets
+        self.reverse_map = reverse_map or {}
+
+    def __len__(self):
+        return self.n_buckets
+
+    def __getitem__(self, bucket):
+        bucket = int(bucket)
+        if not 0 <= bucket < self.n_buckets:
+            raise IndexError(bucket)
+        return self.reverse_map.get(bucket, f"#{bucket}")
+
+
+class HashingTfidfVectorizer:
+    """
+    TF-IDF over a hashing-trick feature space, with no vocabulary held in memory.
+
+    Term counts come from a stateless HashingVectorizer, so any shard of the
+    corpus can be counted independently. Shards only exchange their per-bucket
+    document frequencies (a fixed-size array), which are summed to fit the IDF.
+    Buckets outside [min_df, max_df] get an IDF of zero, mirroring the
+    vocabulary pruning of TfidfVectorizer. Rare terms that collide can lift a
+    bucket over min_df, so the bucket space should be well above the number
+    of distinct terms.
+    """
+
+    def __init__(self, n_buckets=2 ** 20, min_df=2, max_df=0.85, keep_reverse_map=True):
+        """
+        Args:
+            n_buckets (int): Size of the hashed feature space
+            min_df (int or float): Minimum document frequency of a bucket
+            max_df (int or float): Maximum document frequency of a bucket
+            keep_reverse_map (bool): Record one term per bucket so explanations stay readable
+        """
+        self.n_buckets = n_buckets
+        self.min_df = min_df
+        self.max_df = max_df
+        self.keep_reverse_map = keep_reverse_map
+        self.hasher = HashingVectorizer(
+            n_features=n_buckets,
+            alternate_sign=False,
+            norm=None,
+            stop_words='english',
+            ngram_range=(1, 2)
+        )
+        self.idf_ = None
+        self.reverse_map = {}
+
+    def count(self, texts):
+        """Raw hashed term counts (stateless, safe to run on any shard in parallel)."""
+        return self.hasher.transform(texts).tocsr()
+
+    def bucket_of(self, term):
+        """Bucket a single analysed term hashes to (same hash as HashingVectorizer)."""
+        return abs(murmurhash3_32(term, seed=0)) % self.n_buckets
+
+    def shard_statistics(self, texts, counts=None):
+        """
+        Compute the statistics one shard contributes to the IDF fit.
+
+        Args:
+            texts (list): Preprocessed documents of the shard
+            counts (scipy.sparse.csr_matrix): Output of count(texts), if already computed
+
+        Returns:
+            dict: 'n_documents', 'document_frequency' (array of n_buckets) and
+                'reverse_map' (bucket -> first term seen, if enabled)
+        """
+        if counts is None:
+            counts = self.count(texts)
+        document_frequency = np.bincount(counts.indices, minlength=self.n_buckets)
+
+        reverse_map = {}
+        if self.keep_reverse_map:
+            analyzer = self.hasher.build_analyzer()
+            terms = set()
+            for text in texts:
+                terms.update(analyzer(text))
+            for term in sorted(terms):
+                reverse_map.setdefault(self.bucket_of(term), term)
+
+        return {
+            'n_documents': counts.shape[0],
+            'document_frequency': document_frequency,
+            'reverse_map': reverse_map,
+        }
+
+    @staticmethod
+    def merge_statistics(statistics):
+        """
+        Merge the statistics of several shards into one.
+
+        Args:
+            statistics (list): Outputs of shard_statistics or merge_statistics
+
+        Returns:
+            dict: Combined statistics, in the same format
+        """
+        reverse_map = {}
+        for stats in statistics:
+            for bucket, term in stats['reverse_map'].items():
+                reverse_map.setdefault(bucket, term)
+
+        return {
+            'n_documents': sum(stats['n_documents'] for stats in statistics),
+            'document_frequency': np.sum([stats['document_frequency'] for stats in statistics], axis=0),
+            'reverse_map': reverse_map,
+        }
+
+    def fit_statistics(self, statistics):
+        """
+        Fit the IDF from the merged statistics of one or more shards.
+
+        Args:
+            statistics (list): Outputs of shard_statistics or merge_statistics
+        """
+        merged = self.merge_statistics(statistics)
+        n_documents = merged['n_documents']
+        document_frequency = merged['document_frequency']
+
+        max_doc_count = self.max_df if isinstance(self.max_df, int) else self.max_df * n_documents
+        min_doc_count = self.min_df if isinstance(self.min_df, int) else self.min_df * n_documents
+        kept = (document_frequency >= min_doc_count) & (document_frequency <= max_doc_count)
+
+        idf = np.log((1 + n_documents) / (1 + document_frequency)) + 1
+        self.idf_ = np.where(kept, idf, 0.0).astype(np.float32)
+
+        self.reverse_map = {bucket: term for bucket, term in merged['reverse_map'].items() if kept[bucket]}
+        return self
+
+    def transform(self, texts):
+        """Hash, reweight by IDF and L2-normalise documents."""
+        if self.idf_ is None:
+            raise ValueError("HashingTfidfVectorizer is not fitted yet")
+        return self.reweight(self.count(texts))
+
+    def reweight(self, counts):
+        """Apply the fitted IDF and L2 normalisation to raw hashed counts."""
+        weighted = counts @ diags(self.idf_)
+        weighted.eliminate_zeros()
+        return normalize(weighted, norm='l2').tocsr()
+
+    def fit_transform(self, texts):
+        texts = list(texts)
+        counts = self.count(texts)
+        self.fit_statistics([self.shard_statistics(texts, counts)])
+        return self.reweight(counts)
+
+    def get_feature_names_out(self):
+        return HashedFeatureNames(self.n_buckets, self.reverse_map)
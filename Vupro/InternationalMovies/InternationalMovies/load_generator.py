@@ -0,0 +1,130 @@
+"""
+Load generator for recommendation_service.py.
+
+Opens `--concurrency` keep-alive connections, each sending similar-movie
+queries back to back for `--duration` seconds, then reports throughput and
+latency percentiles:
+
+    python load_generator.py --url http://127.0.0.1:8000 --concurrency 32 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+
+async def _request(reader, writer, host, path, payload):
+    body = json.dumps(payload).encode('utf-8')
+    writer.write(
+        (f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+         f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n").encode('latin-1') + body
+    )
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        key, _, value = line.decode('latin-1').partition(':')
+        if key.lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def _client(host, port, end_time, make_query, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < end_time:
+            path, payload = make_query()
+            start = time.perf_counter()
+            status = await _request(reader, writer, host, path, payload)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_load(url, concurrency, duration, n_movies, n=10, text_ratio=0.0, seed=0):
+    """
+    Drive the service with concurrent clients.
+
+    Args:
+        url (str): Base URL of the service
+        concurrency (int): Number of concurrent connections
+        duration (float): Test duration in seconds
+        n_movies (int): Movie indices are drawn from [0, n_movies)
+        n (int): Number of recommendations per query
+        text_ratio (float): Fraction of queries sent to the free-text endpoint
+        seed (int): Random seed
+
+    Returns:
+        dict: Request count, QPS, latency percentiles in ms and status code counts
+    """
+    parsed = urlparse(url)
+    host, port = parsed.hostname, parsed.port or 80
+    rng = random.Random(seed)
+    words = ['love', 'war', 'family', 'friends', 'revenge', 'village', 'police', 'college', 'journey']
+
+    def make_query():
+        if rng.random() < text_ratio:
+            return '/recommendations/text', {'text': ' '.join(rng.sample(words, 3)), 'n': n}
+        return '/recommendations/similar', {'movie_idx': rng.randrange(n_movies), 'n': n}
+
+    latencies = []
+    statuses = {}
+    start = time.perf_counter()
+    end_time = start + duration
+    await asyncio.gather(*(_client(host, port, end_time, make_query, latencies, statuses)
+                           for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'qps': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'max_ms': float(latencies_ms.max()),
+        'statuses': statuses,
+    }
+
+
+async def _movie_count(url):
+    parsed = urlparse(url)
+    reader, writer = await asyncio.open_connection(parsed.hostname, parsed.port or 80)
+    writer.write(f"GET /health HTTP/1.1\r\nHost: {parsed.hostname}\r\nConnection: close\r\n\r\n".encode('latin-1'))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return json.loads(response.split(b'\r\n\r\n', 1)[1])['movies']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the recommendation service")
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--n', type=int, default=10)
+    parser.add_argument('--text-ratio', type=float, default=0.0)
+    args = parser.parse_args()
+
+    n_movies = asyncio.run(_movie_count(args.url))
+    report = asyncio.run(run_load(args.url, args.concurrency, args.duration, n_movies,
+                                  n=args.n, text_ratio=args.text_ratio))
+
+    print(f"requests: {report['requests']}  QPS: {report['qps']:.1f}")
+    print(f"latency ms  p50: {report['p50_ms']:.1f}  p95: {report['p95_ms']:.1f}  "
+          f"p99: {report['p99_ms']:.1f}  max: {report['max_ms']:.1f}")
+    print(f"status codes: {report['statuses']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+"""
+MinHash signatures and banded LSH tables over movie sets.
+
+Remakes, dubbed releases and re-listings across the language categories often
+share nearly identical overviews or cast lists. Exact cosine only finds them by
+scoring the whole catalogue. MinHashLSH summarises each movie's set (its
+overview word shingles, or its cast and genres) as a short signature whose
+agreement estimates Jaccard similarity. It splits the signature into bands
+and keeps one sorted table of band keys per band: the movies sharing a band
+with a query are found with one binary search per band instead of a scan.
+
+Signatures are computed from a sparse movie x item membership matrix with
+vectorised NumPy, a chunk of rows at a time.
+"""
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+# Signature value of an empty set; larger than any item hash
+EMPTY = np.uint32(0xFFFFFFFF)
+
+
+def shingle_sets(texts, k=2, n_features=2 ** 24):
+    """
+    Word k-shingle sets of preprocessed texts, as a sparse membership matrix.
+
+    Args:
+        texts (list): Whitespace-tokenised texts (e.g. 'preprocessed_overview')
+        k (int): Words per shingle
+        n_features (int): Size of the hashed shingle space
+
+    Returns:
+        scipy.sparse.csr_matrix: Binary movie x shingle matrix
+    """
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    # Tokens are already cleaned; split on whitespace only, so Indic words stay whole
+    vectorizer = HashingVectorizer(analyzer='word', token_pattern=r'\S+', lowercase=False,
+                                   ngram_range=(k, k), n_features=n_features, binary=True,
+                                   norm=None, alternate_sign=False, dtype=np.float32)
+    return vectorizer.transform(texts)
+
+
+def metadata_sets(engine, kinds=('genre', 'cast')):
+    """
+    Metadata item sets of an engine's movies (e.g. cast and genres).
+
+    Args:
+        engine (RecommendationEngine): Engine whose metadata matrix to use
+        kinds (tuple): Metadata blocks to include ('genre', 'director', 'cast')
+
+    Returns:
+        scipy.sparse.csr_matrix: Binary movie x item matrix
+    """
+    blocks = [block for block, kind in enumerate(engine.metadata_blocks) if kind in kinds]
+    columns = np.flatnonzero(np.isin(engine.metadata_column_blocks, blocks))
+    return csr_matrix(engine.metadata_matrix[:, columns] != 0)
+
+
+class MinHashLSH:
+    """
+    MinHash signature store with banded LSH tables.
+
+    Example:
+        lsh = MinHashLSH().fit(shingle_sets(movies_df['preprocessed_overview']))
+        lsh.query(movie_idx, n=10, min_similarity=0.5)    # [(movie_idx, jaccard), ...]
+        engine.set_near_duplicate_groups(lsh.duplicate_groups(threshold=0.8))
+    """
+
+    def __init__(self, n_hashes=64, bands=16, chunk_nnz=100000, random_state=0):
+        """
+        Args:
+            n_hashes (int): Signature length
+            bands (int): LSH bands; must divide n_hashes. Pairs with Jaccard
+                similarity above about (1 / bands) ** (bands / n_hashes) are
+                likely to share a band
+            chunk_nnz (int): Set items hashed at once; bounds the temporary memory
+                to about chunk_nnz * n_hashes * 4 bytes
+            random_state (int): Seed of the hash functions
+        """
+        if n_hashes % bands:
+            raise ValueError(f"bands ({bands}) must divide n_hashes ({n_hashes})")
+        self.n_hashes = n_hashes
+        self.bands = bands
+        self.rows_per_band = n_hashes // bands
+        self.chunk_nnz = chunk_nnz
+
+        rng = np.random.default_rng(random_state)
+        self._multipliers = (rng.integers(0, 2 ** 32, n_hashes, dtype=np.uint64) | 1).astype(np.uint32)
+        self._offsets = rng.integers(0, 2 ** 32, n_hashes, dtype=np.uint64).astype(np.uint32)
+        self._band_multipliers = rng.integers(0, 2 ** 63, self.rows_per_band, dtype=np.uint64) * 2 + 1
+
+        self.signatures = None
+        self._sorted_keys = None
+        self._order = None
+
+    def signatures_of(self, sets):
+        """
+        MinHash signatures of sets.
+
+        Args:
+            sets (scipy.sparse matrix): Movie x item membership matrix
+
+        Returns:
+            np.ndarray: (movies x n_hashes) uint32 signatures; all EMPTY for empty sets
+        """
+        sets = csr_matrix(sets)
+        n_rows = sets.shape[0]
+        signatures = np.full((n_rows, self.n_hashes), EMPTY, dtype=np.uint32)
+        lengths = np.diff(sets.indptr)
+
+        start = 0
+        while start < n_rows:
+            # Rows start..stop hold about chunk_nnz items
+            stop = max(int(np.searchsorted(sets.indptr, sets.indptr[start] + self.chunk_nnz, side='right')) - 1,
+                       start + 1)
+            first, last = sets.indptr[start], sets.indptr[stop]
+            if last > first:
+                nonempty = start + np.flatnonzero(lengths[start:stop])
+                hashed = self._hash(sets.indices[first:last])
+                signatures[nonempty] = np.minimum.reduceat(hashed, sets.indptr[nonempty] - first, axis=1).T
+            start = stop
+        return signatures
+
+    def _hash(self, items):
+        """n_hashes independent 32-bit hashes of each item id (n_hashes x items)."""
+        # Hashes x items keeps each hash function's values contiguous for reduceat
+        with np.errstate(over='ignore'):
+            hashed = self._multipliers[:, None] * items.astype(np.uint32) + self._offsets[:, None]
+            # Finaliser rounds: every output bit depends on every input bit
+            hashed ^= hashed >> np.uint32(16)
+            hashed *= np.uint32(0x85EBCA6B)
+            hashed ^= hashed >> np.uint32(13)
+        # Keep EMPTY free for empty sets
+        return np.minimum(hashed, EMPTY - np.uint32(1))
+
+    def _band_keys(self, signatures):
+        """One uint64 key per band: a hash of the band's signature values."""
+        banded = signatures.reshape(len(signatures), self.bands, self.rows_per_band).astype(np.uint64)
+        with np.errstate(over='ignore'):
+            return (banded * self._band_multipliers).sum(axis=2, dtype=np.uint64)
+
+    def fit(self, sets):
+        """
+        Compute the signatures of a catalogue and build the band tables.
+
+        Movies with empty sets get no table entries, so they are never candidates.
+
+        Args:
+            sets (scipy.sparse matrix): Movie x item membership matrix, one row per engine row
+
+        Returns:
+            MinHashLSH: self
+        """
+        self.signatures = self.signatures_of(sets)
+        nonempty = np.flatnonzero(self.signatures[:, 0] != EMPTY).astype(np.int32)
+        keys = self._band_keys(self.signatures[nonempty]).T
+
+        # Per band: keys sorted, and the movie of each sorted key
+        self._order = np.empty(keys.shape, dtype=np.int32)
+        self._sorted_keys = np.empty(keys.shape, dtype=np.uint64)
+        for band in range(self.bands):
+            order = np.argsort(keys[band], kind='stable')
+            self._order[band] = nonempty[order]
+            self._sorted_keys[band] = keys[band][order]
+        return self
+
+    def candidates(self, movie_idx, max_bucket=None):
+        """
+        Movies sharing at least one band bucket with a movie.
+
+        Args:
+            movie_idx (int): Row of the movie
+            max_bucket (int): Skip buckets with more movies than this (None for no limit)
+
+        Returns:
+            np.ndarray: Candidate rows, without the movie itself
+        """
+        signature = self.signatures[movie_idx]
+        if signature[0] == EMPTY:
+            return np.empty(0, dtype=np.int32)
+        keys = self._band_keys(signature[None, :])[0]
+
+        found = []
+        for band in range(self.bands):
+            low = np.searchsorted(self._sorted_keys[band], keys[band], side='left')
+            high = np.searchsorted(self._sorted_keys[band], keys[band], side='right')
+            if max_bucket is None or high - low <= max_bucket:
+                found.append(self._order[band, low:high])
+        candidates = np.unique(np.concatenate(found))
+        return candidates[candidates != movie_idx]
+
+    def similarity(self, rows, other_rows):
+        """Estimated Jaccard similarity of row pairs: the fraction of equal signature values."""
+        return (self.signatures[rows] == self.signatures[other_rows]).mean(axis=-1)
+
+    def query(self, movie_idx, n=10, min_similarity=0.0, max_bucket=None):
+        """
+        Most similar movies by estimated Jaccard similarity, among the LSH candidates.
+
+        Args:
+            movie_idx (int): Row of the movie
+            n (int): Number of movies to return
+            min_similarity (float): Smallest estimated Jaccard similarity to return
+            max_bucket (int): Skip buckets with more movies than this (None for no limit)
+
+        Returns:
+            list: List of tuples (movie_idx, estimated_jaccard)
+        """
+        candidates = self.candidates(movie_idx, max_bucket)
+        estimates = self.similarity(candidates, np.full(len(candidates), movie_idx))
+        keep = estimates >= min_similarity
+        candidates, estimates = candidates[keep], estimates[keep]
+        top = np.argsort(-estimates, kind='stable')[:n]
+        return [(int(candidates[i]), float(estimates[i])) for i in top]
+
+    def duplicate_groups(self, threshold=0.8):
+        """
+        Group near-duplicate movies.
+
+        Within each band bucket every movie is compared with the bucket's first
+        movie, and pairs with an estimated Jaccard similarity of at least
+        `threshold` are linked; groups are the connected components.
+
+        Args:
+            threshold (float): Estimated Jaccard similarity that makes a near-duplicate
+
+        Returns:
+            np.ndarray: Group label per movie (equal labels are near-duplicates;
+                movies without near-duplicates have a group of their own)
+        """
+        n_movies = len(self.signatures)
+        sources, targets = [], []
+        for band in range(self.bands):
+            keys = self._sorted_keys[band]
+            if not len(keys):
+                continue
+            starts = np.concatenate(([True], keys[1:] != keys[:-1]))
+            leaders = self._order[band][np.maximum.accumulate(np.where(starts, np.arange(len(keys)), 0))]
+            members = self._order[band]
+            pairs = np.flatnonzero(members != leaders)
+            for chunk in range(0, len(pairs), self.chunk_nnz):
+                chosen = pairs[chunk:chunk + self.chunk_nnz]
+                linked = chosen[self.similarity(members[chosen], leaders[chosen]) >= threshold]
+                sources.append(members[linked])
+                targets.append(leaders[linked])
+
+        sources = np.concatenate(sources) if sources else np.empty(0, dtype=np.int32)
+        targets = np.concatenate(targets) if targets else np.empty(0, dtype=np.int32)
+        graph = coo_matrix((np.ones(len(sources), dtype=np.int8), (sources, targets)), shape=(n_movies, n_movies))
+        _, labels = connected_components(graph, directed=False)
+        return labels.astype(np.int32)
+
+    @property
+    def nbytes(self):
+        """Memory held by the signatures and band tables."""
+        return sum(array.nbytes for array in (self.signatures, self._sorted_keys, self._order)
+                   if array is not None)
@@ -0,0 +1,157 @@
+"""
+Inverted index of where movies can be watched.
+
+Each movie's streaming availability is stored as one compact string,
+"IN:flatrate:Netflix|IN:rent:Apple TV|US:flatrate:Netflix", keeping every
+region and offer type TMDB reports. ProviderIndex turns that column into one
+packed bitset per (region, provider, offer type), so "available on my
+subscriptions in IN" is the OR of a few bitsets: a vectorised mask over the
+whole catalogue instead of a per-movie check.
+"""
+import numpy as np
+
+# TMDB watch/providers offer types; 'flatrate' is a subscription
+OFFER_TYPES = ('flatrate', 'free', 'ads', 'rent', 'buy')
+
+
+def encode_availability(providers_by_region):
+    """
+    Encode TMDB watch/providers results compactly.
+
+    Args:
+        providers_by_region (dict): TMDB 'watch/providers' results, e.g.
+            {'IN': {'flatrate': [{'provider_name': 'Netflix', ...}], 'rent': [...]}}
+
+    Returns:
+        str: 'region:offer:provider' entries joined by '|' (empty if none)
+    """
+    entries = []
+    for region, offers in sorted(providers_by_region.items()):
+        for offer in OFFER_TYPES:
+            for provider in offers.get(offer, []) or []:
+                name = str(provider.get('provider_name', '')).replace('|', '/').strip()
+                if name:
+                    entries.append(f"{region}:{offer}:{name}")
+    return '|'.join(entries)
+
+
+def decode_availability(text):
+    """
+    Decode an encoded availability string.
+
+    Returns:
+        list: (region, offer type, provider) tuples
+    """
+    if not isinstance(text, str) or not text:
+        return []
+    return [tuple(entry.split(':', 2)) for entry in text.split('|') if entry.count(':') >= 2]
+
+
+def _encode_legacy(ott_providers):
+    """Encode an old single-region `ott_providers` dict; its region is unknown ('')."""
+    if not isinstance(ott_providers, dict):
+        return ''
+    return encode_availability({'': {offer: [{'provider_name': provider.get('name', '')} for provider in providers]
+                                     for offer, providers in ott_providers.items() if providers}})
+
+
+class ProviderIndex:
+    """
+    (region, provider, offer type) -> packed bitset of the movies available there.
+
+    Example:
+        index = ProviderIndex.from_movies(movies_df)
+        mask = index.mask(['Netflix', 'Amazon Prime Video'], region='IN')
+    """
+
+    def __init__(self, availability):
+        """
+        Args:
+            availability (iterable): One encoded availability string per movie
+        """
+        # Post raw entry strings; there are far fewer distinct entries than
+        # movies, so each is decoded only once afterwards
+        postings = {}
+        n_movies = 0
+        for movie_idx, text in enumerate(availability):
+            if isinstance(text, str) and text:
+                for entry in text.split('|'):
+                    postings.setdefault(entry, []).append(movie_idx)
+            n_movies = movie_idx + 1
+
+        decoded = sorted((key, entry) for entry in postings for key in decode_availability(entry))
+        self.n_movies = n_movies
+        self.keys = [key for key, _ in decoded]
+        self.bitsets = np.zeros((len(self.keys), (n_movies + 7) // 8), dtype=np.uint8)
+        for row, (_, entry) in enumerate(decoded):
+            bits = np.zeros(n_movies, dtype=bool)
+            bits[postings[entry]] = True
+            self.bitsets[row] = np.packbits(bits)
+        self._index_keys()
+
+    @classmethod
+    def from_movies(cls, movies_df):
+        """
+        Build the index from a movie dataframe.
+
+        Uses the encoded 'availability' column, or falls back to the older
+        single-region 'ott_providers' dicts (indexed under region '').
+
+        Returns:
+            ProviderIndex: The index, or None if the dataframe has no provider data
+        """
+        if 'availability' in movies_df.columns:
+            return cls(movies_df['availability'].to_numpy())
+        if 'ott_providers' in movies_df.columns:
+            return cls(_encode_legacy(value) for value in movies_df['ott_providers'])
+        return None
+
+    @classmethod
+    def from_arrays(cls, bitsets, keys, n_movies):
+        """Wrap existing bitsets (e.g. in shared memory) without copying them."""
+        index = cls.__new__(cls)
+        index.n_movies = n_movies
+        index.keys = [tuple(key) for key in keys]
+        index.bitsets = bitsets
+        index._index_keys()
+        return index
+
+    def _index_keys(self):
+        self._rows = {key: row for row, key in enumerate(self.keys)}
+
+    def regions(self):
+        """Regions with at least one provider ('' is the unknown region of older data)."""
+        return sorted({region for region, _, _ in self.keys})
+
+    def providers(self, region=None, offers=None):
+        """Provider names, optionally only those in a region and offering given types."""
+        return sorted({provider for key_region, offer, provider in self.keys
+                       if (region is None or key_region == region)
+                       and (offers is None or offer in offers)})
+
+    def mask(self, providers, region=None, offers=('flatrate',)):
+        """
+        Find the movies available on any of the given providers.
+
+        Args:
+            providers (list): Provider names (e.g. the user's subscriptions)
+            region (str): Region code such as 'IN' (any region if None)
+            offers (tuple): Offer types that count (default: subscription only;
+                None for any)
+
+        Returns:
+            np.ndarray: Boolean mask with one entry per movie
+        """
+        providers = set(providers)
+        rows = [row for (key_region, offer, provider), row in self._rows.items()
+                if provider in providers
+                and (region is None or key_region == region)
+                and (offers is None or offer in offers)]
+        if not rows:
+            return np.zeros(self.n_movies, dtype=bool)
+        bits = np.bitwise_or.reduce(self.bitsets[rows], axis=0)
+        return np.unpackbits(bits, count=self.n_movies).astype(bool)
+
+    @property
+    def nbytes(self):
+        return self.bitsets.nbytes
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+
+
+def normalize_filters(filters):
+    """
+    Normalise a filter dict so equivalent filters produce the same cache key.
+
+    Empty filters are dropped, year ranges become the [min, max] integer years
+    they admit (release years are whole, so the lower bound is rounded up and
+    the upper bound down) and list filters are de-duplicated and sorted.
+
+    Args:
+        filters (dict): Filters as passed to the engine
+
+    Returns:
+        dict: Canonical filters (empty if nothing is filtered)
+    """
+    normalized = {}
+    for key, value in (filters or {}).items():
+        if value is None or (hasattr(value, '__len__') and len(value) == 0):
+            continue
+        if key == 'year_range':
+            normalized[key] = [math.ceil(value[0]), math.floor(value[1])]
+        elif isinstance(value, (list, tuple, set)):
+            normalized[key] = sorted({str(item) for item in value})
+        else:
+            normalized[key] = value
+    return normalized
+
+
+def make_cache_key(movie_idx, method, weights, n, filters):
+    """
+    Build a canonical hash for a recommendation request.
+
+    Args:
+        movie_idx (int): Index of the target movie
+        method (str): Recommendation method ('plot', 'metadata' or 'hybrid')
+        weights (tuple): Similarity weights (None when the method has none)
+        n (int): Number of recommendations
+        filters (dict): Filters to apply
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    request = {
+        'movie_idx': int(movie_idx),
+        'method': method,
+        'weights': [float(w) for w in weights] if weights is not None else None,
+        'n': int(n),
+        'filters': normalize_filters(filters),
+    }
+    encoded = json.dumps(request, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()
+
+
+class QueryCache:
+    """
+    Bounded LRU cache of recommendation results.
+
+    Entries belong to one engine data version; looking up with a different
+    version clears the cache first, so results computed from old matrices are
+    never returned.
+    """
+
+    def __init__(self, max_entries=1024):
+        """
+        Args:
+            max_entries (int): Maximum number of cached results
+        """
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.data_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def _check_version(self, data_version):
+        if data_version != self.data_version:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.data_version = data_version
+
+    def get(self, key, data_version):
+        """
+        Look up a cached result.
+
+        Returns:
+            list or None: A copy of the cached result, or None on a miss
+        """
+        with self._lock:
+            self._check_version(data_version)
+            result = self.entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return list(result)
+
+    def put(self, key, data_version, result):
+        """Store a result, evicting the least recently used entry if the cache is full."""
+        with self._lock:
+            self._check_version(data_version)
+            self.entries[key] = list(result)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    @property
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """
+        Returns:
+            dict: Entry count, hits, misses, evictions, invalidations and hit ratio
+        """
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_ratio': self.hit_ratio,
+        }
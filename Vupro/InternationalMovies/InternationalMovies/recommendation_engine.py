@@ -1,11 +1,126 @@
+# The query path needs NumPy and SciPy only; pandas is imported by the
+# functions that build an engine from a dataframe
 import numpy as np
-import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
-from scipy.sparse import csr_matrix, hstack
-import heapq
+from scipy.sparse import csr_matrix, diags, hstack
+import copy
+import datetime
+import itertools
+from compact_catalogue import CompactCatalogue, to_compact_csr
+from movie_graph import MovieGraph
+from provider_index import ProviderIndex
+from query_cache import QueryCache, make_cache_key
+
+# Every build of the engine's matrices gets a new, process-wide unique version
+_DATA_VERSIONS = itertools.count(1)
+
+# Default weight of each metadata block in the metadata cosine; blocks of any
+# other kind weigh 1.0
+DEFAULT_METADATA_WEIGHTS = {'genre': 0.45, 'director': 0.35, 'cast': 0.2}
+
+# Release-year kernels: proximity 1 - |year difference| / YEAR_WINDOW (as in
+# utils.calculate_similarity), recency 1 - age / RECENCY_WINDOW, both floored at 0
+YEAR_WINDOW = 20
+RECENCY_WINDOW = 30
+
+# Movie IDs are indexed with a dense id -> row array while the largest ID is at
+# most this many times the number of movies, and binary-searched otherwise
+DENSE_ID_RATIO = 4
+
+def compute_quality_prior(movies_df, stats=None):
+    """
+    Precompute a per-movie popularity/quality prior in [0, 1].
+    
+    The quality part is the Bayesian average of TMDB's vote_average, which pulls
+    movies with few votes towards the catalogue mean, so a single 10/10 vote
+    does not beat a well-reviewed classic. The popularity part is TMDB's
+    popularity on a log scale. Movies without these fields get a neutral prior.
+    
+    Args:
+        movies_df (pd.DataFrame): Movie dataframe, optionally with 'vote_average',
+            'vote_count' and 'popularity'
+        stats (dict): Catalogue statistics from an earlier call, so that part of a
+            catalogue (e.g. one shard) is scored on the same scale as the whole
+            
+    Returns:
+        tuple: (np.ndarray of float32 priors, dict of catalogue statistics:
+            'mean_vote', 'min_votes' and 'max_popularity')
+    """
+    import pandas as pd
+    
+    n_movies = len(movies_df)
+    if 'vote_average' not in movies_df.columns and 'popularity' not in movies_df.columns:
+        return np.zeros(n_movies, dtype=np.float32), stats
+    
+    def column(name):
+        if name not in movies_df.columns:
+            return np.full(n_movies, np.nan)
+        return pd.to_numeric(movies_df[name], errors='coerce').to_numpy(dtype=np.float64)
+    
+    votes = np.nan_to_num(column('vote_count'), nan=0.0)
+    ratings = column('vote_average')
+    popularity = np.log1p(np.nan_to_num(np.clip(column('popularity'), 0, None), nan=0.0))
+    
+    if stats is None:
+        rated = ratings[(votes > 0) & np.isfinite(ratings)]
+        stats = {
+            # C: the mean vote, and m: the votes needed to count as much as the mean
+            'mean_vote': float(rated.mean()) if len(rated) else 5.0,
+            'min_votes': max(float(np.percentile(votes, 60)) if n_movies else 0.0, 1.0),
+            'max_popularity': float(popularity.max(initial=0)),
+        }
+    
+    mean_vote, min_votes = stats['mean_vote'], stats['min_votes']
+    ratings = np.where(np.isnan(ratings), mean_vote, ratings)
+    quality = (votes * ratings + min_votes * mean_vote) / (votes + min_votes) / 10
+    if stats['max_popularity'] > 0:
+        popularity /= stats['max_popularity']
+    
+    prior = 0.7 * quality + 0.3 * popularity
+    return np.clip(prior, 0, 1).astype(np.float32), stats
+
+def movie_ids_of(movies_df):
+    """
+    Stable movie IDs of a dataframe: its 'tmdb_id' column, or None without one.
+    
+    Raises:
+        ValueError: If some movie has no TMDB id
+    """
+    import pandas as pd
+    
+    if 'tmdb_id' not in movies_df.columns:
+        return None
+    movie_ids = pd.to_numeric(movies_df['tmdb_id'], errors='coerce')
+    if movie_ids.isna().any():
+        raise ValueError(f"{int(movie_ids.isna().sum())} movies have no TMDB id")
+    return movie_ids.to_numpy(dtype=np.int64)
+
+def release_years_of(movies_df):
+    """
+    Release year of every movie as int16, 0 where it is missing.
+    
+    Returns:
+        np.ndarray: int16 years (all 0 if the dataframe has no 'release_year' column)
+    """
+    import pandas as pd
+    
+    if 'release_year' not in movies_df.columns:
+        return np.zeros(len(movies_df), dtype=np.int16)
+    return _to_year_array(pd.to_numeric(movies_df['release_year'], errors='coerce').to_numpy(dtype=np.float64))
+
+def _to_year_array(years):
+    """int16 years from floats, with NaN and non-positive values as 0 (missing)."""
+    years = np.asarray(years, dtype=np.float64)
+    known = np.isfinite(years) & (years > 0)
+    return np.where(known, np.rint(years), 0).astype(np.int16)
+
+def _inverse_norms(squared_norms):
+    """1 / L2 norm from squared row norms, 0 for empty rows."""
+    norms = np.sqrt(np.asarray(squared_norms, dtype=np.float64))
+    return np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
 
 class RecommendationEngine:
-    def __init__(self, movies_df, tfidf_matrix, feature_names):
+    def __init__(self, movies_df, tfidf_matrix, feature_names, compact=False, cache_size=0,
+                 quality_prior=None):
         """
         Initialize the recommendation engine with processed data.
         
@@ -13,42 +128,505 @@ class RecommendationEngine:
             movies_df (pd.DataFrame): Processed movie dataframe
             tfidf_matrix (scipy.sparse.csr_matrix): TF-IDF matrix of movie overviews
             feature_names (list): Feature names from the TF-IDF vectorizer
+            compact (bool): Store matrices as float32/int32 and replace `movies_df`
+                with an integer-coded CompactCatalogue to reduce memory
+            cache_size (int): Number of recommendation results to keep in an LRU
+                cache (0 disables caching)
+            quality_prior (np.array): Precomputed per-movie prior (computed from
+                `movies_df` with compute_quality_prior if None)
         """
         self.movies_df = movies_df
         self.tfidf_matrix = tfidf_matrix
         self.feature_names = feature_names
+        self.catalogue = None
+        self.result_cache = QueryCache(cache_size) if cache_size > 0 else None
+        self.collaborative_model = None
+        self.near_duplicate_groups = None
+        self.movie_graph = None
+        
+        # Popularity/quality prior, blended into hybrid scores
+        if quality_prior is None:
+            quality_prior, _ = compute_quality_prior(movies_df)
+        self.quality_prior = np.asarray(quality_prior, dtype=np.float32)
+        
+        # (region, provider, offer type) -> movie bitsets for provider filters
+        self.provider_index = ProviderIndex.from_movies(movies_df)
+        
+        # Stable movie IDs (TMDB ids when the dataframe has them)
+        self._index_movie_ids(movie_ids_of(movies_df))
+        self._index_plot_norms()
+        self._index_release_years(release_years_of(movies_df))
         
         # Pre-compute some metadata matrices for faster recommendations
         self._compute_metadata_similarity()
+        
+        if compact:
+            self._compact()
+    
+    @classmethod
+    def from_components(cls, tfidf_matrix, feature_names, metadata_matrix, catalogue,
+                        metadata_feature_names=None, cache_size=0, quality_prior=None,
+                        metadata_block_norms=None, provider_index=None, movie_ids=None, release_years=None):
+        """
+        Create an engine around already-built matrices and a CompactCatalogue.
+        
+        Nothing is recomputed or copied, so this is how worker processes attach to
+        matrices published in shared memory.
+        
+        Args:
+            tfidf_matrix (scipy.sparse.csr_matrix): TF-IDF matrix of movie overviews
+            feature_names (list): Feature names from the TF-IDF vectorizer
+            metadata_matrix (scipy.sparse.csr_matrix): Unweighted metadata block matrix
+            catalogue (CompactCatalogue): Columnar movie metadata
+            metadata_feature_names (list): (kind, name) label of each metadata column;
+                the kind assigns each column to a metadata block
+            cache_size (int): Size of the result cache (0 disables caching)
+            quality_prior (np.array): Per-movie prior (all zeros if None)
+            metadata_block_norms (np.array): Precomputed per-block squared row norms
+                (computed from `metadata_matrix` if None)
+            provider_index (ProviderIndex): Provider availability index (provider
+                filters are unavailable if None)
+            movie_ids (np.array): Stable ID of each row (the row positions if None)
+            release_years (np.array): int16 release year of each row, 0 where missing
+                (taken from the catalogue if None)
+            
+        Returns:
+            RecommendationEngine: Engine in compact mode
+        """
+        engine = cls.__new__(cls)
+        engine.movies_df = None
+        engine.tfidf_matrix = tfidf_matrix
+        engine.feature_names = feature_names
+        engine.metadata_matrix = metadata_matrix
+        engine.metadata_feature_names = (metadata_feature_names if metadata_feature_names is not None
+                                         else [('feature', str(col)) for col in range(metadata_matrix.shape[1])])
+        engine.catalogue = catalogue
+        engine.result_cache = QueryCache(cache_size) if cache_size > 0 else None
+        engine.collaborative_model = None
+        engine.near_duplicate_groups = None
+        engine.movie_graph = None
+        engine.quality_prior = (quality_prior if quality_prior is not None
+                                else np.zeros(tfidf_matrix.shape[0], dtype=np.float32))
+        engine.provider_index = provider_index
+        engine._index_movie_ids(movie_ids)
+        engine._index_plot_norms()
+        engine._index_release_years(release_years if release_years is not None
+                                    else _to_year_array(catalogue.release_year))
+        engine._index_metadata_blocks(metadata_block_norms)
+        engine.data_version = next(_DATA_VERSIONS)
+        return engine
+    
+    @classmethod
+    def metadata_only(cls, movies_df, compact=False, cache_size=0):
+        """
+        Create an engine from metadata alone, without TF-IDF plot features.
+        
+        Only 'metadata' recommendations are meaningful until with_plot_features
+        is called. Building it skips plot text preprocessing and vectorisation,
+        so it is ready long before the full engine.
+        
+        Args:
+            movies_df (pd.DataFrame): Movie dataframe from preprocess_data
+                (include_text may be False)
+            compact (bool): Use the memory-compact representation
+            cache_size (int): Size of the result cache (0 disables caching)
+        """
+        return cls(movies_df, csr_matrix((len(movies_df), 0)), [], compact=compact, cache_size=cache_size)
+    
+    @property
+    def has_plot_features(self):
+        """Whether plot-based ('plot' and 'hybrid') recommendations are available."""
+        return self.tfidf_matrix.shape[1] > 0
+    
+    def with_plot_features(self, tfidf_matrix, feature_names):
+        """
+        Get an engine that adds TF-IDF plot features to this one.
+        
+        Metadata matrices, catalogue and prior are shared with this engine rather
+        than rebuilt. This engine is left unchanged, so queries already running
+        on it are not affected.
+        
+        Args:
+            tfidf_matrix (scipy.sparse.csr_matrix): TF-IDF matrix of movie overviews,
+                with rows in this engine's order
+            feature_names (list): Feature names from the TF-IDF vectorizer
+            
+        Returns:
+            RecommendationEngine: Engine with all recommendation methods available
+        """
+        engine = copy.copy(self)
+        engine.tfidf_matrix = to_compact_csr(tfidf_matrix) if self.catalogue is not None else tfidf_matrix
+        engine.feature_names = feature_names
+        engine._index_plot_norms()
+        engine.result_cache = QueryCache(self.result_cache.max_entries) if self.result_cache is not None else None
+        engine.data_version = next(_DATA_VERSIONS)
+        return engine
+    
+    def set_collaborative_model(self, model):
+        """
+        Attach a trained collaborative filtering model for hybrid recommendations.
+        
+        Cached results are invalidated, since hybrid scores change.
+        
+        Args:
+            model (ImplicitALS): Model whose movie factors follow this engine's rows
+                (None detaches the current model)
+        """
+        if model is not None and model.item_factors.shape[0] != self.tfidf_matrix.shape[0]:
+            raise ValueError(f"Model has {model.item_factors.shape[0]} movies, "
+                             f"the engine has {self.tfidf_matrix.shape[0]}")
+        self.collaborative_model = model
+        self.data_version = next(_DATA_VERSIONS)
+    
+    def set_near_duplicate_groups(self, groups):
+        """
+        Attach near-duplicate groups (e.g. from MinHashLSH.duplicate_groups).
+        
+        With the filter 'collapse_duplicates', results then keep only the best
+        movie of each group and skip the target movie's own group, so remakes,
+        dubbed releases and re-listings take one result slot. Cached results
+        are invalidated.
+        
+        Args:
+            groups (np.array): Group label of each row (None detaches the groups)
+        """
+        if groups is not None and len(groups) != self.tfidf_matrix.shape[0]:
+            raise ValueError(f"Got {len(groups)} group labels for {self.tfidf_matrix.shape[0]} movies")
+        self.near_duplicate_groups = None if groups is None else np.asarray(groups)
+        self.data_version = next(_DATA_VERSIONS)
+    
+    def _collapse_duplicates(self, indices, movie_idx):
+        """Keep the first movie of each near-duplicate group, outside the target's group."""
+        groups = self.near_duplicate_groups[indices]
+        _, first = np.unique(groups, return_index=True)
+        keep = np.sort(first)
+        if movie_idx >= 0:
+            keep = keep[groups[keep] != self.near_duplicate_groups[movie_idx]]
+        return indices[keep]
+    
+    def _collaborative_similarities(self, movie_indices):
+        """Item-item similarities from the collaborative model."""
+        if self.collaborative_model is None:
+            raise ValueError("A collaborative weight needs a model; call set_collaborative_model first")
+        return self.collaborative_model.similarities(movie_indices)
+    
+    def _compact(self):
+        """Switch to the memory-compact representation."""
+        self.tfidf_matrix = to_compact_csr(self.tfidf_matrix)
+        self.metadata_matrix = to_compact_csr(self.metadata_matrix)
+        self.catalogue = CompactCatalogue(self.movies_df)
+        
+        # The catalogue replaces the dataframe and its per-row Python objects
+        self.movies_df = None
+        self.data_version = next(_DATA_VERSIONS)
+    
+    def _index_movie_ids(self, movie_ids):
+        """
+        Index the stable ID of every row.
+        
+        Args:
+            movie_ids (np.array): Non-negative integer ID of each row (the row
+                positions if None, which are only stable within this build;
+                `has_stable_ids` tells the two apart)
+        """
+        n_movies = self.tfidf_matrix.shape[0]
+        self.has_stable_ids = movie_ids is not None
+        movie_ids = np.arange(n_movies) if movie_ids is None else np.asarray(movie_ids, dtype=np.int64)
+        if len(movie_ids) != n_movies:
+            raise ValueError(f"Got {len(movie_ids)} movie IDs for {n_movies} movies")
+        if n_movies and movie_ids.min() < 0:
+            raise ValueError("Movie IDs must be non-negative")
+        
+        max_id = int(movie_ids.max(initial=-1))
+        if max_id + 1 <= DENSE_ID_RATIO * n_movies:
+            # id -> row as a dense array: a whole TMDB catalogue is compact enough
+            # that a lookup is one array index, with no hashing
+            row_of_id = np.full(max_id + 1, -1, dtype=np.int32)
+            row_of_id[movie_ids] = np.arange(n_movies, dtype=np.int32)
+            unique = np.count_nonzero(row_of_id >= 0) == n_movies
+            self._sorted_ids = self._sorted_rows = None
+        else:
+            # Sparse IDs (a shard, a regional subset): a dense array would be mostly
+            # empty, so binary-search the sorted IDs instead
+            row_of_id = None
+            self._sorted_rows = np.argsort(movie_ids, kind='stable').astype(np.int32)
+            self._sorted_ids = movie_ids[self._sorted_rows]
+            unique = not (np.diff(self._sorted_ids) == 0).any()
+        if not unique:
+            raise ValueError("Movie IDs must be unique; deduplicate the catalogue first")
+        self.movie_ids = movie_ids
+        self._row_of_id = row_of_id
+    
+    def _lookup_rows(self, movie_ids):
+        """Row index of each movie ID, -1 where unknown."""
+        if self._row_of_id is not None:
+            known = (movie_ids >= 0) & (movie_ids < len(self._row_of_id))
+            rows = np.full(movie_ids.shape, -1, dtype=np.int32)
+            rows[known] = self._row_of_id[movie_ids[known]]
+            return rows
+        positions = np.minimum(np.searchsorted(self._sorted_ids, movie_ids), len(self._sorted_ids) - 1)
+        return np.where(self._sorted_ids[positions] == movie_ids, self._sorted_rows[positions], -1).astype(np.int32)
+    
+    def rows_of(self, movie_ids):
+        """
+        Map stable movie IDs to row indices.
+        
+        Args:
+            movie_ids (array-like): Movie IDs
+            
+        Returns:
+            np.array: Row index of each movie
+        """
+        movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        rows = self._lookup_rows(movie_ids)
+        if (rows < 0).any():
+            raise KeyError(f"Unknown movie ID {movie_ids[rows < 0][0]}")
+        return rows
+    
+    def row_of(self, movie_id):
+        """Row index of a stable movie ID (KeyError if unknown)."""
+        movie_id = int(movie_id)
+        if self._row_of_id is not None:
+            row = self._row_of_id[movie_id] if 0 <= movie_id < len(self._row_of_id) else -1
+        else:
+            row = self._lookup_rows(np.array([movie_id]))[0]
+        if row < 0:
+            raise KeyError(f"Unknown movie ID {movie_id}")
+        return int(row)
+    
+    def get_movie_by_id(self, movie_id):
+        """Get all fields of a movie by its stable ID."""
+        return self.get_movie(self.row_of(movie_id))
+    
+    def get_recommendations_by_id(self, movie_id, n=5, method='hybrid', filters=None, **options):
+        """
+        Get recommendations for a movie, identified by stable IDs on both ends.
+        
+        Args:
+            movie_id (int): Stable ID of the target movie
+            n (int): Number of recommendations to return
+            method (str): 'plot', 'metadata', 'hybrid' or 'graph'
+            filters (dict): Filters to apply to recommendations
+            **options: Further arguments of get_hybrid_recommendations,
+                get_content_based_recommendations or get_graph_recommendations
+                (e.g. weights, metadata_weights, damping)
+            
+        Returns:
+            list: List of tuples (movie_id, similarity_score)
+        """
+        movie_idx = self.row_of(movie_id)
+        if method == 'hybrid':
+            recommendations = self.get_hybrid_recommendations(movie_idx, n=n, filters=filters, **options)
+        elif method == 'graph':
+            recommendations = self.get_graph_recommendations(movie_idx, n=n, filters=filters, **options)
+        else:
+            recommendations = self.get_content_based_recommendations(movie_idx, n=n, content_type=method,
+                                                                     filters=filters, **options)
+        return [(int(self.movie_ids[idx]), score) for idx, score in recommendations]
+    
+    def get_movie(self, movie_idx):
+        """
+        Get all fields of a movie, regardless of the storage mode.
+        
+        Args:
+            movie_idx (int): Index of the movie
+            
+        Returns:
+            dict or pd.Series: Movie fields
+        """
+        if self.catalogue is not None:
+            return self.catalogue.get_movie(movie_idx)
+        return self.movies_df.iloc[movie_idx]
+    
+    def _index_plot_norms(self):
+        """Cache the inverse L2 norm of every TF-IDF row for plot cosines."""
+        squared_norms = np.asarray(self.tfidf_matrix.multiply(self.tfidf_matrix).sum(axis=1)).ravel()
+        self.tfidf_inverse_norms = _inverse_norms(squared_norms)
+    
+    def plot_similarities(self, query_rows, query_inverse_norms=None):
+        """
+        Cosine similarity of TF-IDF rows to every movie's plot features.
+        
+        A sparse dot product scaled by cached inverse row norms, rather than
+        normalising copies of both matrices on every query.
+        
+        Args:
+            query_rows (scipy.sparse matrix): Query rows in the TF-IDF feature space
+            query_inverse_norms (np.array): Inverse L2 norms of the query rows
+                (computed if None)
+            
+        Returns:
+            np.array: (queries x movies) similarities
+        """
+        query_rows = csr_matrix(query_rows)
+        if query_inverse_norms is None:
+            query_inverse_norms = _inverse_norms(query_rows.multiply(query_rows).sum(axis=1))
+        similarities = (query_rows @ self.tfidf_matrix.T).toarray()
+        similarities *= np.asarray(query_inverse_norms).reshape(-1, 1)
+        similarities *= self.tfidf_inverse_norms
+        return similarities
+    
+    def _plot_similarities(self, movie_indices):
+        """Plot cosine similarities of the given movies to every movie."""
+        return self.plot_similarities(self.tfidf_matrix[movie_indices], self.tfidf_inverse_norms[movie_indices])
+    
+    def _index_release_years(self, release_years):
+        """
+        Index the release years for year-proximity and recency scoring.
+        
+        Each movie gets a slot: its year's offset from the earliest year, or
+        one extra slot for a missing year. Scoring then builds a small table
+        of kernel values per year and gathers it with the slots, so missing
+        years score 0 without a separate masking pass.
+        
+        Args:
+            release_years (np.array): int16 year of each row, 0 where missing
+        """
+        self.release_years = np.asarray(release_years, dtype=np.int16)
+        self.release_year_known = self.release_years > 0
+        known_years = self.release_years[self.release_year_known]
+        self.first_year = int(known_years.min()) if len(known_years) else 0
+        n_years = int(known_years.max()) - self.first_year + 1 if len(known_years) else 0
+        self._year_slots = np.where(self.release_year_known, self.release_years - self.first_year,
+                                    n_years).astype(np.int16)
+        self._table_years = np.arange(self.first_year, self.first_year + n_years, dtype=np.float32)
+        # Recency is measured from the year the engine was built
+        self.reference_year = datetime.date.today().year
+    
+    def year_scores(self, target_years, year_weight=0.0, recency_weight=0.0):
+        """
+        Weighted release-year proximity plus recency of every movie, per query.
+        
+        Args:
+            target_years (np.array): Release year of each query movie, 0 where missing
+                (proximity is then 0 for every movie)
+            year_weight (float): Weight of the proximity 1 - |year difference| / YEAR_WINDOW
+            recency_weight (float): Weight of the recency 1 - age / RECENCY_WINDOW
+            
+        Returns:
+            np.array: (queries x movies) float32 scores; 0 for movies without a year
+        """
+        target_years = np.asarray(target_years, dtype=np.float32).reshape(-1, 1)
+        # One row per query over the catalogue's years, plus a 0 for missing years
+        tables = np.zeros((len(target_years), len(self._table_years) + 1), dtype=np.float32)
+        if year_weight:
+            proximity = np.maximum(1 - np.abs(self._table_years - target_years) / YEAR_WINDOW, 0)
+            tables[:, :-1] += year_weight * np.where(target_years > 0, proximity, 0)
+        if recency_weight:
+            tables[:, :-1] += recency_weight * np.maximum(
+                1 - (self.reference_year - self._table_years) / RECENCY_WINDOW, 0)
+        return np.take(tables, self._year_slots, axis=1)
+    
+    def _year_scores(self, movie_indices, year_weight, recency_weight):
+        """Weighted year-proximity and recency scores of the given movies against every movie."""
+        return self.year_scores(self.release_years[movie_indices], year_weight, recency_weight)
     
     def _compute_metadata_similarity(self):
         """Compute metadata similarity matrix based on genres, director, and cast."""
         # Genre similarity matrix (one-hot encoded)
-        genre_matrix = self._create_genre_matrix()
+        genre_matrix, genre_names = self._create_genre_matrix()
         
         # Director one-hot encoding
-        director_matrix = self._create_director_matrix()
+        director_matrix, director_names = self._create_director_matrix()
         
         # Cast similarity matrix
-        cast_matrix = self._create_cast_matrix()
+        cast_matrix, cast_names = self._create_cast_matrix()
         
-        # Combine all features with different weights
-        # Weights: genres (0.45), director (0.35), cast (0.20)
+        # Keep the blocks unweighted side by side; block weights (by default
+        # genres 0.45, director 0.35, cast 0.20) are applied at scoring time
         if genre_matrix is not None and director_matrix is not None and cast_matrix is not None:
-            self.metadata_matrix = hstack([
-                genre_matrix * 0.45,
-                director_matrix * 0.35,
-                cast_matrix * 0.2
-            ])
+            self.metadata_matrix = hstack([genre_matrix, director_matrix, cast_matrix], format='csr')
+            self.metadata_feature_names = (
+                [('genre', name) for name in genre_names]
+                + [('director', name) for name in director_names]
+                + [('cast', name) for name in cast_names]
+            )
         elif genre_matrix is not None:
             # Fallback if only genres are available
             self.metadata_matrix = genre_matrix
+            self.metadata_feature_names = [('genre', name) for name in genre_names]
         else:
             # Last resort - use a dummy matrix if no metadata is available
             self.metadata_matrix = csr_matrix((len(self.movies_df), 1))
+            self.metadata_feature_names = [('none', '')]
+        
+        self._index_metadata_blocks()
+        
+        # Invalidates cached results computed from the previous matrices
+        self.data_version = next(_DATA_VERSIONS)
+    
+    def _index_metadata_blocks(self, block_norms=None):
+        """
+        Group the metadata columns into blocks by kind and precompute per-block row norms.
+        
+        The weighted metadata cosine of two movies only needs, per block, the dot
+        product of their rows and each row's squared norm, so any block weights
+        can be applied at query time without touching the matrix.
+        """
+        kinds = [kind for kind, _ in self.metadata_feature_names]
+        self.metadata_blocks = tuple(dict.fromkeys(kinds))
+        block_of_kind = {kind: block for block, kind in enumerate(self.metadata_blocks)}
+        self.metadata_column_blocks = np.array([block_of_kind[kind] for kind in kinds], dtype=np.int32)
+        
+        if block_norms is None:
+            membership = csr_matrix(
+                (np.ones(len(kinds)), (np.arange(len(kinds)), self.metadata_column_blocks)),
+                shape=(len(kinds), len(self.metadata_blocks))
+            )
+            squared = self.metadata_matrix.multiply(self.metadata_matrix).tocsr()
+            block_norms = (squared @ membership).toarray().astype(np.float32)
+        self.metadata_block_norms = block_norms
+    
+    def _metadata_block_weights(self, metadata_weights):
+        """
+        Resolve per-request metadata weights to one weight per block.
+        
+        Args:
+            metadata_weights (dict or tuple): {kind: weight} overriding the defaults,
+                or one weight per block in `metadata_blocks` order (None for defaults)
+        """
+        if metadata_weights is not None and not isinstance(metadata_weights, dict):
+            if len(metadata_weights) != len(self.metadata_blocks):
+                raise ValueError(f"Expected {len(self.metadata_blocks)} metadata weights "
+                                 f"for blocks {self.metadata_blocks}")
+            return np.asarray(metadata_weights, dtype=np.float64)
+        
+        weights = dict(DEFAULT_METADATA_WEIGHTS, **(metadata_weights or {}))
+        return np.array([weights.get(kind, 1.0) for kind in self.metadata_blocks])
+    
+    def metadata_similarities(self, query_rows, query_block_norms, metadata_weights=None):
+        """
+        Weighted metadata cosine of query rows against every movie.
+        
+        Equivalent to the cosine over [w_genre * genres, w_director * director,
+        w_cast * cast], computed with one sparse product and the precomputed
+        per-block norms.
+        
+        Args:
+            query_rows (scipy.sparse.csr_matrix): Query rows in the metadata column space
+            query_block_norms (np.array): Their per-block squared norms
+            metadata_weights (dict or tuple): Block weights (see _metadata_block_weights)
+            
+        Returns:
+            np.array: (queries x movies) similarities
+        """
+        squared_weights = self._metadata_block_weights(metadata_weights) ** 2
+        
+        scaled_queries = query_rows @ diags(squared_weights[self.metadata_column_blocks])
+        numerators = (scaled_queries @ self.metadata_matrix.T).toarray()
+        
+        denominators = np.outer(np.sqrt(query_block_norms @ squared_weights),
+                                np.sqrt(self.metadata_block_norms @ squared_weights))
+        return np.divide(numerators, denominators, out=np.zeros_like(numerators, dtype=np.float64),
+                         where=denominators > 0)
+    
+    def _metadata_similarities(self, movie_indices, metadata_weights):
+        """Weighted metadata cosine of the given movies against every movie."""
+        return self.metadata_similarities(self.metadata_matrix[movie_indices],
+                                          self.metadata_block_norms[movie_indices], metadata_weights)
     
     def _create_genre_matrix(self):
-        """Create one-hot encoded matrix for genres."""
+        """Create one-hot encoded matrix for genres, returned with its column names."""
         # Get all unique genres
         all_genres = set()
         for genres in self.movies_df['genres']:
@@ -56,47 +634,51 @@ class RecommendationEngine:
                 all_genres.update(genres)
         
         if not all_genres:
-            return None
+            return None, []
             
-        # Create genre matrix
-        genre_matrix = np.zeros((len(self.movies_df), len(all_genres)))
-        genre_list = sorted(list(all_genres))
+        # Map each genre to its column
+        genre_columns = {genre: col for col, genre in enumerate(sorted(all_genres))}
         
-        # Fill the matrix
-        for i, movie_genres in enumerate(self.movies_df['genres']):
+        # Fill the matrix row by row
+        rows = []
+        for movie_genres in self.movies_df['genres']:
             if isinstance(movie_genres, list):
-                for genre in movie_genres:
-                    if genre in genre_list:
-                        genre_matrix[i, genre_list.index(genre)] = 1
+                rows.append({genre_columns[genre]: 1.0 for genre in movie_genres})
+            else:
+                rows.append({})
         
-        return csr_matrix(genre_matrix)
+        return self._rows_to_csr(rows, len(genre_columns)), list(genre_columns)
     
     def _create_director_matrix(self):
-        """Create one-hot encoded matrix for directors."""
+        """Create one-hot encoded matrix for directors, returned with its column names."""
+        import pandas as pd
+        
         if 'director' not in self.movies_df.columns:
-            return None
+            return None, []
             
         # Get all unique directors
         directors = self.movies_df['director'].dropna().unique()
         
         if len(directors) == 0:
-            return None
+            return None, []
             
-        # Create director matrix
-        director_matrix = np.zeros((len(self.movies_df), len(directors)))
-        director_list = sorted(list(directors))
+        # Map each director to its column
+        director_columns = {director: col for col, director in enumerate(sorted(directors))}
         
-        # Fill the matrix
-        for i, director in enumerate(self.movies_df['director']):
-            if pd.notna(director) and director in director_list:
-                director_matrix[i, director_list.index(director)] = 1
+        # Fill the matrix row by row
+        rows = []
+        for director in self.movies_df['director']:
+            if pd.notna(director) and director in director_columns:
+                rows.append({director_columns[director]: 1.0})
+            else:
+                rows.append({})
         
-        return csr_matrix(director_matrix)
+        return self._rows_to_csr(rows, len(director_columns)), list(director_columns)
     
     def _create_cast_matrix(self):
-        """Create weighted matrix for cast members."""
+        """Create weighted matrix for cast members, returned with its column names."""
         if 'cast' not in self.movies_df.columns:
-            return None
+            return None, []
             
         # Get all unique cast members
         all_cast = set()
@@ -105,26 +687,41 @@ class RecommendationEngine:
                 all_cast.update(cast)
         
         if not all_cast:
-            return None
+            return None, []
             
         # Create cast matrix with position-based weighting
         # First position gets higher weight
-        cast_matrix = np.zeros((len(self.movies_df), len(all_cast)))
-        cast_list = sorted(list(all_cast))
+        cast_columns = {actor: col for col, actor in enumerate(sorted(all_cast))}
         
         # Fill the matrix with weighted values
-        for i, movie_cast in enumerate(self.movies_df['cast']):
+        rows = []
+        for movie_cast in self.movies_df['cast']:
+            row = {}
             if isinstance(movie_cast, list):
                 for j, actor in enumerate(movie_cast):
-                    if actor in cast_list:
-                        # Weight decreases with position - first actor gets weight 1.0, 
-                        # subsequent actors get less weight
-                        weight = 1.0 / (j + 1) if j < 3 else 0.2
-                        cast_matrix[i, cast_list.index(actor)] = weight
+                    # Weight decreases with position - first actor gets weight 1.0, 
+                    # subsequent actors get less weight
+                    row[cast_columns[actor]] = 1.0 / (j + 1) if j < 3 else 0.2
+            rows.append(row)
+        
+        return self._rows_to_csr(rows, len(cast_columns)), list(cast_columns)
+    
+    def _rows_to_csr(self, rows, n_columns):
+        """
+        Build a CSR matrix from per-row {column: value} dicts.
         
-        return csr_matrix(cast_matrix)
+        Building the sparse arrays directly avoids allocating a dense
+        (movies x vocabulary) array, which does not fit in memory for large catalogues.
+        """
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(row) for row in rows])
+        indices = np.fromiter((col for row in rows for col in sorted(row)), dtype=np.int64, count=indptr[-1])
+        data = np.fromiter((row[col] for row in rows for col in sorted(row)), dtype=np.float64, count=indptr[-1])
+        
+        return csr_matrix((data, indices, indptr), shape=(len(rows), n_columns))
     
-    def get_content_based_recommendations(self, movie_idx, n=5, content_type='plot', filters=None):
+    def get_content_based_recommendations(self, movie_idx, n=5, content_type='plot', filters=None,
+                                          metadata_weights=None):
         """
         Get content-based recommendations for a movie.
         
@@ -133,83 +730,317 @@ class RecommendationEngine:
             n (int): Number of recommendations to return
             content_type (str): Type of content to use ('plot' or 'metadata')
             filters (dict): Filters to apply to recommendations
+            metadata_weights (dict or tuple): Genre/director/cast block weights
+                ('metadata' only; None for the defaults)
             
         Returns:
             list: List of tuples (movie_idx, similarity_score)
         """
-        # Choose the appropriate matrix based on content type
+        method = 'plot' if content_type == 'plot' else 'metadata'
+        key_weights = self._cache_weights(method, metadata_weights=metadata_weights)
+        return self._cached_query(movie_idx, method, key_weights, n, filters,
+                                  lambda: self._content_based_recommendations(movie_idx, n, content_type, filters,
+                                                                              metadata_weights))
+    
+    def _content_based_recommendations(self, movie_idx, n, content_type, filters, metadata_weights=None):
+        """Uncached implementation of get_content_based_recommendations."""
+        # Compute similarity between the target movie and all other movies
         if content_type == 'plot':
-            similarity_matrix = self.tfidf_matrix
+            similarities = self._plot_similarities([movie_idx]).ravel()
         else:  # metadata
-            similarity_matrix = self.metadata_matrix
+            similarities = self._metadata_similarities([movie_idx], metadata_weights).ravel()
         
-        # Compute similarity between the target movie and all other movies
-        movie_vector = similarity_matrix[movie_idx]
-        similarities = cosine_similarity(movie_vector, similarity_matrix).flatten()
-        
-        # Get indices of movies sorted by similarity (excluding the target movie)
-        similar_indices = similarities.argsort()[::-1]
-        similar_indices = similar_indices[similar_indices != movie_idx]
-        
-        # Apply filters if provided
-        if filters:
-            similar_indices = self._apply_filters(similar_indices, filters)
-        
-        # Get top N recommendations with their similarity scores
-        top_n = [(idx, similarities[idx]) for idx in similar_indices[:n]]
-        
-        return top_n
+        return self._rank_similarities(similarities, movie_idx, n, filters)
     
-    def get_hybrid_recommendations(self, movie_idx, n=5, weights=(0.6, 0.4), filters=None):
+    def get_hybrid_recommendations(self, movie_idx, n=5, weights=(0.6, 0.4), filters=None, prior_weight=0.1,
+                                   metadata_weights=None, year_weight=0.0, recency_weight=0.0):
         """
         Get hybrid recommendations combining plot-based and metadata-based similarity.
         
         Args:
             movie_idx (int): Index of the target movie
             n (int): Number of recommendations to return
-            weights (tuple): Weights for plot and metadata similarities
+            weights (tuple): Weights for plot and metadata similarities, plus
+                optionally one for collaborative filtering similarity
             filters (dict): Filters to apply to recommendations
+            prior_weight (float): Weight of the precomputed popularity/quality prior
+            metadata_weights (dict or tuple): Genre/director/cast block weights inside
+                the metadata similarity (None for the defaults)
+            year_weight (float): Weight of release-year proximity to the target movie
+            recency_weight (float): Weight of a boost for recent releases
             
         Returns:
             list: List of tuples (movie_idx, similarity_score)
         """
-        plot_weight, metadata_weight = weights
+        key_weights = self._cache_weights('hybrid', weights, prior_weight, metadata_weights, year_weight,
+                                          recency_weight)
+        return self._cached_query(movie_idx, 'hybrid', key_weights, n, filters,
+                                  lambda: self._hybrid_recommendations(movie_idx, n, weights, filters, prior_weight,
+                                                                       metadata_weights, year_weight, recency_weight))
+    
+    def _hybrid_recommendations(self, movie_idx, n, weights, filters, prior_weight, metadata_weights=None,
+                                year_weight=0.0, recency_weight=0.0):
+        """Uncached implementation of get_hybrid_recommendations."""
+        plot_weight, metadata_weight = weights[:2]
         
         # Get plot-based similarity
-        movie_vector_plot = self.tfidf_matrix[movie_idx]
-        plot_similarities = cosine_similarity(movie_vector_plot, self.tfidf_matrix).flatten()
+        plot_similarities = self._plot_similarities([movie_idx]).ravel()
         
         # Get metadata-based similarity
-        movie_vector_metadata = self.metadata_matrix[movie_idx]
-        metadata_similarities = cosine_similarity(movie_vector_metadata, self.metadata_matrix).flatten()
+        metadata_similarities = self._metadata_similarities([movie_idx], metadata_weights).ravel()
         
-        # Combine similarities with weights
+        # Combine similarities and the prior with weights
         combined_similarities = (plot_weight * plot_similarities) + (metadata_weight * metadata_similarities)
+        if len(weights) > 2 and weights[2]:
+            combined_similarities += weights[2] * self._collaborative_similarities([movie_idx]).ravel()
+        if prior_weight:
+            combined_similarities += prior_weight * self.quality_prior
+        if year_weight or recency_weight:
+            combined_similarities += self._year_scores([movie_idx], year_weight, recency_weight).ravel()
+        
+        return self._rank_similarities(combined_similarities, movie_idx, n, filters)
+    
+    def _movie_graph(self):
+        """The movie - people - genre graph, built from the metadata matrix on first use."""
+        if self.movie_graph is None:
+            # Edges weigh their metadata block's default weight
+            column_weights = self._metadata_block_weights(None)[self.metadata_column_blocks]
+            self.movie_graph = MovieGraph(self.metadata_matrix, column_weights)
+        return self.movie_graph
+    
+    def get_graph_recommendations(self, movie_idx, n=5, filters=None, damping=0.85, epsilon=1e-4, exact=False):
+        """
+        Get recommendations by personalized PageRank over the movie - people - genre graph.
+        
+        Unlike the metadata similarity, this reaches movies that share no
+        director, cast member or genre with the target but are connected
+        through them, e.g. the other films of a frequent collaborator.
+        
+        Args:
+            movie_idx (int): Index of the target movie
+            n (int): Number of recommendations to return
+            filters (dict): Filters to apply to recommendations
+            damping (float): Probability of continuing the random walk at each step;
+                lower keeps the results closer to the target movie
+            epsilon (float): Tolerance of the local push approximation; smaller is
+                more accurate and slower
+            exact (bool): Run power iteration over the whole graph instead of the
+                local push, whose cost does not grow with the catalogue
+            
+        Returns:
+            list: List of tuples (movie_idx, visit_probability)
+        """
+        return self._cached_query(movie_idx, 'graph', (damping, epsilon, exact), n, filters,
+                                  lambda: self._graph_recommendations(movie_idx, n, filters, damping, epsilon, exact))
+    
+    def _graph_recommendations(self, movie_idx, n, filters, damping, epsilon, exact):
+        """Uncached implementation of get_graph_recommendations."""
+        graph = self._movie_graph()
+        if exact:
+            return self._rank_similarities(graph.pagerank([movie_idx], damping)[0], movie_idx, n, filters)
+        
+        # Rank only the movies the push reached
+        rows, scores = graph.push(movie_idx, damping, epsilon)
+        ranked = rows[np.argsort(-scores, kind='stable')]
+        ranked = self._filter_ranked(ranked[ranked != movie_idx], movie_idx, filters)[:n]
+        return [(idx, scores[np.searchsorted(rows, idx)]) for idx in ranked]
+    
+    def _cache_weights(self, method, weights=None, prior_weight=0.0, metadata_weights=None, year_weight=0.0,
+                       recency_weight=0.0):
+        """Every scoring parameter of a 'plot', 'metadata' or 'hybrid' query, as part of its cache key."""
+        if method == 'plot':
+            return None
+        block_weights = tuple(self._metadata_block_weights(metadata_weights))
+        if method == 'metadata':
+            return block_weights
+        return tuple(weights) + (prior_weight,) + block_weights + (year_weight, recency_weight)
+    
+    def _cached_query(self, movie_idx, method, weights, n, filters, compute):
+        """Serve a query from the result cache, computing and storing it on a miss."""
+        if self.result_cache is None:
+            return compute()
+        
+        key = make_cache_key(movie_idx, method, weights, n, filters)
+        result = self.result_cache.get(key, self.data_version)
+        if result is None:
+            result = compute()
+            self.result_cache.put(key, self.data_version, result)
+        return result
+    
+    def cache_stats(self):
+        """
+        Get result cache statistics.
         
-        # Get indices of movies sorted by combined similarity (excluding the target movie)
-        similar_indices = combined_similarities.argsort()[::-1]
+        Returns:
+            dict: Hits, misses, evictions, invalidations and hit ratio (empty if caching is off)
+        """
+        return self.result_cache.stats() if self.result_cache is not None else {}
+    
+    def get_batch_recommendations(self, movie_indices, n=5, method='hybrid', weights=(0.6, 0.4), filters=None,
+                                  prior_weight=0.1, metadata_weights=None, year_weight=0.0, recency_weight=0.0):
+        """
+        Get recommendations for several movies with one matrix product per similarity type.
+        
+        Args:
+            movie_indices (list): Indices of the target movies
+            n (int or list): Number of recommendations, shared or one per movie
+            method (str): 'plot', 'metadata', 'hybrid' or 'graph'
+            weights (tuple): Weights for plot, metadata and optionally collaborative
+                similarities (hybrid only)
+            filters (dict or list): Filters, shared or one dict per movie
+            prior_weight (float): Weight of the popularity/quality prior (hybrid only)
+            metadata_weights (dict or tuple): Genre/director/cast block weights
+            year_weight (float): Weight of release-year proximity (hybrid only)
+            recency_weight (float): Weight of the recency boost (hybrid only)
+            
+        Returns:
+            list: One list of (movie_idx, similarity_score) tuples per target movie
+        """
+        movie_indices = np.asarray(movie_indices, dtype=np.int64)
+        counts = list(n) if isinstance(n, (list, tuple)) else [n] * len(movie_indices)
+        filter_list = list(filters) if isinstance(filters, (list, tuple)) else [filters] * len(movie_indices)
+        
+        if method == 'graph':
+            # One local push per movie: a batched power iteration would cost a
+            # pass over the whole graph per step
+            return [self.get_graph_recommendations(int(movie_idx), n=count, filters=movie_filters)
+                    for movie_idx, count, movie_filters in zip(movie_indices, counts, filter_list)]
+        
+        if self.result_cache is None:
+            return self._batch_recommendations(movie_indices, counts, method, weights, filter_list, prior_weight,
+                                               metadata_weights, year_weight, recency_weight)
+        
+        # Serve cached queries and compute only the rest, still as one batch
+        key_weights = self._cache_weights(method, weights, prior_weight, metadata_weights, year_weight,
+                                          recency_weight)
+        keys = [make_cache_key(movie_idx, method, key_weights, count, movie_filters)
+                for movie_idx, count, movie_filters in zip(movie_indices, counts, filter_list)]
+        results = [self.result_cache.get(key, self.data_version) for key in keys]
+        missing = [position for position, result in enumerate(results) if result is None]
+        if missing:
+            computed = self._batch_recommendations(movie_indices[missing], [counts[i] for i in missing], method,
+                                                   weights, [filter_list[i] for i in missing], prior_weight,
+                                                   metadata_weights, year_weight, recency_weight)
+            for position, result in zip(missing, computed):
+                self.result_cache.put(keys[position], self.data_version, result)
+                results[position] = result
+        return results
+    
+    def _batch_recommendations(self, movie_indices, n, method, weights, filters, prior_weight, metadata_weights,
+                               year_weight, recency_weight):
+        """Uncached implementation of get_batch_recommendations for 'plot', 'metadata' and 'hybrid'."""
+        if method == 'plot':
+            similarities = self._plot_similarities(movie_indices)
+        elif method == 'metadata':
+            similarities = self._metadata_similarities(movie_indices, metadata_weights)
+        else:  # hybrid
+            plot_weight, metadata_weight = weights[:2]
+            similarities = (
+                plot_weight * self._plot_similarities(movie_indices)
+                + metadata_weight * self._metadata_similarities(movie_indices, metadata_weights)
+            )
+            if len(weights) > 2 and weights[2]:
+                similarities += weights[2] * self._collaborative_similarities(movie_indices)
+            if prior_weight:
+                similarities += prior_weight * self.quality_prior
+            if year_weight or recency_weight:
+                similarities += self._year_scores(movie_indices, year_weight, recency_weight)
+        
+        return self._rank_batch(similarities, movie_indices, n, filters)
+    
+    def get_text_recommendations(self, query_vectors, n=5, filters=None):
+        """
+        Get plot-based recommendations for free-text queries.
+        
+        Args:
+            query_vectors (scipy.sparse matrix): Query rows in the TF-IDF feature space
+            n (int or list): Number of recommendations, shared or one per query
+            filters (dict or list): Filters, shared or one dict per query
+            
+        Returns:
+            list: One list of (movie_idx, similarity_score) tuples per query
+        """
+        similarities = self.plot_similarities(query_vectors)
+        no_target = np.full(similarities.shape[0], -1, dtype=np.int64)
+        
+        return self._rank_batch(similarities, no_target, n, filters)
+    
+    def _rank_batch(self, similarities, movie_indices, n, filters):
+        """Rank each row of a (queries x movies) similarity matrix."""
+        n_queries = len(movie_indices)
+        counts = n if isinstance(n, (list, tuple)) else [n] * n_queries
+        filter_list = filters if isinstance(filters, (list, tuple)) else [filters] * n_queries
+        
+        return [
+            self._rank_similarities(np.asarray(similarities[row]).ravel(), movie_indices[row],
+                                    counts[row], filter_list[row])
+            for row in range(n_queries)
+        ]
+    
+    def _rank_similarities(self, similarities, movie_idx, n, filters):
+        """
+        Turn a similarity vector into the top N recommendations.
+        
+        Args:
+            similarities (np.array): Similarity of every movie to the target
+            movie_idx (int): Index of the target movie, excluded from the results (-1 for none)
+            n (int): Number of recommendations to return
+            filters (dict): Filters to apply to recommendations
+            
+        Returns:
+            list: List of tuples (movie_idx, similarity_score)
+        """
+        # Get indices of movies sorted by similarity (excluding the target movie).
+        # Without filters only the top n + 1 can be returned, so skip the full sort
+        if not filters and n + 1 < len(similarities):
+            top = np.argpartition(similarities, -(n + 1))[-(n + 1):]
+            similar_indices = top[similarities[top].argsort()[::-1]]
+        else:
+            similar_indices = similarities.argsort()[::-1]
         similar_indices = similar_indices[similar_indices != movie_idx]
         
         # Apply filters if provided
-        if filters:
-            similar_indices = self._apply_filters(similar_indices, filters)
+        similar_indices = self._filter_ranked(similar_indices, movie_idx, filters)
         
         # Get top N recommendations with their similarity scores
-        top_n = [(idx, combined_similarities[idx]) for idx in similar_indices[:n]]
+        top_n = [(idx, similarities[idx]) for idx in similar_indices[:n]]
         
         return top_n
     
+    def _filter_ranked(self, similar_indices, movie_idx, filters):
+        """Apply filters and near-duplicate collapsing to ranked movie indices."""
+        if filters:
+            similar_indices = self._apply_filters(similar_indices, filters)
+            if filters.get('collapse_duplicates') and self.near_duplicate_groups is not None:
+                similar_indices = self._collapse_duplicates(similar_indices, movie_idx)
+        return similar_indices
+    
     def _apply_filters(self, indices, filters):
         """
         Apply filters to recommendation indices.
         
         Args:
             indices (np.array): Array of movie indices
-            filters (dict): Filters to apply
+            filters (dict): Filters to apply. Besides 'year_range', 'genres' and
+                'industries', 'providers' keeps movies available on any of those
+                providers, in 'region' (any region if omitted) with one of the
+                'offer_types' (subscription, 'flatrate', if omitted).
+                'collapse_duplicates' is applied after these, when ranking
             
         Returns:
             np.array: Filtered indices
         """
+        if filters.get('providers'):
+            # The provider filter is a bitset lookup for every movie at once
+            indices = indices[self._provider_mask(filters)[indices]]
+        
+        if self.catalogue is not None:
+            # Compact mode evaluates the filters column-wise for every movie at once
+            mask = self.catalogue.filter_mask(filters)
+            return indices[mask[indices]][:100]
+        
+        import pandas as pd
+        
         filtered_indices = []
         
         for idx in indices:
@@ -229,7 +1060,11 @@ class RecommendationEngine:
                     continue
             
             # Filter by industry
-            if 'industries' in filters and filters['industries'] and 'industry' in movie:
+            if 'industries' in filters and filters['industries'] and isinstance(movie.get('industries'), list):
+                # A movie listed in several categories matches any of them
+                if not any(industry in movie['industries'] for industry in filters['industries']):
+                    continue
+            elif 'industries' in filters and filters['industries'] and 'industry' in movie:
                 if movie['industry'] not in filters['industries']:
                     continue
             
@@ -244,6 +1079,13 @@ class RecommendationEngine:
         
         return np.array(filtered_indices)
     
+    def _provider_mask(self, filters):
+        """Movies passing the 'providers' filter."""
+        if self.provider_index is None:
+            raise ValueError("This catalogue has no provider availability data to filter on")
+        return self.provider_index.mask(filters['providers'], region=filters.get('region'),
+                                        offers=filters.get('offer_types') or ('flatrate',))
+    
     def explain_similarity(self, movie1_idx, movie2_idx, top_n=5):
         """
         Explain the similarity between two movies by identifying common important terms.
@@ -256,26 +1098,72 @@ class RecommendationEngine:
         Returns:
             list: List of tuples (feature, importance)
         """
-        # Get TF-IDF vectors for both movies
-        movie1_vector = self.tfidf_matrix[movie1_idx].toarray().flatten()
-        movie2_vector = self.tfidf_matrix[movie2_idx].toarray().flatten()
-        
-        # Compute feature importance as the product of the two vectors
-        # (high values mean both movies have this feature strongly)
-        feature_importance = movie1_vector * movie2_vector
-        
-        # Get indices of top features sorted by importance
-        top_feature_indices = feature_importance.argsort()[::-1]
-        
-        # Filter zeros and get top N
-        top_features = []
-        for idx in top_feature_indices:
-            if feature_importance[idx] > 0:
-                feature = self.feature_names[idx]
-                importance = feature_importance[idx]
-                top_features.append((feature, importance))
-                
-                if len(top_features) >= top_n:
-                    break
-        
-        return top_features
+        return self.explain_recommendations(movie1_idx, [movie2_idx], top_n=top_n)[0]['terms']
+    
+    def explain_recommendations(self, movie_idx, recommended_indices, top_n=5, metadata_weights=None):
+        """
+        Explain a whole list of recommendations in one batched pass.
+        
+        Only the non-zero entries of the sparse rows are touched: the element-wise
+        product of the target row with every recommended row keeps just the shared
+        columns, and the top ones are picked by partial selection.
+        
+        Args:
+            movie_idx (int): Index of the target movie
+            recommended_indices (list): Indices of the recommended movies
+            top_n (int): Number of shared terms and metadata items to return per movie
+            metadata_weights (dict or tuple): Block weights the recommendations were made with
+            
+        Returns:
+            list: One dict per recommended movie with
+                'movie_idx',
+                'terms': list of (term, importance) shared plot terms, and
+                'metadata': list of (kind, name, contribution) shared genres, director
+                and cast, where contribution is that item's share of the metadata cosine
+        """
+        recommended_indices = np.asarray(recommended_indices, dtype=np.int64)
+        
+        # TF-IDF rows are L2-normalised, so the products are each term's share of the cosine
+        shared_terms = self.tfidf_matrix[recommended_indices].multiply(self.tfidf_matrix[movie_idx]).tocsr()
+        
+        # Metadata blocks are weighted at query time and rows are not normalised,
+        # so weight the products and scale them into cosine contributions
+        squared_weights = self._metadata_block_weights(metadata_weights) ** 2
+        shared_metadata = self.metadata_matrix[recommended_indices].multiply(self.metadata_matrix[movie_idx]).tocsr()
+        shared_metadata.data = shared_metadata.data * squared_weights[self.metadata_column_blocks[shared_metadata.indices]]
+        target_norm = np.sqrt(self.metadata_block_norms[movie_idx] @ squared_weights)
+        row_norms = np.sqrt(self.metadata_block_norms[recommended_indices] @ squared_weights)
+        norms = np.repeat(row_norms * target_norm, np.diff(shared_metadata.indptr))
+        shared_metadata.data = np.divide(shared_metadata.data, norms,
+                                         out=np.zeros_like(shared_metadata.data), where=norms > 0)
+        
+        explanations = []
+        for row, rec_idx in enumerate(recommended_indices):
+            terms = [
+                (self.feature_names[col], importance)
+                for col, importance in self._top_entries(shared_terms, row, top_n)
+            ]
+            metadata = [
+                (*self.metadata_feature_names[col], contribution)
+                for col, contribution in self._top_entries(shared_metadata, row, top_n)
+            ]
+            explanations.append({'movie_idx': rec_idx, 'terms': terms, 'metadata': metadata})
+        
+        return explanations
+    
+    def _top_entries(self, matrix, row, top_n):
+        """Return the top_n (column, value) pairs of a CSR row with positive values, largest first."""
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        columns = matrix.indices[start:end]
+        values = matrix.data[start:end]
+        
+        positive = values > 0
+        columns, values = columns[positive], values[positive]
+        
+        if len(values) > top_n:
+            # Partial selection: only the top_n entries end up sorted
+            keep = np.argpartition(-values, top_n - 1)[:top_n]
+            columns, values = columns[keep], values[keep]
+        
+        order = np.argsort(-values, kind='stable')
+        return [(columns[i], values[i]) for i in order]
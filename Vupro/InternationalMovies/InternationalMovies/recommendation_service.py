@@ -0,0 +1,539 @@
+"""
+Headless JSON HTTP service for the recommendation engine.
+
+Run with:
+
+    python recommendation_service.py --port 8000
+
+Endpoints (all POST bodies are JSON):
+
+    GET  /health
+    POST /recommendations/similar  {"movie_id": 19404, "n": 10, "method": "hybrid",
+                                    "weights": [0.6, 0.4], "filters": {...}, "timeout_ms": 500,
+                                    "metadata_weights": {"genre": 0.45, "director": 0.35, "cast": 0.2},
+                                    "year_weight": 0.1, "recency_weight": 0.05}
+    POST /recommendations/text     {"text": "a heist in Mumbai", "n": 10, "filters": {...}}
+    POST /recommendations/batch    {"queries": [{"movie_id": 19404}, {"text": "..."}]}
+
+"filters" accepts {"year_range": [1990, 2005], "genres": [...], "industries": [...],
+"providers": [...], "region": "IN", "offer_types": ["flatrate"], "collapse_duplicates": true};
+malformed or unknown filters are rejected with 400.
+
+Movies are identified by their stable movie_id (the TMDB id when the catalogue
+has one) in requests and responses, so clients are unaffected by the row order
+changing between catalogue refreshes. "movie_idx" (a row of the catalogue
+version currently served) is still accepted in place of "movie_id".
+
+Concurrent queries that arrive within a short window are coalesced by a
+micro-batcher into one matrix product per (method, weights, metadata_weights,
+year weights) group ('graph' queries run one local PageRank push each).
+Metadata block and release-year weights are applied at scoring time, so they
+can be varied per request (e.g. for A/B tests) without rebuilding anything.
+
+With --refresh-interval the catalogue is rebuilt in the background and the
+engine hot-swapped; every query runs entirely on the engine version that was
+current when it arrived.
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scipy.sparse import vstack
+
+from provider_index import OFFER_TYPES
+
+METHODS = ('plot', 'metadata', 'hybrid', 'graph')
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 500: 'Internal Server Error',
+               503: 'Service Unavailable', 504: 'Gateway Timeout'}
+
+
+class ServiceError(Exception):
+    """Error that maps directly to an HTTP status code."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _is_number(value):
+    """Whether a JSON value is a finite number (booleans are not numbers here)."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _number_tuple(value, name, lengths):
+    """
+    Validate a JSON list of weights.
+
+    Args:
+        value: Value from the request body
+        name (str): Field name, for the error message
+        lengths (tuple): Accepted list lengths
+
+    Returns:
+        tuple: The weights as floats (hashable, so they can key a batch group)
+    """
+    if not isinstance(value, (list, tuple)) or len(value) not in lengths or not all(map(_is_number, value)):
+        raise ServiceError(400, f"'{name}' must be a list of {' or '.join(map(str, lengths))} finite numbers")
+    return tuple(float(item) for item in value)
+
+
+def _validate_filters(filters):
+    """
+    Validate a JSON filter object before it reaches the engine.
+
+    Args:
+        filters: 'filters' value from the request body
+
+    Returns:
+        dict: The filters (None when nothing is filtered)
+    """
+    if filters is None or filters == {}:
+        return None
+    if not isinstance(filters, dict):
+        raise ServiceError(400, "'filters' must be an object")
+
+    for key, value in filters.items():
+        if value is None:
+            continue
+        if key == 'year_range':
+            if (not isinstance(value, list) or len(value) != 2 or not all(map(_is_number, value))
+                    or value[0] > value[1]):
+                raise ServiceError(400, "'year_range' must be [min_year, max_year] with min_year <= max_year")
+        elif key in ('genres', 'industries', 'providers', 'offer_types'):
+            if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                raise ServiceError(400, f"'{key}' must be a list of strings")
+            if key == 'offer_types' and not set(value) <= set(OFFER_TYPES):
+                raise ServiceError(400, f"'offer_types' must be among {', '.join(OFFER_TYPES)}")
+        elif key == 'region':
+            if not isinstance(value, str):
+                raise ServiceError(400, "'region' must be a string")
+        elif key == 'collapse_duplicates':
+            if not isinstance(value, bool):
+                raise ServiceError(400, "'collapse_duplicates' must be true or false")
+        else:
+            raise ServiceError(400, f"Unknown filter '{key}'")
+    return filters
+
+
+class _PendingQuery:
+    """A single query waiting in the micro-batcher."""
+
+    def __init__(self, group, target, n, filters, deadline, future):
+        self.group = group
+        self.target = target
+        self.n = n
+        self.filters = filters
+        self.deadline = deadline
+        self.future = future
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent queries into batched engine calls.
+
+    Queries wait at most `window` seconds (or until `max_batch_size` are queued),
+    are grouped by (engine, kind, method, weights, metadata_weights, year_weights), and each group is scored with
+    a single engine call on a worker thread so the event loop keeps accepting
+    requests. Keeping the engine in the group means queries taken against
+    different engine versions are never batched together.
+    """
+
+    def __init__(self, window=0.005, max_batch_size=64):
+        """
+        Args:
+            window (float): Maximum time in seconds a query waits for others to join its batch
+            max_batch_size (int): Maximum number of queries per batch
+        """
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='batcher')
+        self.batches = 0
+        self.batched_queries = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        self.executor.shutdown(wait=False)
+
+    async def submit(self, group, target, n, filters, deadline):
+        """
+        Queue a query and wait for its result.
+
+        Args:
+            group (tuple): (engine, 'similar', method, weights, metadata_weights, year_weights)
+                or (engine, 'text')
+            target: Movie index for similar queries, sparse query vector for text queries
+            n (int): Number of recommendations
+            filters (dict): Filters to apply
+            deadline (float): Loop time after which the result is no longer wanted
+
+        Returns:
+            list: List of tuples (movie row, similarity_score)
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(_PendingQuery(group, target, n, filters, deadline, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            window_end = loop.time() + self.window
+
+            # Collect whatever else arrives within the window
+            while len(batch) < self.max_batch_size:
+                remaining = window_end - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._process(batch)
+            except Exception as e:
+                # Never let one batch stop the batcher; fail whatever it left unanswered
+                for query in batch:
+                    if not query.future.done():
+                        query.future.set_exception(e)
+
+    async def _process(self, batch):
+        """Group a batch and answer every query in it."""
+        loop = asyncio.get_running_loop()
+
+        # Drop queries whose caller has already given up
+        now = loop.time()
+        groups = {}
+        for query in batch:
+            if query.future.done():
+                continue
+            if query.deadline <= now:
+                query.future.set_exception(ServiceError(504, "Deadline exceeded before scoring"))
+                continue
+            try:
+                groups.setdefault(query.group, []).append(query)
+            except TypeError:
+                query.future.set_exception(ServiceError(400, "Query parameters are not valid"))
+
+        for group, queries in groups.items():
+            try:
+                results = await loop.run_in_executor(self.executor, self._score, group, queries)
+            except Exception as e:
+                results = [e]
+                if len(queries) > 1:
+                    # Score the queries one by one, so only the one that fails gets the error
+                    results = []
+                    for query in queries:
+                        try:
+                            results.append((await loop.run_in_executor(self.executor, self._score,
+                                                                       group, [query]))[0])
+                        except Exception as query_error:
+                            results.append(query_error)
+
+            self.batches += 1
+            self.batched_queries += len(queries)
+            for query, result in zip(queries, results):
+                if query.future.done():
+                    continue
+                if isinstance(result, Exception):
+                    query.future.set_exception(result)
+                else:
+                    query.future.set_result(result)
+
+    def _score(self, group, queries):
+        counts = [query.n for query in queries]
+        filters = [query.filters for query in queries]
+        engine = group[0]
+
+        if group[1] == 'text':
+            query_vectors = vstack([query.target for query in queries])
+            return engine.get_text_recommendations(query_vectors, n=counts, filters=filters)
+
+        _, _, method, weights, metadata_weights, (year_weight, recency_weight) = group
+        return engine.get_batch_recommendations(
+            [query.target for query in queries], n=counts, method=method,
+            weights=weights, filters=filters,
+            metadata_weights=dict(metadata_weights) if metadata_weights is not None else None,
+            year_weight=year_weight, recency_weight=recency_weight
+        )
+
+
+class RecommendationService:
+    """asyncio HTTP server exposing the engine as a JSON API."""
+
+    def __init__(self, engine, processor=None, batch_window=0.005, max_batch_size=64,
+                 max_concurrency=256, default_timeout=2.0, max_n=100, max_body_bytes=1 << 20,
+                 refresher=None):
+        """
+        Args:
+            engine (RecommendationEngine): Engine to serve
+            processor (DataProcessor): Processor with a fitted vectorizer, needed for text queries
+            batch_window (float): Micro-batching window in seconds
+            max_batch_size (int): Maximum number of queries per batch
+            max_concurrency (int): Maximum number of queries in flight; more are rejected with 503
+            default_timeout (float): Per-request deadline in seconds when none is given
+            max_n (int): Largest number of recommendations a query may ask for
+            max_body_bytes (int): Largest accepted request body
+            refresher (CatalogueRefresher): If given, serve its current engine version
+                instead of `engine` and `processor`
+        """
+        self.engine = engine
+        self.processor = processor
+        self.refresher = refresher
+        self.batcher = MicroBatcher(window=batch_window, max_batch_size=max_batch_size)
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.default_timeout = default_timeout
+        self.max_n = max_n
+        self.max_body_bytes = max_body_bytes
+
+    def _snapshot(self):
+        """The (engine, processor) pair a new query should use from start to finish."""
+        if self.refresher is not None and self.refresher.current is not None:
+            version = self.refresher.current
+            return version.engine, version.processor
+        return self.engine, self.processor
+
+    async def serve(self, host='127.0.0.1', port=8000):
+        """Start the server and run until cancelled."""
+        self.batcher.start()
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        print(f"Recommendation service listening on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                if length > self.max_body_bytes:
+                    await self._respond(writer, 413, {'error': "Request body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                status, payload = await self._dispatch(method, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def _dispatch(self, method, path, body):
+        routes = {
+            '/recommendations/similar': self._similar,
+            '/recommendations/text': self._text,
+            '/recommendations/batch': self._batch,
+        }
+        try:
+            if path == '/health':
+                engine, _ = self._snapshot()
+                health = {'status': 'ok', 'movies': engine.tfidf_matrix.shape[0], 'in_flight': self.in_flight,
+                          'batches': self.batcher.batches, 'batched_queries': self.batcher.batched_queries}
+                if engine.result_cache is not None:
+                    health['cache'] = engine.cache_stats()
+                if self.refresher is not None:
+                    health['refresh'] = self.refresher.stats()
+                return 200, health
+            if path not in routes:
+                raise ServiceError(404, f"Unknown endpoint {path}")
+            if method != 'POST':
+                raise ServiceError(405, "Use POST")
+            try:
+                request = json.loads(body or b'{}')
+            except json.JSONDecodeError:
+                raise ServiceError(400, "Body is not valid JSON")
+            return 200, await routes[path](request)
+        except ServiceError as e:
+            return e.status, {'error': e.message}
+        except Exception as e:
+            return 500, {'error': str(e)}
+
+    async def _similar(self, request):
+        return {'recommendations': await self._run_query(request)}
+
+    async def _text(self, request):
+        if 'text' not in request:
+            raise ServiceError(400, "Missing 'text'")
+        return {'recommendations': await self._run_query(request)}
+
+    async def _batch(self, request):
+        queries = request.get('queries')
+        if not isinstance(queries, list) or not queries:
+            raise ServiceError(400, "'queries' must be a non-empty list")
+
+        results = await asyncio.gather(*(self._run_query(query) for query in queries),
+                                       return_exceptions=True)
+        formatted = []
+        for result in results:
+            if isinstance(result, ServiceError):
+                formatted.append({'error': result.message, 'status': result.status})
+            elif isinstance(result, Exception):
+                formatted.append({'error': str(result), 'status': 500})
+            else:
+                formatted.append({'recommendations': result})
+        return {'results': formatted}
+
+    @staticmethod
+    def _vectorize(processor, text):
+        return processor.vectorizer.transform([processor.preprocess_text(text)])
+
+    async def _run_query(self, request):
+        """Validate one query, run it through the batcher and format the result."""
+        if self.in_flight >= self.max_concurrency:
+            raise ServiceError(503, "Too many requests in flight")
+
+        n = request.get('n', 5)
+        if not isinstance(n, int) or not 1 <= n <= self.max_n:
+            raise ServiceError(400, f"'n' must be an integer between 1 and {self.max_n}")
+        filters = _validate_filters(request.get('filters'))
+
+        engine, processor = self._snapshot()
+        if 'text' in request:
+            if processor is None or getattr(processor, 'vectorizer', None) is None:
+                raise ServiceError(400, "Text queries need a fitted vectorizer")
+            group, target = (engine, 'text'), str(request['text'])
+        else:
+            if 'movie_id' in request:
+                movie_id = request['movie_id']
+                if not isinstance(movie_id, int) or isinstance(movie_id, bool):
+                    raise ServiceError(400, "'movie_id' must be an integer")
+                try:
+                    movie_idx = engine.row_of(movie_id)
+                except KeyError:
+                    raise ServiceError(404, f"Unknown movie_id {movie_id}")
+            else:
+                movie_idx = request.get('movie_idx')
+                if not isinstance(movie_idx, int) or not 0 <= movie_idx < engine.tfidf_matrix.shape[0]:
+                    raise ServiceError(400, "Give a valid 'movie_id' (or 'movie_idx')")
+            method = request.get('method', 'hybrid')
+            if method not in METHODS:
+                raise ServiceError(400, f"'method' must be one of {', '.join(METHODS)}")
+            # Plot and metadata weights, plus optionally a collaborative one
+            weights = (_number_tuple(request.get('weights', (0.6, 0.4)), 'weights', (2, 3))
+                       if method == 'hybrid' else None)
+            metadata_weights = request.get('metadata_weights')
+            if metadata_weights is not None:
+                if not isinstance(metadata_weights, dict) or not all(
+                        kind in engine.metadata_blocks and _is_number(weight)
+                        for kind, weight in metadata_weights.items()):
+                    raise ServiceError(400, "'metadata_weights' must map metadata kinds "
+                                            f"({', '.join(engine.metadata_blocks)}) to finite numbers")
+                # Hashable and order-independent, so equal weights share a batch
+                metadata_weights = tuple(sorted((kind, float(weight)) for kind, weight in metadata_weights.items()))
+            year_weights = (request.get('year_weight', 0.0), request.get('recency_weight', 0.0))
+            if method != 'hybrid':
+                year_weights = (0.0, 0.0)
+            elif not all(map(_is_number, year_weights)):
+                raise ServiceError(400, "'year_weight' and 'recency_weight' must be finite numbers")
+            group, target = (engine, 'similar', method, weights, metadata_weights, year_weights), movie_idx
+
+        timeout_ms = request.get('timeout_ms', self.default_timeout * 1000)
+        if not _is_number(timeout_ms) or timeout_ms <= 0:
+            raise ServiceError(400, "'timeout_ms' must be a positive number")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout_ms / 1000
+
+        self.in_flight += 1
+        try:
+            if group[1] == 'text':
+                # Tokenising and vectorising are CPU work, so they stay off the event loop
+                target = await loop.run_in_executor(self.batcher.executor, self._vectorize, processor, target)
+            recommendations = await asyncio.wait_for(
+                self.batcher.submit(group, target, n, filters, deadline), max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            raise ServiceError(504, "Deadline exceeded")
+        finally:
+            self.in_flight -= 1
+
+        return [
+            {'movie_id': int(engine.movie_ids[idx]), 'title': engine.get_movie(idx)['title'], 'score': float(score)}
+            for idx, score in recommendations
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the recommendation HTTP service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--batch-window-ms', type=float, default=5.0)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-concurrency', type=int, default=256)
+    parser.add_argument('--timeout-ms', type=float, default=2000.0)
+    parser.add_argument('--cache-size', type=int, default=0,
+                        help="Result cache entries for movie queries (text queries are not cached)")
+    parser.add_argument('--refresh-interval', type=float, default=0,
+                        help="Seconds between background catalogue refreshes (0 disables)")
+    args = parser.parse_args()
+
+    from catalogue_refresher import CatalogueRefresher, build_engine
+    from utils import load_data
+
+    start = time.perf_counter()
+    engine, processor = build_engine(load_data, cache_size=args.cache_size)
+    print(f"Engine ready with {engine.tfidf_matrix.shape[0]} movies in {time.perf_counter() - start:.1f}s")
+
+    refresher = None
+    if args.refresh_interval > 0:
+        refresher = CatalogueRefresher(lambda: build_engine(cache_size=args.cache_size),
+                                       interval=args.refresh_interval)
+        refresher.set_current(engine, processor)
+        refresher.start()
+
+    service = RecommendationService(
+        engine, processor,
+        batch_window=args.batch_window_ms / 1000,
+        max_batch_size=args.max_batch_size,
+        max_concurrency=args.max_concurrency,
+        default_timeout=args.timeout_ms / 1000,
+        refresher=refresher
+    )
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if refresher is not None:
+            refresher.stop()
+
+
+if __name__ == '__main__':
+    main()
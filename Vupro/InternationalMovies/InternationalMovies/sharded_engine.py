@@ -0,0 +1,339 @@
+"""
+Catalogue sharded across several RecommendationEngines.
+
+The catalogue is partitioned by industry (or into row ranges) and every
+partition gets its own compact RecommendationEngine. A query is scattered to
+the shards in a thread pool, each shard returns its local top N, and the
+per-shard lists are merged with a heap. Shards that an industries filter rules
+out are never scored, and any shard can be reloaded without touching the
+others.
+
+Movies are addressed by a global id, which is their row in the dataframe the
+sharded engine was built from (or an id given when a shard is reloaded).
+"""
+import copy
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from recommendation_engine import RecommendationEngine, compute_quality_prior
+
+
+class _Shard:
+    """One partition: its engine, the global id of each local row, and its industries."""
+
+    def __init__(self, name, engine, global_ids, industries):
+        self.name = name
+        self.engine = engine
+        self.global_ids = global_ids
+        self.industries = industries
+
+
+class _Layout:
+    """
+    Everything a query reads, published together and never modified.
+
+    Every shard's metadata matrix and block norms cover exactly the layout's
+    metadata columns and blocks.
+    """
+
+    def __init__(self, shards, owner, metadata_feature_names, metadata_columns):
+        self.shards = shards
+        self.owner = owner
+        self.metadata_feature_names = metadata_feature_names
+        self.metadata_columns = metadata_columns
+
+
+def _widened(engine, metadata_feature_names):
+    """
+    A copy of a shard engine whose metadata space covers more (kind, name) columns.
+
+    The matrix arrays are shared; the movies have no entries in the new columns,
+    so their block norms are zero in any new block.
+    """
+    widened = copy.copy(engine)
+    matrix = engine.metadata_matrix
+    widened.metadata_matrix = csr_matrix((matrix.data, matrix.indices, matrix.indptr),
+                                         shape=(matrix.shape[0], len(metadata_feature_names)))
+    widened.metadata_feature_names = metadata_feature_names
+    widened.movie_graph = None
+
+    block_norms = engine.metadata_block_norms
+    n_blocks = len(dict.fromkeys(kind for kind, _ in metadata_feature_names))
+    if block_norms.shape[1] < n_blocks:
+        padding = np.zeros((block_norms.shape[0], n_blocks - block_norms.shape[1]), dtype=block_norms.dtype)
+        block_norms = np.hstack([block_norms, padding])
+    widened._index_metadata_blocks(block_norms)
+    return widened
+
+
+class ShardedEngine:
+    """
+    Scatter-gather recommendation engine over catalogue partitions.
+
+    TF-IDF rows of every shard must share one feature space (the same fitted
+    vectorizer, or a hashing vectorizer). Metadata columns are aligned across
+    shards by (kind, name), so a reloaded shard may bring new genres, directors
+    or cast members.
+
+    The shards, the id map and the metadata columns form one immutable layout.
+    Reloading a shard builds a new layout and publishes it with a single
+    reference assignment; each query reads the layout once and runs on it.
+
+    Example:
+        engine = ShardedEngine(movies_df, tfidf_matrix, feature_names, by='industry')
+        engine.get_hybrid_recommendations(movie_idx, n=10, filters={'industries': ['Tamil']})
+    """
+
+    def __init__(self, movies_df, tfidf_matrix, feature_names, by='industry', n_shards=4, n_workers=4):
+        """
+        Partition the catalogue and build one engine per shard.
+
+        Args:
+            movies_df (pd.DataFrame): Processed movie dataframe
+            tfidf_matrix (scipy.sparse.csr_matrix): TF-IDF matrix of movie overviews
+            feature_names (list): Feature names from the TF-IDF vectorizer
+            by (str): 'industry' for one shard per industry, or 'rows' for
+                n_shards contiguous row ranges
+            n_shards (int): Number of row-range shards (ignored when by='industry')
+            n_workers (int): Threads scoring shards in parallel
+        """
+        self.feature_names = feature_names
+        # Shards score their popularity/quality prior on the whole catalogue's scale
+        _, self.prior_stats = compute_quality_prior(movies_df)
+        self._layout = _Layout({}, {}, [], {})
+        self._next_id = len(movies_df)
+        self._lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=n_workers)
+
+        tfidf_matrix = csr_matrix(tfidf_matrix)
+        for name, rows in self._partition(movies_df, by, n_shards):
+            self.load_shard(name, movies_df.iloc[rows].reset_index(drop=True), tfidf_matrix[rows],
+                            global_ids=rows)
+
+    @staticmethod
+    def _partition(movies_df, by, n_shards):
+        """Yield (shard name, row indices) pairs."""
+        if by == 'industry':
+            if 'industry' not in movies_df.columns:
+                raise ValueError("Sharding by industry needs an 'industry' column")
+            industries = movies_df['industry'].fillna('Unknown').to_numpy()
+            for industry in sorted(set(industries)):
+                yield industry, np.flatnonzero(industries == industry)
+        elif by == 'rows':
+            for number, rows in enumerate(np.array_split(np.arange(len(movies_df)), n_shards)):
+                yield f"rows_{number}", rows
+        else:
+            raise ValueError(f"Unknown sharding key: {by!r}")
+
+    @property
+    def shards(self):
+        """Current shards by name."""
+        return self._layout.shards
+
+    @property
+    def metadata_feature_names(self):
+        """(kind, name) label of every metadata column shared by the shards."""
+        return self._layout.metadata_feature_names
+
+    def load_shard(self, name, movies_df, tfidf_matrix, global_ids=None):
+        """
+        Build (or rebuild) one shard and swap it in.
+
+        The other shards keep their engines, or get widened copies if the shard
+        brings new metadata columns. Queries running during the reload see
+        either the old or the new layout as a whole.
+
+        Args:
+            name (str): Shard name (e.g. the industry)
+            movies_df (pd.DataFrame): Processed movies of this shard
+            tfidf_matrix (scipy.sparse.csr_matrix): Their TF-IDF rows, in the shared feature space
+            global_ids (np.array): Global id of each row; new ids are allocated if omitted
+        """
+        quality_prior, _ = compute_quality_prior(movies_df, self.prior_stats)
+        engine = RecommendationEngine(movies_df, tfidf_matrix, self.feature_names, compact=True,
+                                      quality_prior=quality_prior)
+
+        with self._lock:
+            layout = self._layout
+            if global_ids is None:
+                global_ids = np.arange(self._next_id, self._next_id + len(movies_df))
+            global_ids = np.asarray(global_ids, dtype=np.int64)
+            self._next_id = max(self._next_id, int(global_ids.max(initial=-1)) + 1)
+
+            # New column space: the current columns, then this shard's unseen (kind, name) pairs
+            names = list(layout.metadata_feature_names)
+            columns = dict(layout.metadata_columns)
+            for feature in engine.metadata_feature_names:
+                if feature not in columns:
+                    columns[feature] = len(names)
+                    names.append(feature)
+
+            engine.metadata_matrix = self._align_metadata(engine.metadata_matrix, engine.metadata_feature_names,
+                                                          columns, len(names))
+            engine.metadata_feature_names = names
+            # Blocks follow the shared column order, which may differ from this shard's own
+            engine._index_metadata_blocks()
+
+            industries = (set(movies_df['industry'].fillna('Unknown')) if 'industry' in movies_df.columns
+                          else set())
+            if 'industries' in movies_df.columns:
+                # Movies also listed under other categories keep this shard in play for them
+                industries.update(industry for listed in movies_df['industries'] if isinstance(listed, list)
+                                  for industry in listed)
+
+            # The other shards are widened to the new column space, never modified in place
+            shards = {other: shard if shard.engine.metadata_matrix.shape[1] == len(names)
+                      else _Shard(other, _widened(shard.engine, names), shard.global_ids, shard.industries)
+                      for other, shard in layout.shards.items() if other != name}
+            shards[name] = _Shard(name, engine, global_ids, industries)
+
+            owner = dict(layout.owner)
+            if name in layout.shards:
+                for global_id in layout.shards[name].global_ids:
+                    owner.pop(int(global_id), None)
+            owner.update((int(global_id), (name, local)) for local, global_id in enumerate(global_ids))
+
+            # A single reference assignment; queries see the old or the new layout
+            self._layout = _Layout(shards, owner, names, columns)
+
+    def unload_shard(self, name):
+        """Remove a shard; its movies are no longer recommended or queryable."""
+        with self._lock:
+            layout = self._layout
+            shards = dict(layout.shards)
+            shard = shards.pop(name)
+            owner = dict(layout.owner)
+            for global_id in shard.global_ids:
+                owner.pop(int(global_id), None)
+            self._layout = _Layout(shards, owner, layout.metadata_feature_names, layout.metadata_columns)
+
+    @staticmethod
+    def _align_metadata(matrix, names, columns, n_columns):
+        """Re-index a shard's metadata columns into the shared (kind, name) column space."""
+        column_map = np.array([columns[feature] for feature in names], dtype=matrix.indices.dtype)
+        aligned = csr_matrix((matrix.data, column_map[matrix.indices], matrix.indptr),
+                             shape=(matrix.shape[0], n_columns))
+        aligned.sort_indices()
+        return aligned
+
+    @staticmethod
+    def _locate(layout, movie_idx):
+        """Return (shard, local row) of a global movie id in a layout."""
+        try:
+            name, local = layout.owner[int(movie_idx)]
+        except KeyError:
+            raise KeyError(f"Unknown movie id: {movie_idx}") from None
+        return layout.shards[name], local
+
+    def get_movie(self, movie_idx):
+        """Get all fields of a movie by its global id."""
+        shard, local = self._locate(self._layout, movie_idx)
+        return shard.engine.get_movie(local)
+
+    def __len__(self):
+        return sum(len(shard.global_ids) for shard in self._layout.shards.values())
+
+    def get_content_based_recommendations(self, movie_idx, n=5, content_type='plot', filters=None,
+                                          metadata_weights=None):
+        """
+        Get content-based recommendations across all shards.
+
+        Args:
+            movie_idx (int): Global id of the target movie
+            n (int): Number of recommendations to return
+            content_type (str): Type of content to use ('plot' or 'metadata')
+            filters (dict): Filters to apply to recommendations
+            metadata_weights (dict or tuple): Genre/director/cast block weights ('metadata' only)
+
+        Returns:
+            list: List of tuples (global movie id, similarity_score)
+        """
+        layout = self._layout
+        owner, local = self._locate(layout, movie_idx)
+        if content_type == 'plot':
+            query = owner.engine.tfidf_matrix[local]
+            query_inverse_norm = owner.engine.tfidf_inverse_norms[local:local + 1]
+
+            def score(shard):
+                return shard.engine.plot_similarities(query, query_inverse_norm).ravel()
+        else:
+            query = owner.engine.metadata_matrix[local]
+            query_norms = owner.engine.metadata_block_norms[local:local + 1]
+
+            def score(shard):
+                return shard.engine.metadata_similarities(query, query_norms, metadata_weights).ravel()
+
+        return self._scatter(layout, movie_idx, n, filters, score)
+
+    def get_hybrid_recommendations(self, movie_idx, n=5, weights=(0.6, 0.4), filters=None, prior_weight=0.1,
+                                   metadata_weights=None, year_weight=0.0, recency_weight=0.0):
+        """
+        Get hybrid recommendations across all shards.
+
+        Args:
+            movie_idx (int): Global id of the target movie
+            n (int): Number of recommendations to return
+            weights (tuple): Weights for plot and metadata similarities
+            filters (dict): Filters to apply to recommendations
+            prior_weight (float): Weight of the precomputed popularity/quality prior
+            metadata_weights (dict or tuple): Genre/director/cast block weights
+            year_weight (float): Weight of release-year proximity to the target movie
+            recency_weight (float): Weight of a boost for recent releases
+
+        Returns:
+            list: List of tuples (global movie id, similarity_score)
+        """
+        plot_weight, metadata_weight = weights
+        layout = self._layout
+        owner, local = self._locate(layout, movie_idx)
+        query_plot = owner.engine.tfidf_matrix[local]
+        query_inverse_norm = owner.engine.tfidf_inverse_norms[local:local + 1]
+        query_metadata = owner.engine.metadata_matrix[local]
+        query_norms = owner.engine.metadata_block_norms[local:local + 1]
+        query_year = owner.engine.release_years[local:local + 1]
+
+        def score(shard):
+            metadata_similarities = shard.engine.metadata_similarities(query_metadata, query_norms, metadata_weights)
+            similarities = (plot_weight * shard.engine.plot_similarities(query_plot, query_inverse_norm).ravel()
+                            + metadata_weight * metadata_similarities.ravel()
+                            + prior_weight * shard.engine.quality_prior)
+            if year_weight or recency_weight:
+                similarities += shard.engine.year_scores(query_year, year_weight, recency_weight).ravel()
+            return similarities
+
+        return self._scatter(layout, movie_idx, n, filters, score)
+
+    @staticmethod
+    def _eligible_shards(layout, filters):
+        """Shards that can hold results, skipping those the industries filter excludes."""
+        shards = list(layout.shards.values())
+        selected = (filters or {}).get('industries')
+        if selected:
+            shards = [shard for shard in shards if shard.industries & set(selected)]
+        return shards
+
+    def _scatter(self, layout, movie_idx, n, filters, score):
+        """Score the eligible shards in parallel and merge their top N lists."""
+        def top_n(shard):
+            similarities = score(shard)
+            local_targets = np.flatnonzero(shard.global_ids == movie_idx)
+            local_target = local_targets[0] if len(local_targets) else -1
+            return [(shard.global_ids[local], similarity)
+                    for local, similarity in shard.engine._rank_similarities(similarities, local_target, n, filters)]
+
+        per_shard = self.pool.map(top_n, self._eligible_shards(layout, filters))
+        return heapq.nlargest(n, (item for items in per_shard for item in items), key=lambda item: item[1])
+
+    def close(self):
+        """Stop the scoring threads."""
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,302 @@
+"""
+Multi-process serving with the engine's arrays held in shared memory.
+
+One loader process publishes the CSR arrays (data, indices, indptr) of the
+TF-IDF and metadata matrices, plus the columnar CompactCatalogue, into
+multiprocessing.shared_memory blocks. Worker processes attach to those blocks
+zero-copy and answer RecommendationEngine queries against them, so each
+additional worker only costs its interpreter and per-query scratch memory.
+"""
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import uuid
+from multiprocessing import shared_memory
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from compact_catalogue import CompactCatalogue, to_compact_csr
+from provider_index import ProviderIndex
+
+
+class SharedEnginePublication:
+    """Owner of the shared memory blocks holding a published engine."""
+
+    def __init__(self, engine, prefix=None):
+        """
+        Copy an engine's arrays into shared memory.
+
+        Args:
+            engine (RecommendationEngine): Engine to publish (compact or not)
+            prefix (str): Prefix for the shared memory block names
+        """
+        self.prefix = prefix or f"movies_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+        self.blocks = []
+
+        catalogue = engine.catalogue if engine.catalogue is not None else CompactCatalogue(engine.movies_df)
+        catalogue_arrays, catalogue_state = catalogue.to_arrays()
+
+        arrays = {}
+        for name in ('tfidf_matrix', 'metadata_matrix'):
+            matrix = to_compact_csr(getattr(engine, name))
+            arrays[f"{name}.data"] = matrix.data
+            arrays[f"{name}.indices"] = matrix.indices
+            arrays[f"{name}.indptr"] = matrix.indptr
+        for name, array in catalogue_arrays.items():
+            arrays[f"catalogue.{name}"] = array
+        arrays['quality_prior'] = engine.quality_prior
+        arrays['metadata_block_norms'] = engine.metadata_block_norms
+        if engine.has_stable_ids:
+            arrays['movie_ids'] = engine.movie_ids
+        provider_index = engine.provider_index
+        if provider_index is not None:
+            arrays['provider_bitsets'] = provider_index.bitsets
+
+        # The manifest is small and pickled to workers; the arrays are not
+        self.manifest = {
+            'arrays': {name: self._publish(name, array) for name, array in arrays.items()},
+            'shapes': {
+                'tfidf_matrix': engine.tfidf_matrix.shape,
+                'metadata_matrix': engine.metadata_matrix.shape,
+            },
+            'feature_names': engine.feature_names,
+            'metadata_feature_names': list(engine.metadata_feature_names),
+            'catalogue_state': catalogue_state,
+            'provider_keys': provider_index.keys if provider_index is not None else None,
+        }
+
+    def _publish(self, name, array):
+        """Copy one array into a new shared memory block and describe it."""
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(
+            name=f"{self.prefix}_{len(self.blocks)}", create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        self.blocks.append(block)
+        return block.name, array.dtype.str, array.shape
+
+    @property
+    def nbytes(self):
+        """Total size of the published shared memory blocks."""
+        return sum(block.size for block in self.blocks)
+
+    def close(self):
+        """Release and remove the shared memory blocks."""
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+def attach_engine(manifest):
+    """
+    Build a RecommendationEngine that views published shared memory without copying.
+
+    Args:
+        manifest (dict): SharedEnginePublication.manifest
+
+    Returns:
+        tuple: (RecommendationEngine, list of attached SharedMemory blocks). The
+            blocks must stay referenced for as long as the engine is used.
+    """
+    from recommendation_engine import RecommendationEngine
+
+    blocks = []
+    arrays = {}
+    for name, (block_name, dtype, shape) in manifest['arrays'].items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        # Workers only read; make accidental writes fail loudly
+        array.flags.writeable = False
+        arrays[name] = array
+
+    matrices = {}
+    for name, shape in manifest['shapes'].items():
+        matrices[name] = csr_matrix(
+            (arrays[f"{name}.data"], arrays[f"{name}.indices"], arrays[f"{name}.indptr"]),
+            shape=shape, copy=False
+        )
+
+    catalogue_arrays = {name[len('catalogue.'):]: array
+                        for name, array in arrays.items() if name.startswith('catalogue.')}
+    catalogue = CompactCatalogue.from_arrays(catalogue_arrays, manifest['catalogue_state'])
+    provider_index = None
+    if manifest['provider_keys'] is not None:
+        provider_index = ProviderIndex.from_arrays(arrays['provider_bitsets'], manifest['provider_keys'],
+                                                   len(catalogue))
+
+    engine = RecommendationEngine.from_components(
+        matrices['tfidf_matrix'], manifest['feature_names'],
+        matrices['metadata_matrix'], catalogue,
+        metadata_feature_names=manifest['metadata_feature_names'],
+        quality_prior=arrays['quality_prior'],
+        metadata_block_norms=arrays['metadata_block_norms'],
+        provider_index=provider_index,
+        movie_ids=arrays.get('movie_ids')
+    )
+    return engine, blocks
+
+
+def _worker_main(manifest, tasks, results):
+    """Worker process loop: attach once, then answer queries until a None task arrives."""
+    engine, blocks = attach_engine(manifest)
+    results.put(('ready', os.getpid(), None))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        request_id, method, args, kwargs = task
+        try:
+            result = getattr(engine, method)(*args, **kwargs)
+            results.put((request_id, 'ok', result))
+        except Exception as e:
+            results.put((request_id, 'error', repr(e)))
+
+    for block in blocks:
+        block.close()
+
+
+class SharedEnginePool:
+    """
+    Pool of worker processes answering engine queries from shared memory.
+
+    Example:
+        with SharedEnginePool(engine, n_workers=4) as pool:
+            recommendations = pool.query('get_hybrid_recommendations', movie_idx, n=10)
+    """
+
+    def __init__(self, engine, n_workers=2, startup_timeout=120, poll_interval=0.5):
+        """
+        Publish the engine and start the workers.
+
+        Args:
+            engine (RecommendationEngine): Engine to serve
+            n_workers (int): Number of worker processes
+            startup_timeout (float): Seconds to wait for every worker to attach
+            poll_interval (float): Seconds between worker liveness checks while waiting for replies
+
+        Raises:
+            RuntimeError: If a worker dies or does not attach within `startup_timeout`
+        """
+        self.poll_interval = poll_interval
+        self.publication = SharedEnginePublication(engine)
+        context = mp.get_context('spawn')
+        self.tasks = context.Queue()
+        self.results = context.Queue()
+        self.workers = [
+            context.Process(target=_worker_main, args=(self.publication.manifest, self.tasks, self.results),
+                            daemon=True)
+            for _ in range(n_workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+        # Wait until every worker has attached so the first queries are not delayed
+        self.worker_pids = []
+        try:
+            deadline = time.monotonic() + startup_timeout
+            for _ in self.workers:
+                _, pid, _ = self._reply(deadline)
+                self.worker_pids.append(pid)
+        except BaseException:
+            self._terminate()
+            raise
+
+        self._next_id = 0
+        # One batch at a time owns the task ids and the results queue
+        self._lock = threading.Lock()
+
+    def _reply(self, deadline=None):
+        """
+        Next reply from the results queue.
+
+        Raises:
+            RuntimeError: If a worker has died (its queries would never be answered)
+                or the deadline passes
+        """
+        while True:
+            try:
+                return self.results.get(timeout=self.poll_interval)
+            except queue.Empty:
+                pass
+            dead = [worker for worker in self.workers if not worker.is_alive()]
+            if dead:
+                raise RuntimeError(f"Worker process {dead[0].pid} exited with code {dead[0].exitcode}")
+            if deadline is not None and time.monotonic() > deadline:
+                raise RuntimeError("Timed out waiting for the worker processes")
+
+    def map(self, method, calls, timeout=None):
+        """
+        Run many queries across the workers.
+
+        Calls from several threads are safe; their batches run one after another.
+
+        Args:
+            method (str): RecommendationEngine method name
+            calls (list): List of (args, kwargs) tuples
+            timeout (float): Seconds to wait for the whole batch (None waits as
+                long as the workers are alive)
+
+        Returns:
+            list: Results in the same order as `calls`
+
+        Raises:
+            RuntimeError: If any query failed, once every reply of the batch has been
+                read, or if a worker died or the timeout passed
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._lock:
+            first_id = self._next_id
+            for args, kwargs in calls:
+                self.tasks.put((self._next_id, method, tuple(args), dict(kwargs)))
+                self._next_id += 1
+
+            # Read every reply of this batch even after a failure, so none is left
+            # queued for the next call; replies to earlier, abandoned batches are dropped
+            results = {}
+            errors = {}
+            while len(results) + len(errors) < len(calls):
+                request_id, status, value = self._reply(deadline)
+                if request_id < first_id:
+                    continue
+                if status == 'error':
+                    errors[request_id] = value
+                else:
+                    results[request_id] = value
+
+        if errors:
+            request_id = min(errors)
+            raise RuntimeError(f"Worker failed on request {request_id} "
+                               f"({len(errors)} of {len(calls)} failed): {errors[request_id]}")
+        return [results[first_id + i] for i in range(len(calls))]
+
+    def query(self, method, *args, **kwargs):
+        """Run a single query on one of the workers and return its result."""
+        return self.map(method, [(args, kwargs)])[0]
+
+    def close(self):
+        """Stop the workers and remove the shared memory."""
+        for _ in self.workers:
+            self.tasks.put(None)
+        for worker in self.workers:
+            worker.join(timeout=10)
+        self._terminate()
+
+    def _terminate(self):
+        """Kill any worker still running and remove the shared memory."""
+        for worker in self.workers:
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+        self.publication.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,156 @@
+"""
+Staged engine startup: serve metadata recommendations while plot features build.
+
+Preprocessing the plot text and fitting TF-IDF dominate startup. A
+StagedStartup first builds a metadata-only engine, which needs neither, and
+makes it available immediately; the plot text is then preprocessed and
+vectorised on a background thread, and the full engine replaces the
+metadata-only one with a single reference assignment. Both engines have the
+same rows, so movie indices stay valid across the upgrade.
+"""
+import threading
+import time
+
+
+class StagedStartup:
+    """
+    Build the engine in two stages and track startup metrics.
+
+    Example:
+        startup = StagedStartup(load_data, cache_size=256)
+        startup.start()                       # returns once metadata is queryable
+        engine = startup.engine               # per request
+        if 'hybrid' in startup.ready_methods():
+            ...
+    """
+
+    def __init__(self, loader=None, processor=None, cache_size=0):
+        """
+        Args:
+            loader (callable): Returns the raw movie dataframe (defaults to utils.load_data)
+            processor (DataProcessor): Processor to use (a new one if None)
+            cache_size (int): Result cache size of the engines
+        """
+        if loader is None:
+            from utils import load_data as loader
+        if processor is None:
+            from data_processor import DataProcessor
+            processor = DataProcessor()
+
+        self.loader = loader
+        self.processor = processor
+        self.cache_size = cache_size
+
+        self.engine = None
+        self.movies_df = None
+        self.tfidf_matrix = None
+        self.feature_names = None
+        self.error = None
+        self.dedupe_error = None
+        self.metrics = {
+            'metadata_ready_seconds': None,
+            'full_ready_seconds': None,
+            'first_recommendation_seconds': None,
+        }
+        self._started_at = None
+        self._full_ready = threading.Event()
+        self._thread = None
+
+    def start(self, background=True):
+        """
+        Build the metadata-only engine, then the full engine.
+
+        Args:
+            background (bool): Build the full engine on a daemon thread and return
+                as soon as the metadata-only engine is ready (otherwise block
+                until both are built)
+
+        Returns:
+            RecommendationEngine: The engine available when this returns
+        """
+        from recommendation_engine import RecommendationEngine
+
+        self._started_at = time.perf_counter()
+        self.movies_df = self.processor.preprocess_data(self.loader(), include_text=False)
+        self.engine = RecommendationEngine.metadata_only(self.movies_df, cache_size=self.cache_size)
+        self.metrics['metadata_ready_seconds'] = time.perf_counter() - self._started_at
+
+        # Time-to-first-recommendation: until a real query has been answered
+        if len(self.movies_df):
+            self.engine.get_content_based_recommendations(0, content_type='metadata')
+        self.metrics['first_recommendation_seconds'] = time.perf_counter() - self._started_at
+        print(f"First recommendation after {self.metrics['first_recommendation_seconds']:.1f}s")
+
+        if background:
+            self._thread = threading.Thread(target=self._build_full, name='staged-startup', daemon=True)
+            self._thread.start()
+        else:
+            self._build_full()
+        return self.engine
+
+    def _build_full(self):
+        try:
+            try:
+                texts = self.processor.preprocess_overviews(self.movies_df).tolist()
+                tfidf_matrix, feature_names = self.processor.vectorize_text(texts)
+                full_engine = self.engine.with_plot_features(tfidf_matrix, feature_names)
+            except Exception as e:
+                # Keep serving metadata recommendations
+                self.error = repr(e)
+                print(f"Building plot features failed: {e}")
+                return
+
+            self.tfidf_matrix = tfidf_matrix
+            self.feature_names = feature_names
+            # A single reference assignment; readers see the old or the new engine
+            self.engine = full_engine
+            self.metrics['full_ready_seconds'] = time.perf_counter() - self._started_at
+            print(f"All recommendation methods ready after {self.metrics['full_ready_seconds']:.1f}s")
+
+            self._find_near_duplicates(full_engine, texts)
+        finally:
+            self._full_ready.set()
+
+    def _find_near_duplicates(self, engine, texts):
+        """Attach near-duplicate groups to the served engine, which works without them."""
+        from minhash_lsh import MinHashLSH, shingle_sets
+
+        try:
+            # Remakes, dubbed releases and re-listings share nearly the same overview
+            engine.set_near_duplicate_groups(MinHashLSH().fit(shingle_sets(texts)).duplicate_groups())
+        except Exception as e:
+            # 'collapse_duplicates' is then a no-op; every other query is unaffected
+            self.dedupe_error = repr(e)
+            print(f"Finding near-duplicate movies failed: {e}")
+
+    def ready_methods(self):
+        """
+        Returns:
+            set: Recommendation methods the current engine can serve
+                ('metadata' and 'graph', and 'plot' and 'hybrid' once plot
+                features are built)
+        """
+        if self.engine is None:
+            return set()
+        if self.engine.has_plot_features:
+            return {'plot', 'metadata', 'hybrid', 'graph'}
+        return {'metadata', 'graph'}
+
+    @property
+    def building(self):
+        """Whether the full engine is still being built."""
+        return self._started_at is not None and not self._full_ready.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the full engine is built (or failed); returns False on timeout."""
+        return self._full_ready.wait(timeout)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Startup metrics ('metadata_ready_seconds', 'full_ready_seconds',
+                'first_recommendation_seconds'), the ready methods, the last error
+                and the error of the near-duplicate search, if any
+        """
+        return dict(self.metrics, ready_methods=sorted(self.ready_methods()), error=self.error,
+                    dedupe_error=self.dedupe_error)
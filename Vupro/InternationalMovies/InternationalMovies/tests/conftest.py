@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from benchmarks import _build_tfidf, make_synthetic_catalogue
+from recommendation_engine import RecommendationEngine
+
+
+@pytest.fixture(scope='session')
+def movies_df():
+    """Small synthetic catalogue with TMDB-like ids that differ from the row positions."""
+    movies_df = make_synthetic_catalogue(400)
+    movies_df['tmdb_id'] = np.arange(len(movies_df)) * 7 + 100
+    return movies_df
+
+
+@pytest.fixture(scope='session')
+def tfidf(movies_df):
+    return _build_tfidf(movies_df)
+
+
+@pytest.fixture
+def engine(movies_df, tfidf):
+    tfidf_matrix, feature_names = tfidf
+    return RecommendationEngine(movies_df, tfidf_matrix, feature_names)
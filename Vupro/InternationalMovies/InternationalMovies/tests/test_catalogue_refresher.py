@@ -0,0 +1,46 @@
+import numpy as np
+
+from catalogue_refresher import CatalogueRefresher, recall_against
+from recommendation_engine import RecommendationEngine
+
+
+def test_recall_matches_movies_by_id_across_row_orders(movies_df, tfidf):
+    tfidf_matrix, feature_names = tfidf
+    engine = RecommendationEngine(movies_df, tfidf_matrix, feature_names)
+
+    # Same movies in reverse row order, all sharing one title
+    order = np.arange(len(movies_df))[::-1]
+    reordered = movies_df.iloc[order].reset_index(drop=True)
+    reordered['title'] = 'Untitled'
+    rebuilt = RecommendationEngine(reordered, tfidf_matrix[order], feature_names)
+    assert recall_against(engine, rebuilt, n_queries=20) > 0.95
+
+    # A catalogue of different movies shares nothing to compare
+    renumbered = movies_df.copy()
+    renumbered['tmdb_id'] = renumbered['tmdb_id'] + 10 ** 6
+    other = RecommendationEngine(renumbered, tfidf_matrix, feature_names)
+    assert recall_against(engine, other) == 1.0
+
+
+def test_history_is_bounded_but_counts_every_refresh(movies_df, tfidf):
+    engine = RecommendationEngine(movies_df, *tfidf)
+    refresher = CatalogueRefresher(build=lambda: (engine, None), min_movies=len(movies_df) + 1, history_size=3)
+    for _ in range(5):
+        refresher.refresh_now()
+
+    assert len(refresher.history) == 3
+    stats = refresher.stats()
+    assert stats['refreshes'] == 5 and stats['rejected'] == 5
+    assert stats['last_refresh'] is refresher.history[-1]
+
+
+def test_recall_matches_movies_by_title_without_ids(movies_df, tfidf):
+    tfidf_matrix, feature_names = tfidf
+    untracked = movies_df.drop(columns=['tmdb_id'])
+    engine = RecommendationEngine(untracked, tfidf_matrix, feature_names)
+    assert not engine.has_stable_ids
+
+    # Row positions are all the IDs these engines have, and they moved
+    order = np.arange(len(movies_df))[::-1]
+    rebuilt = RecommendationEngine(untracked.iloc[order].reset_index(drop=True), tfidf_matrix[order], feature_names)
+    assert recall_against(engine, rebuilt, n_queries=20) > 0.95
@@ -0,0 +1,19 @@
+import numpy as np
+
+from collaborative_filtering import ImplicitALS, interactions_from_events
+
+
+def test_movies_without_interactions_have_no_similarity():
+    rng = np.random.default_rng(0)
+    user_ids = rng.integers(0, 80, 3000)
+    movie_ids = rng.integers(2, 150, 3000)
+    interactions = interactions_from_events(user_ids, movie_ids, n_users=100, n_movies=200)
+    model = ImplicitALS(n_factors=16, iterations=5).fit(interactions)
+
+    cold = np.r_[0, 1, 150:200]
+    similarities = model.similarities(np.arange(200))
+    assert not similarities[cold].any() and not similarities[:, cold].any()
+    assert not model.user_factors[80:].any()
+
+    warm = np.arange(2, 150)
+    assert np.allclose(similarities[warm, warm], 1, atol=1e-4)
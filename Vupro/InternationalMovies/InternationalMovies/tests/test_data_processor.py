@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+from data_processor import DataProcessor
+
+
+def test_list_parsing_cache_is_bounded():
+    processor = DataProcessor()
+    processor.max_parsed_lists = 100
+    values = pd.Series([f"[{{'id': {i}, 'name': 'Actor {i}'}}]" for i in range(1000)] + [None])
+
+    parsed = processor.parse_list_column(values, processor.extract_names)
+    assert parsed.iloc[999] == ['Actor 999'] and parsed.iloc[1000] == []
+    assert len(processor._parsed_lists) == 100
+
+    # Later calls still parse everything and reuse what is cached
+    again = processor.parse_list_column(values.iloc[::-1].reset_index(drop=True), processor.extract_names)
+    assert again.iloc[1] == ['Actor 999'] and len(processor._parsed_lists) == 100
+    assert again.iloc[1000] == parsed.iloc[0]
+
+
+def test_parsed_rows_do_not_share_lists():
+    processor = DataProcessor()
+    values = pd.Series(["['Drama', 'Crime']"] * 3)
+    parsed = processor.parse_list_column(values, processor.extract_genres)
+    parsed.iloc[0].append('Comedy')
+
+    assert parsed.iloc[1] == ['Drama', 'Crime']
+    assert processor.parse_list_column(values, processor.extract_genres).iloc[0] == ['Drama', 'Crime']
+
+
+def test_list_formats_parse_alike():
+    processor = DataProcessor()
+    formats = [
+        pd.Series(['[{"id": 1, "name": "Drama"}, {"id": 2, "name": "Crime"}]']),
+        pd.Series(["['Drama', 'Crime']"]),
+        pd.Series(["Drama, Crime"]),
+    ]
+    for values in formats:
+        assert processor.parse_list_column(values, processor.extract_genres).iloc[0] == ['Drama', 'Crime']
+
+
+def test_streaming_rejects_sources_it_cannot_read_in_chunks(movies_df, tmp_path):
+    movies_df.to_pickle(tmp_path / 'movies.pkl')
+    with pytest.raises(ValueError, match='CSV'):
+        DataProcessor().build_streaming(str(tmp_path / 'movies.pkl'), str(tmp_path / 'out'))
+
+
+def test_token_pattern_is_built_on_first_use():
+    import os
+    import subprocess
+    import sys
+
+    subprocess.run([sys.executable, '-c', 'import data_processor; assert data_processor._token_pattern is None'],
+                   check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from data_processor import token_pattern
+    assert token_pattern().findall('दिलवाले दुल्हनिया 1995 ले जाएंगे!') == ['दिलवाले', 'दुल्हनिया', 'ले', 'जाएंगे']
+    assert token_pattern() is token_pattern()
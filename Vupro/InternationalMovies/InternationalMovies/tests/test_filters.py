@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import _build_tfidf, make_synthetic_availability, make_synthetic_catalogue
+from recommendation_engine import RecommendationEngine
+from shared_memory_engine import SharedEnginePublication, attach_engine
+from utils import deduplicate_movies
+
+FILTERS = [
+    None,
+    {'year_range': (1980, 2005)},
+    {'genres': ['Drama', 'Horror']},
+    {'industries': ['Hollywood']},
+    {'industries': ['Tamil', 'Telugu'], 'genres': ['Action']},
+    {'providers': ['Provider 0'], 'region': 'IN'},
+    {'providers': ['Provider 1', 'Provider 3'], 'offer_types': ['flatrate', 'rent']},
+    {'year_range': (1960, 2020), 'genres': ['Comedy'], 'industries': ['Hindi/Bollywood'],
+     'providers': ['Provider 0']},
+]
+
+
+@pytest.fixture(scope='module')
+def engines():
+    """The same catalogue in default, compact and shared-memory engines."""
+    raw = make_synthetic_catalogue(500, seed=1)
+    raw['tmdb_id'] = np.arange(len(raw)) * 3 + 11
+    raw['availability'], _ = make_synthetic_availability(len(raw))
+    # Re-listings under another category merge into multi-industry movies
+    relisted = raw.iloc[:60].copy()
+    relisted['industry'] = 'Hollywood'
+    movies_df = deduplicate_movies(pd.concat([raw, relisted], ignore_index=True))
+    tfidf_matrix, feature_names = _build_tfidf(movies_df)
+
+    default = RecommendationEngine(movies_df, tfidf_matrix, feature_names)
+    compact = RecommendationEngine(movies_df, tfidf_matrix, feature_names, compact=True)
+    publication = SharedEnginePublication(default)
+    shared, blocks = attach_engine(publication.manifest)
+    yield movies_df, default, compact, shared
+    for block in blocks:
+        block.close()
+    publication.close()
+
+
+def passes(movie, filters, default, idx):
+    """Whether a movie satisfies the filters, evaluated directly from the dataframe."""
+    filters = filters or {}
+    if 'year_range' in filters and pd.notna(movie['release_year']):
+        if not filters['year_range'][0] <= movie['release_year'] <= filters['year_range'][1]:
+            return False
+    if 'genres' in filters and not set(filters['genres']) & set(movie['genres']):
+        return False
+    if 'industries' in filters and not set(filters['industries']) & set(movie['industries']):
+        return False
+    if 'providers' in filters:
+        return bool(default._provider_mask(filters)[idx])
+    return True
+
+
+def assert_same_ranking(found, expected, atol=1e-5):
+    """Same scores in order and the same movies, up to the order of (float32) ties."""
+    np.testing.assert_allclose([score for _, score in found], [score for _, score in expected], atol=atol)
+    cutoff = expected[-1][1] + atol if expected else 0
+    assert ({movie_id for movie_id, score in found if score > cutoff}
+            == {movie_id for movie_id, score in expected if score > cutoff})
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+@pytest.mark.parametrize('method', ['plot', 'metadata', 'hybrid'])
+def test_compact_and_shared_engines_filter_alike(engines, method, filters):
+    movies_df, default, compact, shared = engines
+    assert movies_df['industries'].map(len).max() == 2
+
+    for movie_id in default.movie_ids[::50]:
+        expected = default.get_recommendations_by_id(movie_id, n=10, method=method, filters=filters)
+        assert all(passes(movies_df.iloc[default.row_of(found)], filters, default, default.row_of(found))
+                   for found, _ in expected)
+        for other in (compact, shared):
+            assert_same_ranking(other.get_recommendations_by_id(movie_id, n=10, method=method, filters=filters),
+                                expected)
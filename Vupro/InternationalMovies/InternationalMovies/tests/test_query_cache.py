@@ -0,0 +1,79 @@
+from query_cache import QueryCache, make_cache_key, normalize_filters
+from recommendation_engine import RecommendationEngine
+
+
+def test_equivalent_filters_share_a_key():
+    key = make_cache_key(3, 'hybrid', (0.6, 0.4), 10, {'genres': ['Drama', 'Action'], 'year_range': (1990.0, 2000)})
+    assert key == make_cache_key(3, 'hybrid', [0.6, 0.4], 10,
+                                 {'genres': ['Action', 'Drama', 'Action'], 'year_range': [1990, 2000],
+                                  'industries': []})
+    assert normalize_filters({'genres': [], 'year_range': None}) == {}
+    assert make_cache_key(3, 'plot', None, 10, None) == make_cache_key(3, 'plot', None, 10, {})
+
+
+def test_fractional_year_bounds_key_the_years_they_admit(movies_df, tfidf):
+    assert normalize_filters({'year_range': (1999.5, 2005.9)}) == {'year_range': [2000, 2005]}
+
+    engine = RecommendationEngine(movies_df, *tfidf, cache_size=64)
+    uncached = RecommendationEngine(movies_df, *tfidf)
+    engine.get_hybrid_recommendations(3, n=20, filters={'year_range': (1999.5, 2005.9)})
+    # Movies from 1999 pass this filter, so it must not be served the entry above
+    assert (engine.get_hybrid_recommendations(3, n=20, filters={'year_range': (1999, 2005)})
+            == uncached.get_hybrid_recommendations(3, n=20, filters={'year_range': (1999, 2005)}))
+    assert engine.cache_stats()['misses'] == 2
+
+
+def test_every_parameter_is_part_of_the_key():
+    base = make_cache_key(3, 'hybrid', (0.6, 0.4), 10, None)
+    assert len({base,
+                make_cache_key(4, 'hybrid', (0.6, 0.4), 10, None),
+                make_cache_key(3, 'metadata', (0.6, 0.4), 10, None),
+                make_cache_key(3, 'hybrid', (0.5, 0.5), 10, None),
+                make_cache_key(3, 'hybrid', (0.6, 0.4), 5, None),
+                make_cache_key(3, 'hybrid', (0.6, 0.4), 10, {'genres': ['Drama']})}) == 6
+
+
+def test_new_data_version_invalidates():
+    cache = QueryCache(max_entries=2)
+    cache.put('a', 1, [(1, 0.5)])
+    assert cache.get('a', 1) == [(1, 0.5)]
+    assert cache.get('a', 2) is None
+    assert cache.stats()['invalidations'] == 1
+
+    cache.put('a', 2, [])
+    cache.put('b', 2, [])
+    cache.put('c', 2, [])
+    assert cache.get('a', 2) is None and cache.stats()['evictions'] == 1
+
+
+def test_engine_options_change_the_key(movies_df, tfidf):
+    engine = RecommendationEngine(movies_df, *tfidf, cache_size=64)
+    engine.get_hybrid_recommendations(3, n=5)
+    engine.get_hybrid_recommendations(3, n=5, metadata_weights={'genre': 0.9})
+    engine.get_hybrid_recommendations(3, n=5, year_weight=0.1)
+    assert engine.cache_stats()['misses'] == 3
+    engine.get_hybrid_recommendations(3, n=5, metadata_weights={'genre': 0.9})
+    assert engine.cache_stats()['hits'] == 1
+
+
+def test_batches_read_and_fill_the_cache(movies_df, tfidf):
+    engine = RecommendationEngine(movies_df, *tfidf, cache_size=64)
+    uncached = RecommendationEngine(movies_df, *tfidf)
+    filters = [None, {'genres': ['Drama']}, None]
+
+    first = engine.get_batch_recommendations([1, 2, 3], n=5, filters=filters)
+    assert engine.cache_stats()['misses'] == 3
+    assert first == uncached.get_batch_recommendations([1, 2, 3], n=5, filters=filters)
+
+    # Cached batch entries serve single queries and later batches alike
+    assert engine.get_hybrid_recommendations(2, n=5, filters={'genres': ['Drama']}) == first[1]
+    assert engine.get_batch_recommendations([3, 4], n=5) == [first[2]] + uncached.get_batch_recommendations([4], n=5)
+    assert engine.cache_stats()['hits'] == 2 and engine.cache_stats()['misses'] == 4
+
+
+def test_compaction_invalidates_the_engine_cache(movies_df, tfidf):
+    engine = RecommendationEngine(movies_df, *tfidf, cache_size=64)
+    engine.get_content_based_recommendations(3, n=5)
+    engine._compact()
+    engine.get_content_based_recommendations(3, n=5)
+    assert engine.cache_stats()['hits'] == 0 and engine.cache_stats()['invalidations'] == 1
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from recommendation_engine import RecommendationEngine
+
+
+@pytest.mark.parametrize('spacing', [1, 3, 5000])
+def test_movie_ids_map_to_rows_dense_or_sparse(movies_df, tfidf, spacing):
+    movies_df = movies_df.copy()
+    ids = np.random.default_rng(0).permutation(len(movies_df)) * spacing + 3
+    movies_df['tmdb_id'] = ids
+    engine = RecommendationEngine(movies_df, *tfidf)
+
+    # Widely spread IDs are binary-searched instead of filling a mostly empty array
+    assert (engine._row_of_id is None) == (spacing == 5000)
+    assert (engine.rows_of(ids[::-1]) == np.arange(len(ids))[::-1]).all()
+    assert engine.row_of(ids[17]) == 17
+    for unknown in (-1, 2, ids.max() + 1):
+        with pytest.raises(KeyError):
+            engine.row_of(unknown)
+    with pytest.raises(KeyError):
+        engine.rows_of([ids[0], -1])
+
+
+def test_duplicate_movie_ids_are_rejected(movies_df, tfidf):
+    for spacing in (1, 5000):
+        movies_df = movies_df.copy()
+        movies_df['tmdb_id'] = np.arange(len(movies_df)) * spacing
+        movies_df.loc[5, 'tmdb_id'] = 0
+        with pytest.raises(ValueError, match='unique'):
+            RecommendationEngine(movies_df, *tfidf)
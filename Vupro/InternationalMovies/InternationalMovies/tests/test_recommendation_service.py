@@ -0,0 +1,122 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from data_processor import DataProcessor
+from recommendation_engine import RecommendationEngine
+from recommendation_service import RecommendationService
+
+
+def run_requests(engine, requests, processor=None):
+    """Send (path, body) requests to a service in order; return their (status, payload) replies."""
+    async def run():
+        service = RecommendationService(engine, processor, batch_window=0.001)
+        service.batcher.start()
+        try:
+            return [await service._dispatch('POST', path, json.dumps(body).encode()) for path, body in requests]
+        finally:
+            await service.batcher.stop()
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize('body', [
+    {'movie_idx': 3, 'weights': [[0.6], [0.4]]},
+    {'movie_idx': 3, 'weights': [0.6]},
+    {'movie_idx': 3, 'weights': [0.6, 'x']},
+    {'movie_idx': 3, 'weights': [0.6, float('nan')]},
+    {'movie_idx': 3, 'weights': [True, 0.4]},
+    {'movie_idx': 3, 'metadata_weights': {'genre': [1]}},
+    {'movie_idx': 3, 'metadata_weights': {'budget': 1.0}},
+    {'movie_idx': 3, 'metadata_weights': [0.5, 0.3, 0.2]},
+    {'movie_idx': 3, 'year_weight': 'high'},
+    {'movie_idx': 3, 'recency_weight': float('inf')},
+    {'movie_idx': 3, 'timeout_ms': 'soon'},
+    {'movie_idx': -1},
+    {'movie_idx': 3, 'n': 0},
+    {'movie_idx': 3, 'method': 'random'},
+    {'movie_idx': 3, 'filters': [1]},
+    {'movie_idx': 3, 'filters': {'year_range': [1990]}},
+    {'movie_idx': 3, 'filters': {'year_range': [2005, 1990]}},
+    {'movie_idx': 3, 'filters': {'year_range': ['1990', 2005]}},
+    {'movie_idx': 3, 'filters': {'year_range': 1990}},
+    {'movie_idx': 3, 'filters': {'industries': 'Bollywood'}},
+    {'movie_idx': 3, 'filters': {'genres': [1, 2]}},
+    {'movie_idx': 3, 'filters': {'offer_types': ['stream']}},
+    {'movie_idx': 3, 'filters': {'collapse_duplicates': 'yes'}},
+    {'movie_idx': 3, 'filters': {'decade': 1990}},
+    {'movie_id': '107'},
+    {'movie_id': True},
+    {},
+])
+def test_invalid_requests_are_rejected(engine, body):
+    status, payload = run_requests(engine, [('/recommendations/similar', body)])[0]
+    assert status == 400, payload
+
+
+def test_bad_request_does_not_stop_the_batcher(engine):
+    valid = {'movie_idx': 3, 'n': 5, 'metadata_weights': {'genre': 0.5}}
+    replies = run_requests(engine, [
+        ('/recommendations/similar', {'movie_idx': 3, 'weights': [[0.6], [0.4]]}),
+        ('/recommendations/similar', valid),
+        ('/recommendations/similar', dict(valid, method='graph')),
+    ])
+    assert [status for status, _ in replies] == [400, 200, 200]
+    expected = engine.get_hybrid_recommendations(3, n=5, metadata_weights={'genre': 0.5})
+    assert [item['movie_id'] for item in replies[1][1]['recommendations']] == [engine.movie_ids[idx]
+                                                                               for idx, _ in expected]
+
+
+def test_failing_query_fails_only_itself(movies_df, tfidf):
+    # Same batch group; the engine has no availability data, so only the provider filter fails
+    engine = RecommendationEngine(movies_df.drop(columns=['ott_providers']), *tfidf)
+    status, payload = run_requests(engine, [('/recommendations/batch', {'queries': [
+        {'movie_idx': 1},
+        {'movie_idx': 2, 'filters': {'providers': ['Netflix']}},
+        {'movie_idx': 3},
+    ]})])[0]
+    assert status == 200
+    results = payload['results']
+    assert results[1]['status'] == 500
+    assert len(results[0]['recommendations']) == len(results[2]['recommendations']) == 5
+
+
+def test_service_queries_use_the_result_cache(movies_df, tfidf):
+    engine = RecommendationEngine(movies_df, *tfidf, cache_size=16)
+    body = {'movie_idx': 3, 'n': 5, 'year_weight': 0.1}
+    replies = run_requests(engine, [('/recommendations/similar', body)] * 2)
+    assert replies[0] == replies[1]
+    assert engine.cache_stats()['hits'] == 1 and engine.cache_stats()['misses'] == 1
+
+
+def test_movies_are_identified_by_movie_id(engine):
+    movie_id = int(engine.movie_ids[3])
+    replies = run_requests(engine, [
+        ('/recommendations/similar', {'movie_id': movie_id, 'n': 5}),
+        ('/recommendations/similar', {'movie_idx': 3, 'n': 5}),
+        ('/recommendations/similar', {'movie_id': movie_id + 1}),
+    ])
+    assert replies[0] == replies[1]
+    expected = engine.get_recommendations_by_id(movie_id, n=5)
+    recommendations = replies[0][1]['recommendations']
+    assert [item['movie_id'] for item in recommendations] == [found_id for found_id, _ in expected]
+    assert recommendations[0]['title'] == engine.get_movie_by_id(expected[0][0])['title']
+    assert replies[2][0] == 404
+
+
+def test_text_queries_are_vectorised_off_the_event_loop(movies_df):
+    processor = DataProcessor()
+    tfidf_matrix, feature_names = processor.vectorize_text(
+        [processor.preprocess_text(overview) for overview in movies_df['overview']])
+    engine = RecommendationEngine(movies_df, tfidf_matrix, feature_names)
+
+    threads = []
+    preprocess_text = processor.preprocess_text
+    processor.preprocess_text = lambda text: threads.append(threading.current_thread()) or preprocess_text(text)
+
+    status, payload = run_requests(engine, [('/recommendations/text', {
+        'text': movies_df['overview'].iloc[0], 'n': 5, 'filters': {'year_range': [1900, 2100]}})], processor)[0]
+    assert status == 200, payload
+    assert len(payload['recommendations']) == 5
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,105 @@
+import threading
+
+import numpy as np
+import pytest
+
+from recommendation_engine import RecommendationEngine
+from sharded_engine import ShardedEngine
+
+
+@pytest.fixture
+def sharded(movies_df, tfidf):
+    with ShardedEngine(movies_df, *tfidf, by='industry', n_workers=2) as engine:
+        yield engine
+
+
+def assert_consistent(layout):
+    """Every shard covers exactly the layout's metadata columns, with matching block norms."""
+    n_columns = len(layout.metadata_feature_names)
+    n_blocks = len(dict.fromkeys(kind for kind, _ in layout.metadata_feature_names))
+    for shard in layout.shards.values():
+        engine = shard.engine
+        assert engine.metadata_matrix.shape[1] == n_columns
+        assert engine.metadata_feature_names == layout.metadata_feature_names
+        assert engine.metadata_block_norms.shape == (engine.metadata_matrix.shape[0], n_blocks)
+        recomputed = RecommendationEngine.__new__(RecommendationEngine)
+        recomputed.metadata_matrix = engine.metadata_matrix
+        recomputed.metadata_feature_names = engine.metadata_feature_names
+        recomputed._index_metadata_blocks()
+        np.testing.assert_allclose(engine.metadata_block_norms, recomputed.metadata_block_norms, rtol=1e-6)
+
+
+def test_matches_a_single_engine(movies_df, tfidf, sharded):
+    engine = RecommendationEngine(movies_df, *tfidf)
+    for movie_idx in range(0, len(movies_df), 37):
+        expected = engine.get_hybrid_recommendations(movie_idx, n=10)
+        found = sharded.get_hybrid_recommendations(movie_idx, n=10)
+        np.testing.assert_allclose([score for _, score in found], [score for _, score in expected], atol=1e-4)
+
+
+def test_reload_publishes_a_new_consistent_layout(movies_df, tfidf):
+    # Without directors the first shard only has a genre block; the director
+    # and cast blocks arrive with the later shards
+    movies_df = movies_df.copy()
+    movies_df.loc[movies_df['industry'] == 'Bengali', 'director'] = None
+    sharded = ShardedEngine(movies_df, *tfidf, by='industry', n_workers=2)
+    assert list(sharded.shards)[0] == 'Bengali'
+    assert_consistent(sharded._layout)
+
+    old_layout = sharded._layout
+    old_widths = {name: shard.engine.metadata_matrix.shape[1] for name, shard in old_layout.shards.items()}
+    old_names = list(old_layout.metadata_feature_names)
+
+    # New cast members and a new shard
+    rows = np.flatnonzero(movies_df['industry'] == 'Tamil')
+    tamil = movies_df.iloc[rows].reset_index(drop=True)
+    tamil['cast'] = [[f"Newcomer {i}"] for i in range(len(tamil))]
+    sharded.load_shard('Tamil', tamil, tfidf[0][rows], global_ids=rows)
+    archive = movies_df.iloc[:5].reset_index(drop=True)
+    archive['industry'] = 'Archive'
+    archive['director'] = 'Archivist'
+    sharded.load_shard('Archive', archive, tfidf[0][:5])
+
+    # The published layout was not modified in place
+    assert old_layout.metadata_feature_names == old_names
+    assert {name: shard.engine.metadata_matrix.shape[1]
+            for name, shard in old_layout.shards.items()} == old_widths
+
+    layout = sharded._layout
+    assert ('cast', 'Newcomer 0') in layout.metadata_feature_names
+    assert ('director', 'Archivist') in layout.metadata_feature_names
+    assert_consistent(layout)
+
+    # Queries from old, reloaded and new shards reach every shard
+    for movie_idx in (int(rows[0]), 0, len(movies_df)):
+        assert len(sharded.get_hybrid_recommendations(movie_idx, n=5)) == 5
+        sharded.get_content_based_recommendations(movie_idx, n=5, content_type='metadata')
+
+    sharded.unload_shard('Archive')
+    assert len(sharded) == len(movies_df)
+    with pytest.raises(KeyError):
+        sharded.get_movie(len(movies_df))
+    sharded.close()
+
+
+def test_queries_during_reloads(movies_df, tfidf, sharded):
+    rows = np.flatnonzero(movies_df['industry'] == 'Telugu')
+    telugu = movies_df.iloc[rows].reset_index(drop=True)
+    done = threading.Event()
+
+    def reload():
+        for version in range(20):
+            shard = telugu.copy()
+            shard['cast'] = [[f"Actor v{version}x{i}"] for i in range(len(shard))]
+            sharded.load_shard('Telugu', shard, tfidf[0][rows], global_ids=rows)
+        done.set()
+
+    thread = threading.Thread(target=reload)
+    thread.start()
+    queries = 0
+    while not done.is_set() or queries < 50:
+        movie_idx = queries * 7 % len(movies_df)
+        assert len(sharded.get_hybrid_recommendations(movie_idx, n=5)) == 5
+        queries += 1
+    thread.join()
+    assert_consistent(sharded._layout)
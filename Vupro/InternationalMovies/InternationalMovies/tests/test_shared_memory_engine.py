@@ -0,0 +1,54 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from recommendation_engine import RecommendationEngine
+from shared_memory_engine import SharedEnginePool, SharedEnginePublication, attach_engine
+
+
+def test_pool_survives_a_failed_query(engine):
+    with SharedEnginePool(engine, n_workers=2) as pool:
+        expected = [idx for idx, _ in engine.get_hybrid_recommendations(3, n=5)]
+
+        with pytest.raises(RuntimeError, match='1 of 3 failed'):
+            pool.map('get_hybrid_recommendations', [((1,), {'n': 5}), ((10 ** 9,), {'n': 5}), ((2,), {'n': 5})])
+
+        # No reply of the failed batch leaks into the next one
+        assert [idx for idx, _ in pool.query('get_hybrid_recommendations', 3, n=5)] == expected
+        assert pool.map('get_movie', [((0,), {}), ((1,), {})])[1]['title'] == engine.get_movie(1)['title']
+
+
+def test_dead_worker_raises_instead_of_hanging(engine):
+    with SharedEnginePool(engine, n_workers=2, poll_interval=0.1) as pool:
+        pool.workers[0].terminate()
+        pool.workers[0].join()
+
+        with pytest.raises(RuntimeError, match='exited'):
+            pool.map('get_hybrid_recommendations', [((idx,), {'n': 5}) for idx in range(20)], timeout=30)
+
+
+def test_concurrent_maps_get_their_own_replies(engine):
+    with SharedEnginePool(engine, n_workers=2) as pool:
+        def titles(start):
+            return [movie['title'] for movie in pool.map('get_movie', [((idx,), {}) for idx in range(start, start + 10)])]
+
+        with ThreadPoolExecutor(max_workers=4) as threads:
+            batches = list(threads.map(titles, [0, 50, 100, 150]))
+
+        for start, batch in zip([0, 50, 100, 150], batches):
+            assert batch == [engine.get_movie(idx)['title'] for idx in range(start, start + 10)]
+
+
+def test_attached_engine_keeps_whether_ids_are_stable(movies_df, tfidf):
+    for df in (movies_df, movies_df.drop(columns=['tmdb_id'])):
+        engine = RecommendationEngine(df, *tfidf)
+        publication = SharedEnginePublication(engine)
+        try:
+            attached, blocks = attach_engine(publication.manifest)
+            assert attached.has_stable_ids == engine.has_stable_ids
+            assert (attached.movie_ids == engine.movie_ids).all()
+            del attached
+            for block in blocks:
+                block.close()
+        finally:
+            publication.close()
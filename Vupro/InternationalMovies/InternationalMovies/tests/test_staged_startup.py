@@ -0,0 +1,17 @@
+import minhash_lsh
+from staged_startup import StagedStartup
+
+
+def test_failed_dedupe_keeps_the_full_engine(movies_df, monkeypatch):
+    def fail(self, shingles):
+        raise MemoryError("no room for signatures")
+
+    monkeypatch.setattr(minhash_lsh.MinHashLSH, 'fit', fail)
+    startup = StagedStartup(lambda: movies_df.copy())
+    startup.start(background=False)
+
+    assert startup.engine.has_plot_features
+    assert startup.ready_methods() == {'plot', 'metadata', 'hybrid', 'graph'}
+    stats = startup.stats()
+    assert stats['error'] is None and 'MemoryError' in stats['dedupe_error']
+    assert len(startup.engine.get_hybrid_recommendations(3, n=5, filters={'collapse_duplicates': True})) == 5
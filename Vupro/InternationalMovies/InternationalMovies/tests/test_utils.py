@@ -0,0 +1,28 @@
+import contextlib
+import io
+
+from benchmarks import _serve_fake_tmdb
+from enrichment import MovieEnricher
+from provider_index import ProviderIndex
+from utils import fetch_movie_enrichment, fetch_movies_from_tmdb
+
+
+def test_lazy_ingestion_keeps_providers_and_defers_trailers():
+    server = _serve_fake_tmdb(latency=0)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = fetch_movies_from_tmdb('key', base_url=base_url, page_delay=0)
+        assert 'trailer_url' not in df.columns
+        assert df['ott_providers'].iloc[0]['flatrate'][0]['name'] == 'Provider 0'
+
+        # The provider filter covers the whole catalogue without any display-time fetch
+        index = ProviderIndex.from_movies(df)
+        assert index.mask(['Provider 1'], region='IN').all()
+
+        enricher = MovieEnricher(lambda movie_id: fetch_movie_enrichment(movie_id, 'key', base_url))
+        movie_id = int(df['tmdb_id'].iloc[0])
+        assert enricher.get(movie_id) == {'trailer_url': f"https://www.youtube.com/watch?v=v{movie_id}x0"}
+        enricher.close()
+    finally:
+        server.shutdown()
@@ -1,16 +1,26 @@
-import pandas as pd
+# pandas, requests and PIL are imported by the functions that use them, so
+# importing utils for its similarity helpers stays cheap
 import numpy as np
-import requests
 import os
-from io import BytesIO
-from PIL import Image
-import random
+from scipy.sparse import csr_matrix
+from provider_index import encode_availability
+
+TMDB_API_URL = "https://api.themoviedb.org/3"
+
+def _tmdb_api_key():
+    return os.getenv('TMDB_API_KEY', 'ea568542a28df5689f148a9ec3908a53')
+
+def _eager_enrichment():
+    """Whether ingestion fetches the trailer of every movie (TMDB_EAGER_ENRICHMENT=1)."""
+    return os.getenv('TMDB_EAGER_ENRICHMENT', '') not in ('', '0')
 
 def load_data():
     """
     Load movie data from either a predefined dataset or TMDB API.
     Returns a DataFrame with movie information.
     """
+    import pandas as pd
+    
     print("Loading movie data...")
     
     # Try to load from disk if available
@@ -20,16 +30,16 @@ def load_data():
             with open('movies_database.pkl', 'rb') as f:
                 df = pickle.load(f)
                 print(f"Loaded {len(df)} movies from disk cache")
-                return df
+                return deduplicate_movies(df)
         except Exception as e:
             print(f"Error loading cached data: {e}")
     
     # Check if we have a TMDB API key
-    tmdb_api_key = os.getenv('TMDB_API_KEY', 'ea568542a28df5689f148a9ec3908a53')
+    tmdb_api_key = _tmdb_api_key()
     if tmdb_api_key:
         try:
             print("TMDB API key found, fetching real movie data...")
-            df = fetch_movies_from_tmdb(tmdb_api_key)
+            df = fetch_movies_from_tmdb(tmdb_api_key, eager_enrichment=_eager_enrichment())
             if not df.empty:
                 # Cache to disk for future use
                 try:
@@ -49,7 +59,7 @@ def load_data():
         if os.path.exists('bollywood_movies.csv'):
             movies_df = pd.read_csv('bollywood_movies.csv')
             print(f"Loaded {len(movies_df)} movies from local CSV")
-            return movies_df
+            return deduplicate_movies(movies_df)
     except Exception as e:
         print(f"Error loading local CSV: {str(e)}")
     
@@ -64,25 +74,75 @@ def load_data():
             'director', 'cast', 'poster_path', 'language', 'industry'
         ])
 
-def fetch_movies_from_tmdb(api_key):
+def refresh_data():
+    """
+    Re-fetch the catalogue from TMDB and replace the disk cache.
+
+    Unlike load_data, the existing movies_database.pkl is not read. The new
+    cache is written to a temporary file and renamed over the old one, so a
+    concurrent load_data never sees a partial file. If the fetch fails or
+    returns nothing, falls back to load_data.
+
+    Returns:
+        pd.DataFrame: DataFrame with movie information
+    """
+    import pandas as pd
+    
+    tmdb_api_key = _tmdb_api_key()
+    try:
+        df = fetch_movies_from_tmdb(tmdb_api_key, eager_enrichment=_eager_enrichment())
+    except Exception as e:
+        print(f"Error fetching from TMDB: {e}")
+        df = pd.DataFrame()
+
+    if df.empty:
+        return load_data()
+
+    try:
+        import pickle
+        with open('movies_database.pkl.tmp', 'wb') as f:
+            pickle.dump(df, f)
+        os.replace('movies_database.pkl.tmp', 'movies_database.pkl')
+        print("Replaced cached movie data on disk")
+    except Exception as e:
+        print(f"Error caching data: {e}")
+
+    return df
+
+def fetch_movies_from_tmdb(api_key, eager_enrichment=False, base_url=TMDB_API_URL, page_delay=0.2):
     """
     Fetch movies from TMDB API including all Indian languages and Hollywood
     
+    Every movie's details, credits and watch providers are fetched; the
+    providers give 'ott_providers' and the 'availability' column that the
+    streaming-provider filter searches across the whole catalogue. Trailers are
+    only shown for displayed movies, so by default they are left to
+    enrichment.MovieEnricher, which fetches them on first display.
+    
     Args:
         api_key (str): TMDB API key
+        eager_enrichment (bool): Also fetch every movie's videos, adding 'trailer_url'
+        base_url (str): TMDB API root
+        page_delay (float): Seconds to wait between discover pages
         
     Returns:
         pd.DataFrame: DataFrame with movie information
     """
+    import pandas as pd
+    import requests
     from time import sleep
     
     print("Fetching diverse movie collection from TMDB...")
     
-    base_url = "https://api.themoviedb.org/3"
+    append_to_response = 'credits,watch/providers,videos' if eager_enrichment else 'credits,watch/providers'
     
     # Will store all fetched movies
     movies_data = []
     
+    # TMDB id -> position in movies_data; a movie found under several categories
+    # is fetched once and lists all of them in 'industries'
+    seen = {}
+    
     # Movie sources to fetch (categories)
     categories = [
         # Indian movies in different languages
@@ -116,9 +176,15 @@ def fetch_movies_from_tmdb(api_key):
                 movie_id = movie.get('id')
                 if not movie_id:
                     continue
+                
+                if movie_id in seen:
+                    industries = movies_data[seen[movie_id]]['industries']
+                    if category['name'] not in industries:
+                        industries.append(category['name'])
+                    continue
                     
-                # Get detailed movie info including credits and videos (trailers)
-                details_url = f"{base_url}/movie/{movie_id}?api_key={api_key}&append_to_response=credits,videos,watch/providers"
+                # Get detailed movie info including credits and providers (and videos if eager)
+                details_url = f"{base_url}/movie/{movie_id}?api_key={api_key}&append_to_response={append_to_response}"
                 details_response = requests.get(details_url)
                 
                 if details_response.status_code != 200:
@@ -152,47 +218,9 @@ def fetch_movies_from_tmdb(api_key):
                 # Determine movie industry (Bollywood, Tollywood, Hollywood, etc.)
                 industry = category['name']
                 
-                # Extract trailer URL
-                trailer_url = ""
-                if 'videos' in details and 'results' in details['videos']:
-                    for video in details['videos']['results']:
-                        # Look for official trailers on YouTube
-                        if video.get('site') == 'YouTube' and video.get('type') == 'Trailer' and video.get('official'):
-                            trailer_url = f"https://www.youtube.com/watch?v={video.get('key')}"
-                            break
-                    
-                    # If no official trailer, look for any trailer
-                    if not trailer_url:
-                        for video in details['videos']['results']:
-                            if video.get('site') == 'YouTube' and video.get('type') == 'Trailer':
-                                trailer_url = f"https://www.youtube.com/watch?v={video.get('key')}"
-                                break
-                
-                # Extract OTT/streaming providers
-                ott_providers = {}
-                providers_data = details.get('watch/providers', {}).get('results', {})
-                
-                # Check for providers in US, IN (India), and GB (UK) regions
-                priority_regions = ['IN', 'US', 'GB']
-                for region in priority_regions:
-                    if region in providers_data:
-                        region_providers = providers_data[region]
-                        # Collect flatrate (subscription), buy, and rent options
-                        for provider_type in ['flatrate', 'buy', 'rent']:
-                            if provider_type in region_providers:
-                                ott_providers[provider_type] = [
-                                    {
-                                        'name': provider.get('provider_name', ''),
-                                        'logo': f"https://image.tmdb.org/t/p/original{provider.get('logo_path', '')}" if provider.get('logo_path') else ''
-                                    }
-                                    for provider in region_providers[provider_type][:3]  # Limit to top 3 providers
-                                ]
-                        # If we found providers for this region, no need to check others
-                        if ott_providers:
-                            break
-                
                 # Create movie dict with all information
                 movie_data = {
+                    'tmdb_id': movie_id,
                     'title': details.get('title', ''),
                     'overview': details.get('overview', ''),
                     'release_year': int(details.get('release_date', '').split('-')[0]) if details.get('release_date') else None,
@@ -202,15 +230,21 @@ def fetch_movies_from_tmdb(api_key):
                     'poster_path': details.get('poster_path', ''),
                     'language': language,
                     'industry': industry,
+                    'industries': [industry],
                     'production_countries': production_countries,
-                    'trailer_url': trailer_url,
-                    'ott_providers': ott_providers
+                    'popularity': details.get('popularity'),
+                    'vote_average': details.get('vote_average'),
+                    'vote_count': details.get('vote_count')
                 }
+                movie_data.update(providers_of(details))
+                if eager_enrichment:
+                    movie_data['trailer_url'] = trailer_of(details)
                 
+                seen[movie_id] = len(movies_data)
                 movies_data.append(movie_data)
                 
             # Be nice to the API with a small delay
-            sleep(0.2)
+            sleep(page_delay)
     
     # Convert to DataFrame
     df = pd.DataFrame(movies_data)
@@ -218,8 +252,147 @@ def fetch_movies_from_tmdb(api_key):
     
     return df
 
+def trailer_of(details):
+    """
+    YouTube trailer URL from a TMDB details response fetched with append_to_response=videos.
+    
+    Args:
+        details (dict): TMDB movie details
+        
+    Returns:
+        str: URL of the official trailer, else of any trailer ('' if there is none)
+    """
+    # Extract trailer URL
+    trailer_url = ""
+    if 'videos' in details and 'results' in details['videos']:
+        for video in details['videos']['results']:
+            # Look for official trailers on YouTube
+            if video.get('site') == 'YouTube' and video.get('type') == 'Trailer' and video.get('official'):
+                trailer_url = f"https://www.youtube.com/watch?v={video.get('key')}"
+                break
+        
+        # If no official trailer, look for any trailer
+        if not trailer_url:
+            for video in details['videos']['results']:
+                if video.get('site') == 'YouTube' and video.get('type') == 'Trailer':
+                    trailer_url = f"https://www.youtube.com/watch?v={video.get('key')}"
+                    break
+    
+    return trailer_url
+
+def providers_of(details):
+    """
+    Streaming fields from a TMDB details response fetched with append_to_response=watch/providers.
+    
+    Args:
+        details (dict): TMDB movie details
+        
+    Returns:
+        dict: 'ott_providers' (up to 3 per offer type in the first of IN, US
+            and GB with any, for display) and 'availability' (every region,
+            encoded for the provider index)
+    """
+    # Extract OTT/streaming providers
+    ott_providers = {}
+    providers_data = details.get('watch/providers', {}).get('results', {})
+    
+    # Every region and offer type, compactly encoded for the provider index
+    availability = encode_availability(providers_data)
+    
+    # For display, check for providers in US, IN (India), and GB (UK) regions
+    priority_regions = ['IN', 'US', 'GB']
+    for region in priority_regions:
+        if region in providers_data:
+            region_providers = providers_data[region]
+            # Collect flatrate (subscription), buy, and rent options
+            for provider_type in ['flatrate', 'buy', 'rent']:
+                if provider_type in region_providers:
+                    ott_providers[provider_type] = [
+                        {
+                            'name': provider.get('provider_name', ''),
+                            'logo': f"https://image.tmdb.org/t/p/original{provider.get('logo_path', '')}" if provider.get('logo_path') else ''
+                        }
+                        for provider in region_providers[provider_type][:3]  # Limit to top 3 providers
+                    ]
+            # If we found providers for this region, no need to check others
+            if ott_providers:
+                break
+    
+    return {'ott_providers': ott_providers, 'availability': availability}
+
+def fetch_movie_enrichment(movie_id, api_key=None, base_url=TMDB_API_URL, timeout=10):
+    """
+    Fetch the trailer of one movie.
+    
+    Args:
+        movie_id (int): TMDB id of the movie
+        api_key (str): TMDB API key (from TMDB_API_KEY if None)
+        base_url (str): TMDB API root
+        timeout (float): Request timeout in seconds
+        
+    Returns:
+        dict: 'trailer_url' (see trailer_of)
+        
+    Raises:
+        requests.RequestException: If the request fails
+    """
+    import requests
+    
+    api_key = _tmdb_api_key() if api_key is None else api_key
+    # Providers are part of the catalogue already; only the videos are needed
+    response = requests.get(f"{base_url}/movie/{int(movie_id)}/videos",
+                            params={'api_key': api_key}, timeout=timeout)
+    response.raise_for_status()
+    return {'trailer_url': trailer_of({'videos': response.json()})}
+
+def deduplicate_movies(df):
+    """
+    Merge rows that share a TMDB id.
+    
+    The first row of each movie is kept; its 'industries' becomes every
+    industry the movie was listed under. Dataframes without a 'tmdb_id' column
+    are returned unchanged.
+    
+    Args:
+        df (pd.DataFrame): Movie dataframe
+        
+    Returns:
+        pd.DataFrame: DataFrame with one row per TMDB id
+    """
+    import pandas as pd
+    
+    if 'tmdb_id' not in df.columns or df.empty:
+        return df
+    
+    if 'industries' in df.columns:
+        listed = df['industries']
+    elif 'industry' in df.columns:
+        listed = df['industry'].map(lambda industry: [industry] if isinstance(industry, str) and industry else [])
+    else:
+        listed = None
+    
+    duplicated = df['tmdb_id'].duplicated(keep='first') & df['tmdb_id'].notna()
+    if not duplicated.any():
+        return df
+    
+    df = df.copy()
+    if listed is not None:
+        # Hash index of TMDB id -> industries in first-seen order
+        merged = {}
+        for movie_id, industries in zip(df['tmdb_id'], listed):
+            if pd.notna(movie_id) and isinstance(industries, list):
+                target = merged.setdefault(movie_id, [])
+                target.extend(industry for industry in industries if industry not in target)
+        df['industries'] = [merged.get(movie_id, industries) if pd.notna(movie_id) else industries
+                            for movie_id, industries in zip(df['tmdb_id'], listed)]
+    
+    print(f"Merged {int(duplicated.sum())} duplicate movies")
+    return df[~duplicated].reset_index(drop=True)
+
 def create_sample_dataset():
     """Create a sample Bollywood movie dataset with essential information."""
+    import pandas as pd
+    
     # This is a sample dataset with popular Bollywood movies
     # In a production environment, this would be replaced with real data
     
@@ -478,6 +651,10 @@ def fetch_poster(poster_path):
     Returns:
         PIL.Image: A PIL Image object (either loaded from URL or generated)
     """
+    from io import BytesIO
+    import requests
+    from PIL import Image
+    
     # First, prioritize TMDB paths (starting with /)
     if poster_path and poster_path.startswith('/'):
         try:
@@ -535,6 +712,8 @@ def calculate_similarity(movie1, movie2, features, weights=None):
     Returns:
         float: Similarity score (0-1)
     """
+    import pandas as pd
+    
     if weights is None:
         weights = {feature: 1/len(features) for feature in features}
     
@@ -591,3 +770,169 @@ def calculate_similarity(movie1, movie2, features, weights=None):
         similarity += weights[feature] * feature_sim
     
     return similarity
+
+def _intern_value(value, table, row):
+    """
+    Map a scalar feature value to an integer code for equality comparisons.
+    
+    Missing values (NaN) never compare equal, so each one gets its own
+    negative code, mirroring the ``==`` semantics of calculate_similarity.
+    """
+    if isinstance(value, float) and value != value:
+        return -(row + 1)
+    try:
+        key = ('value', value)
+        hash(key)
+    except TypeError:
+        # Unhashable values (lists, dicts) are compared by their repr
+        key = ('repr', repr(value))
+    return table.setdefault(key, len(table))
+
+def _create_set_matrix(values, limit=None):
+    """
+    Create a binary CSR matrix with one row per movie and one column per unique item.
+    
+    Args:
+        values (iterable): Per-movie lists (non-list entries become empty rows)
+        limit (int): Only use the first `limit` items of each list
+        
+    Returns:
+        scipy.sparse.csr_matrix: Binary membership matrix
+    """
+    vocabulary = {}
+    indices = []
+    indptr = [0]
+    for items in values:
+        if isinstance(items, list):
+            items = items[:limit] if limit is not None else items
+            # Sets drop duplicates, exactly like the scalar comparison does
+            for item in set(items):
+                indices.append(vocabulary.setdefault(item, len(vocabulary)))
+        indptr.append(len(indices))
+    
+    data = np.ones(len(indices), dtype=np.float64)
+    return csr_matrix((data, np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+                      shape=(len(indptr) - 1, max(len(vocabulary), 1)))
+
+def encode_similarity_features(movies_df, features):
+    """
+    Precompute array encodings used by calculate_similarity_batch.
+    
+    Args:
+        movies_df (pd.DataFrame): Movie dataframe
+        features (list): List of features that will be compared
+        
+    Returns:
+        dict: Mapping of feature name to its encoding. Features missing from the
+            dataframe are left out and contribute nothing, as in calculate_similarity.
+    """
+    import pandas as pd
+    
+    encodings = {}
+    
+    for feature in features:
+        if feature not in movies_df.columns:
+            continue
+        
+        column = movies_df[feature]
+        
+        if feature == 'genres':
+            genre_matrix = _create_set_matrix(column)
+            encodings[feature] = {
+                'matrix': genre_matrix,
+                'sizes': np.diff(genre_matrix.indptr).astype(np.float64)
+            }
+        
+        elif feature == 'cast':
+            # Only the top 3 billed cast members take part in the comparison
+            cast_matrix = _create_set_matrix(column, limit=3)
+            encodings[feature] = {
+                'matrix': cast_matrix,
+                'sizes': np.diff(cast_matrix.indptr).astype(np.float64)
+            }
+        
+        elif feature == 'release_year':
+            # Missing years are encoded as 0, which the scoring treats as "no similarity"
+            years = pd.to_numeric(column, errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+            encodings[feature] = {'years': years}
+        
+        else:
+            # Director and any other feature use exact-match integer codes
+            table = {}
+            codes = np.fromiter(
+                (_intern_value(value, table, row) for row, value in enumerate(column)),
+                dtype=np.int64,
+                count=len(column)
+            )
+            encodings[feature] = {'codes': codes}
+    
+    return encodings
+
+def _rowwise_overlap(matrix, left, right):
+    """Count shared columns between matrix rows `left[k]` and `right[k]` for every k."""
+    overlap = matrix[left].multiply(matrix[right]).sum(axis=1)
+    return np.asarray(overlap, dtype=np.float64).ravel()
+
+def calculate_similarity_batch(encodings, query, candidates, features, weights=None):
+    """
+    Vectorised version of calculate_similarity over many movie pairs.
+    
+    Either compare one query movie against an array of candidates, or pass two
+    equal-length index arrays to score the pairs (query[k], candidates[k]).
+    
+    Args:
+        encodings (dict): Output of encode_similarity_features
+        query (int or array-like): Row index of the query movie, or an array of row indices
+        candidates (array-like): Row indices of the candidate movies
+        features (list): List of features to compare
+        weights (dict): Feature weights (default: equal weights)
+        
+    Returns:
+        np.ndarray: Similarity scores (0-1), one per pair
+    """
+    if weights is None:
+        weights = {feature: 1/len(features) for feature in features}
+    
+    candidates = np.asarray(candidates, dtype=np.int64).ravel()
+    left = np.broadcast_to(np.asarray(query, dtype=np.int64), candidates.shape)
+    right = candidates
+    
+    similarity = np.zeros(len(candidates), dtype=np.float64)
+    
+    for feature in features:
+        if feature not in encodings:
+            continue
+        
+        encoding = encodings[feature]
+        
+        if feature == 'genres':
+            # Jaccard similarity: |A & B| / (|A| + |B| - |A & B|)
+            sizes = encoding['sizes']
+            intersection = _rowwise_overlap(encoding['matrix'], left, right)
+            union = sizes[left] + sizes[right] - intersection
+            both_present = (sizes[left] > 0) & (sizes[right] > 0)
+            feature_sim = np.divide(intersection, union, out=np.zeros_like(intersection),
+                                    where=both_present & (union > 0))
+        
+        elif feature == 'cast':
+            # Overlap of the top 3 cast members, normalised by 3
+            sizes = encoding['sizes']
+            intersection = _rowwise_overlap(encoding['matrix'], left, right)
+            both_present = (sizes[left] > 0) & (sizes[right] > 0)
+            feature_sim = np.where(both_present, intersection / 3, 0.0)
+        
+        elif feature == 'release_year':
+            years = encoding['years']
+            year1 = years[left]
+            year2 = years[right]
+            feature_sim = np.maximum(0, 1 - (np.abs(year1 - year2) / 20))
+            feature_sim[(year1 == 0) | (year2 == 0)] = 0
+        
+        else:
+            codes = encoding['codes']
+            feature_sim = (codes[left] == codes[right]).astype(np.float64)
+        
+        # Add weighted feature similarity
+        similarity += weights[feature] * feature_sim
+    
+    return similarity